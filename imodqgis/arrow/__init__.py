@@ -1,3 +1,3 @@
-from imodqgis.arrow.reading import read_arrow
+from imodqgis.arrow.reading import ArrowTimeseries, read_arrow, read_arrow_timeseries
 
-__all__ = ["read_arrow"]
\ No newline at end of file
+__all__ = ["ArrowTimeseries", "read_arrow", "read_arrow_timeseries"]
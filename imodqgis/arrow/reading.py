@@ -1,10 +1,158 @@
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
 import pandas as pd
 from osgeo import ogr
 
 
-def read_arrow(path):
-    dataset = ogr.Open(path)
+def attribute_filter(
+    id_column: Optional[str] = None,
+    ids: Optional[Iterable[int]] = None,
+    time_column: str = "time",
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> Optional[str]:
+    """
+    OGR SQL attribute filter selecting the rows of the ids, and the rows
+    within the time window (start inclusive, end exclusive). No rows are
+    selected if ids is empty.
+    """
+    clauses = []
+    if ids is not None:
+        values = ",".join(str(int(i)) for i in ids)
+        if values:
+            clauses.append(f'"{id_column}" IN ({values})')
+        else:  # An empty IN list is not valid OGR SQL.
+            clauses.append("0 = 1")
+    if start is not None:
+        start = pd.Timestamp(start).strftime("%Y/%m/%d %H:%M:%S")
+        clauses.append(f"\"{time_column}\" >= '{start}'")
+    if end is not None:
+        end = pd.Timestamp(end).strftime("%Y/%m/%d %H:%M:%S")
+        clauses.append(f"\"{time_column}\" < '{end}'")
+    if len(clauses) == 0:
+        return None
+    return " AND ".join(clauses)
+
+
+def read_arrow(
+    path, columns: Optional[List[str]] = None, where: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Read an Arrow or Feather file, streaming all of its record batches.
+
+    Parameters
+    ----------
+    path: str
+    columns: list of str, optional
+        Columns to read. Other columns are ignored by OGR, and not read.
+    where: str, optional
+        OGR SQL attribute filter, see ``attribute_filter``. The filter is
+        applied by OGR while streaming.
+
+    Returns
+    -------
+    df: pd.DataFrame
+    """
+    dataset = ogr.Open(str(path))
     layer = dataset.GetLayer(0)
+    if columns is not None:
+        definition = layer.GetLayerDefn()
+        names = [
+            definition.GetFieldDefn(i).GetName()
+            for i in range(definition.GetFieldCount())
+        ]
+        layer.SetIgnoredFields([name for name in names if name not in columns])
+    if where is not None:
+        layer.SetAttributeFilter(where)
+
     stream = layer.GetArrowStreamAsNumPy()
-    data = stream.GetNextRecordBatch()
+    parts: Dict[str, List[np.ndarray]] = {}
+    while True:
+        batch = stream.GetNextRecordBatch()
+        if batch is None:
+            break
+        # The arrays of a batch are only valid until the next batch is
+        # fetched: copy them.
+        for name, values in batch.items():
+            parts.setdefault(name, []).append(np.array(values, copy=True))
+    data = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+    if columns is not None:
+        data = {name: data[name] for name in columns if name in data}
     return pd.DataFrame(data=data)
+
+
+class ArrowTimeseries(Mapping):
+    """
+    The timeseries of many ids, e.g. Ribasim nodes, in a single table.
+
+    The table is sorted by id and time, and the rows of every id are found
+    via an offset index. This is a mapping of id to the DataFrame of its
+    timeseries, with the time as the index; a DataFrame is only created when
+    the timeseries of an id is requested.
+    """
+
+    def __init__(self, df: pd.DataFrame, id_column: str, time_column: str = "time"):
+        self.id_column = id_column
+        self.time_column = time_column
+        # Don't crash if the dataframe is empty
+        if df.empty:
+            self.table = df
+            self.offsets = {}
+            return
+        ids = df[id_column].to_numpy()
+        order = np.lexsort((df[time_column].to_numpy(), ids))
+        self.table = df.take(order).reset_index(drop=True)
+        unique, starts = np.unique(ids[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+        self.offsets = dict(zip(unique.tolist(), zip(starts, stops)))
+
+    def __getitem__(self, key) -> pd.DataFrame:
+        start, stop = self.offsets[key]
+        return self.table.iloc[start:stop].set_index(self.time_column)
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+
+def read_arrow_timeseries(
+    path,
+    id_column: str,
+    time_column: str = "time",
+    columns: Optional[List[str]] = None,
+    ids: Optional[Iterable[int]] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> ArrowTimeseries:
+    """
+    Read the timeseries of an Arrow or Feather file, see ``ArrowTimeseries``.
+
+    The selection of columns, ids, and the time window are pushed down to OGR.
+
+    Parameters
+    ----------
+    path: str
+    id_column: str
+    time_column: str, default "time"
+    columns: list of str, optional
+        Columns to read, in addition to the id and time columns.
+    ids: iterable of int, optional
+        Ids to read.
+    start: pd.Timestamp, optional
+        Start of the time window, inclusive.
+    end: pd.Timestamp, optional
+        End of the time window, exclusive.
+
+    Returns
+    -------
+    timeseries: ArrowTimeseries
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys([id_column, time_column, *columns]))
+    where = attribute_filter(id_column, ids, time_column, start, end)
+    df = read_arrow(path, columns=columns, where=where)
+    return ArrowTimeseries(df, id_column, time_column)
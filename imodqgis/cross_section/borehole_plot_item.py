@@ -13,6 +13,7 @@ from imodqgis.dependencies.pyqtgraph_0_12_3.graphicsItems.GraphicsObject import
     GraphicsObject,
 )
 from imodqgis.dependencies.pyqtgraph_0_12_3.Qt import QtCore, QtGui
+from imodqgis.utils.intervals import BoreholeIntervals
 
 
 class BoreholePlotItem(GraphicsObject):
@@ -30,9 +31,15 @@ class BoreholePlotItem(GraphicsObject):
         width: float
             with of the boreholes
         colorshader: Union[QgsColorShader, ImodColorShader]
+
+        Alternatively, use ``setIntervals`` to plot ``BoreholeIntervals``.
         """
         GraphicsObject.__init__(self)
         self.qpicture = None
+        self.x = None
+        self.y = None
+        self.z = None
+        self.intervals = None
         self.axisOrder = getConfigOption("imageAxisOrder")
         self.edgecolors = kwargs.pop("edgecolors", QColor(Qt.black))
         self.colorshader = kwargs.pop("colorshader")
@@ -49,6 +56,32 @@ class BoreholePlotItem(GraphicsObject):
 
     def setData(self, x, y, z, width):
         self._prepareData(x, y, z, width)
+        self.intervals = BoreholeIntervals.from_boundaries(y, {"z": z})
+        self._draw(self.intervals.column("z"))
+
+    def setIntervals(self, x, intervals: BoreholeIntervals, variable: str, width):
+        """
+        Parameters
+        ----------
+        x: np.ndarray
+            1D array containing the horizontal coordinate of every borehole
+        intervals: BoreholeIntervals
+        variable: str
+            Name of the values which will be mapped into the rectangle colors.
+            Intervals are not drawn if none of the boreholes has the variable.
+        width: float
+            with of the boreholes
+        """
+        if len(x) != len(intervals):
+            raise ValueError("Lengths of x and intervals must match")
+        self.x = x
+        self.y = intervals.top
+        self.z = intervals.column(variable)
+        self.borehole_width = width
+        self.intervals = intervals
+        self._draw(self.z)
+
+    def _draw(self, values):
         self.qpicture = QtGui.QPicture()
         p = QtGui.QPainter(self.qpicture)
         if self.edgecolors is None:
@@ -56,20 +89,31 @@ class BoreholePlotItem(GraphicsObject):
         else:
             p.setPen(fn.mkPen(self.edgecolors))
 
-        for midx, topbot, values in zip(self.x, self.y, self.z):
-            left = midx - 0.5 * self.borehole_width
-            right = midx + 0.5 * self.borehole_width
-            for top, bottom, value in zip(topbot[:-1], topbot[1:], values[:-1]):
-                to_draw, r, g, b, alpha = self.colorshader.shade(value)
-                if not to_draw:
-                    continue
-                color = QtGui.QColor(r, g, b, alpha)
-                p.setBrush(fn.mkBrush(color))
-                rect = QtCore.QRectF(
-                    QtCore.QPointF(left, top),
-                    QtCore.QPointF(right, bottom),
+        # Shade every distinct value once, and draw all rectangles of the same
+        # color at once.
+        left = self.intervals.repeat(np.asarray(self.x) - 0.5 * self.borehole_width)
+        right = left + self.borehole_width
+        shades = {}
+        rects = {}
+        for xmin, xmax, top, bottom, value in zip(
+            left, right, self.intervals.top, self.intervals.bottom, values
+        ):
+            shade = shades.get(value)
+            if shade is None:
+                shade = shades[value] = self.colorshader.shade(value)
+            to_draw, r, g, b, alpha = shade
+            if not to_draw:
+                continue
+            rects.setdefault((r, g, b, alpha), []).append(
+                QtCore.QRectF(
+                    QtCore.QPointF(xmin, top),
+                    QtCore.QPointF(xmax, bottom),
                 )
-                p.drawRect(rect)
+            )
+
+        for (r, g, b, alpha), color_rects in rects.items():
+            p.setBrush(fn.mkBrush(QtGui.QColor(r, g, b, alpha)))
+            p.drawRects(color_rects)
 
         p.end()
         self.update()
@@ -89,9 +133,9 @@ class BoreholePlotItem(GraphicsObject):
         return np.max(self.x) + 0.5 * self.borehole_width
 
     def height(self):
-        if self.y is None:
+        if self.intervals is None:
             return None
-        return np.max(self.y)
+        return max(np.max(self.intervals.top), np.max(self.intervals.bottom))
 
     def boundingRect(self):
         if self.qpicture is None:
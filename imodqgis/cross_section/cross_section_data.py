@@ -9,15 +9,11 @@ import numpy as np
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QWidget
-from qgis import processing
 from qgis.core import (
     QgsDateTimeRange,
-    QgsFeature,
     QgsGeometry,
     QgsMeshDatasetIndex,
-    QgsProject,
     QgsRaster,
-    QgsVectorLayer,
 )
 
 from imodqgis.cross_section.borehole_plot_item import BoreholePlotItem
@@ -27,9 +23,11 @@ from imodqgis.cross_section.plot_util import (
     cross_section_y_data,
     project_points_to_section,
 )
+from imodqgis.cross_section.point_index import get_point_index
 from imodqgis.dependencies import pyqtgraph_0_12_3 as pg
-from imodqgis.gef import CptGefFile
+from imodqgis.gef import read_bores, read_cpt_dataframe
 from imodqgis.ipf import read_associated_borehole
+from imodqgis.utils.intervals import BoreholeIntervals
 from imodqgis.utils.layers import NO_LAYERS
 from imodqgis.widgets import (
     PSEUDOCOLOR,
@@ -280,46 +278,22 @@ class RasterLineData(AbstractLineData, StaticOnlyMixin):
 
 class PointCrossSectionData(AbstractCrossSectionData, StaticOnlyMixin):
     def select_geometry(self, geometry: QgsGeometry, buffer_distance: float):
-        buffered = geometry.buffer(buffer_distance, 4)
-        tmp_layer = QgsVectorLayer("Polygon", "temp", "memory")
-        tmp_layer.setCrs(QgsProject.instance().crs())
-        tmp_feature = QgsFeature()
-        tmp_feature.setGeometry(buffered)
-        tmp_layer.dataProvider().addFeature(tmp_feature)
-
-        # Collect the boreholes per layer
-        point_id = []
-        paths = []
-        points = []
-
-        # Due to the selection, another column is added at the left
+        """
+        Select the points within buffer distance of the geometry, using the
+        cached spatial index of the layer.
+        """
         indexcol = int(self.layer.customProperty(f"{self.ext}_indexcolumn"))
         assoc_ext = self.layer.customProperty(f"{self.ext}_assoc_ext")
         parent = pathlib.Path(self.layer.customProperty(f"{self.ext}_path")).parent
-        output = processing.run(
-            "native:extractbylocation",
-            {
-                "INPUT": self.layer,
-                "PREDICATE": 6,  # are within
-                "INTERSECT": tmp_layer,
-                "OUTPUT": "TEMPORARY_OUTPUT",
-            },
-        )["OUTPUT"]
-
-        # Check if nothing is selected.
-        if output.featureCount() == 0:
-            return
 
-        for feature in output.getFeatures():
-            filename = feature.attribute(indexcol)
-            point_id.append(filename)
-            paths.append(parent.joinpath(f"{filename}.{assoc_ext}"))
-            points.append(feature.geometry().asPoint())
+        point_index = get_point_index(self.layer, indexcol)
+        point_id, points = point_index.within(geometry, buffer_distance)
+        paths = [parent.joinpath(f"{filename}.{assoc_ext}") for filename in point_id]
 
         if len(points) > 0:
             x = project_points_to_section(points, geometry)
         else:
-            x = []
+            x = np.array([])
 
         return point_id, paths, x
 
@@ -331,7 +305,7 @@ class BoreholeData(PointCrossSectionData):
         self.variable = variable
         self.x = None
         self.boreholes_id = None
-        self.boreholes_data = None
+        self.intervals = None
         self.relative_width = 0.01
         self.pseudocolor_widget = ImodPseudoColorWidget()
         self.unique_color_widget = ImodUniqueColorWidget()
@@ -341,6 +315,14 @@ class BoreholeData(PointCrossSectionData):
         self.styling_data = None
         self.dummy_widget = DummyWidget()
 
+    def read_intervals(self, paths: List[pathlib.Path]) -> BoreholeIntervals:
+        boreholes_data = [read_associated_borehole(p) for p in paths]
+        # First column in IPF associated file indicates vertical coordinates
+        return BoreholeIntervals.from_boundaries(
+            [df.iloc[:, 0].to_numpy() for df in boreholes_data],
+            {self.variable: [df[self.variable].to_numpy() for df in boreholes_data]},
+        )
+
     def load(
         self, geometry: QgsGeometry, buffer_distance: float, **_
     ) -> Tuple[np.ndarray, List[str], List[pathlib.Path]]:
@@ -348,45 +330,46 @@ class BoreholeData(PointCrossSectionData):
 
         self.x = x
         self.boreholes_id = boreholes_id
-        self.boreholes_data = [read_associated_borehole(p) for p in paths]
-
-        variable_names = set()
-        styling_entries = []
-        for df in self.boreholes_data:
-            variable_names.update(df.columns)
-            styling_entries.append(df[self.variable].to_numpy())
-        self.styling_data = np.concatenate(styling_entries)
-        self.set_color_data()
+        if len(x) == 0:  # Nothing within the buffer
+            return
+        self.intervals = self.read_intervals(paths)
+        # None of the selected boreholes may have the variable: keep the
+        # default styling then.
+        if self.variable in self.intervals.columns:
+            self.styling_data = self.intervals.column(self.variable)
+            self.set_color_data()
 
     def plot(self, plot_widget):
-        if self.x is None:
+        if self.x is None or len(self.x) == 0:
             return
 
-        # First column in IPF associated file indicates vertical coordinates
-        y_plot = [df.iloc[:, 0].to_numpy() for df in self.boreholes_data]
-
-        # Collect values in column to plot
-        z_plot = [df[self.variable].to_numpy() for df in self.boreholes_data]
-
-        self.plot_item = [
-            BoreholePlotItem(
-                self.x,
-                y_plot,
-                z_plot,
-                self.relative_width * (self.x.max() - self.x.min()),
-                colorshader=self.colorshader(),
-            )
-        ]
+        item = BoreholePlotItem(colorshader=self.colorshader())
+        item.setIntervals(
+            self.x,
+            self.intervals,
+            self.variable,
+            self.relative_width * (self.x.max() - self.x.min()),
+        )
+        self.plot_item = [item]
         plot_widget.addItem(self.plot_item[0])
 
     def clear(self):
         self.x = None
         self.boreholes_id = None
-        self.boreholes_data = None
+        self.intervals = None
         self.styling_data = None
         self.plot_item = None
 
 
+class GefBoreholeData(BoreholeData):
+    def __init__(self, layer, variable):
+        super().__init__(layer, variable)
+        self.ext = "gef"
+
+    def read_intervals(self, paths: List[pathlib.Path]) -> BoreholeIntervals:
+        return read_bores(paths)
+
+
 CPT_SCALE_VALUES = {
     "qc": 20.0,  # MPa
     "fs": 0.2,  # MPa
@@ -418,13 +401,15 @@ class CptData(PointCrossSectionData):
 
         self.x = x
         self.cpt_id = boreholes_id
-        self.cpt_data = [CptGefFile(p).df for p in paths]
+        if len(x) == 0:  # Nothing within the buffer
+            return
+        self.cpt_data = [read_cpt_dataframe(p) for p in paths]
 
         self.styling_data = np.array(list(self.variables))
         self.set_color_data()
 
     def plot(self, plot_widget):
-        if self.x is None:
+        if self.x is None or len(self.x) == 0:
             return
 
         # First column in IPF associated file indicates vertical coordinates
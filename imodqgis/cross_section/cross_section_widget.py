@@ -29,6 +29,7 @@ from qgis.gui import (
 from imodqgis.cross_section.cross_section_data import (
     BoreholeData,
     CptData,
+    GefBoreholeData,
     MeshData,
     MeshLineData,
     RasterLineData,
@@ -59,6 +60,7 @@ class UpdatingQgsMapLayerComboBox(QgsMapLayerComboBox):
     def update_layers(self):
         # Allow:
         # * Point data with associated IPF borehole data
+        # * GEF CPTs and boreholes
         # * Mesh layers
         # * Raster layers
         excepted_layers = []
@@ -68,6 +70,7 @@ class UpdatingQgsMapLayerComboBox(QgsMapLayerComboBox):
                 or (layer.type() == QgsMapLayerType.RasterLayer)
                 or (layer.customProperty("ipf_type") == IpfType.BOREHOLE.name)
                 or (layer.customProperty("gef_type") == GefType.CPT.name)
+                or (layer.customProperty("gef_type") == GefType.BOREHOLE.name)
             ):
                 excepted_layers.append(layer)
         self.setExceptedLayerList(excepted_layers)
@@ -377,9 +380,14 @@ class ImodCrossSectionWidget(QWidget):
             data = CptData(layer, variables)
             layer_item = StyleTreeItem(f"{name}", f"CPT: {variables}", data)
             self.buffer_spinbox.valueChanged.connect(data.clear)
+        elif layer.customProperty("gef_type") == GefType.BOREHOLE.name:
+            variable = self.variable_selection.dataset_variable
+            data = GefBoreholeData(layer, variable)
+            layer_item = StyleTreeItem(f"{name}: {variable}", "GEF", data)
+            self.buffer_spinbox.valueChanged.connect(data.clear)
         else:
             raise ValueError(
-                "Inappropriate layer type: only meshes, rasters, IPFs, GEF-CPTs are allowed"
+                "Inappropriate layer type: only meshes, rasters, IPFs, GEFs are allowed"
             )
         self.style_tree.addTopLevelItem(layer_item)
         layer_item.set_widgets()
@@ -454,6 +462,10 @@ class ImodCrossSectionWidget(QWidget):
             variables = layer.customProperty("ipf_assoc_columns").split("␞")
             self.variable_selection.set_layer(variables)
             self.variable_selection.menu_datasets.check_first()
+        elif layer.customProperty("gef_type") == GefType.BOREHOLE.name:
+            variables = layer.customProperty("gef_assoc_columns").split("␞")
+            self.variable_selection.set_layer(variables)
+            self.variable_selection.menu_datasets.check_first()
         elif layer.customProperty("gef_type") == GefType.CPT.name:
             variables = ["qc", "rf", "fs"]
             self.multi_variable_selection.menu_datasets.populate_actions(variables)
@@ -518,7 +530,9 @@ class ImodCrossSectionWidget(QWidget):
             self.as_line_checkbox.setEnabled(False)
             self.variable_selection.setVisible(False)
             self.multi_variable_selection.setVisible(True)
-        elif layer.customProperty("ipf_type") == IpfType.BOREHOLE.name:
+        elif (layer.customProperty("ipf_type") == IpfType.BOREHOLE.name) or (
+            layer.customProperty("gef_type") == GefType.BOREHOLE.name
+        ):
             self.as_line_checkbox.setVisible(False)
             self.variable_selection.setVisible(True)
             self.multi_variable_selection.setVisible(False)
@@ -63,13 +63,83 @@ def cross_section_y_data(layer, geometry, group_index, x, datetime_range=None):
     return y
 
 
+# Maximum number of segment-point combinations processed at once by
+# project_to_polyline; this bounds its memory use.
+PROJECTION_CHUNK_SIZE = 2**16
+
+
+def project_to_polyline(
+    vertices: np.ndarray, pp: np.ndarray, chunk_size: int = PROJECTION_CHUNK_SIZE
+) -> np.ndarray:
+    """
+    Project points on to a polyline, see ``project_points_to_section``.
+
+    The points are processed in chunks, so that the intermediate
+    (nsegment x npoint) arrays have at most chunk_size elements. The x and y
+    components are kept in separate arrays, which is considerably faster than
+    operating on arrays of vectors.
+
+    Parameters
+    ----------
+    vertices: np.ndarray of shape (nvertex, 2)
+    pp: np.ndarray of shape (npoint, 2)
+    chunk_size: int
+
+    Returns
+    -------
+    x: np.ndarray of shape (npoint,)
+        Distance along the polyline of the projection of every point.
+    """
+    aa = vertices[:-1]
+    VV = vertices[1:] - aa
+    ss = np.hypot(VV[:, 0], VV[:, 1])
+    # Distance along the polyline of the start of every segment
+    x0 = np.concatenate([[0.0], np.cumsum(ss)[:-1]])
+    # Unit vectors along the segments. Zero length segments project every
+    # point on to their start.
+    inverse_ss = np.zeros_like(ss)
+    nonzero = ss > 0.0
+    inverse_ss[nonzero] = 1.0 / ss[nonzero]
+    # Segments along axis 0, points along axis 1
+    ax = aa[:, 0, np.newaxis]
+    ay = aa[:, 1, np.newaxis]
+    ex = (VV[:, 0] * inverse_ss)[:, np.newaxis]
+    ey = (VV[:, 1] * inverse_ss)[:, np.newaxis]
+    s = ss[:, np.newaxis]
+
+    npoint = len(pp)
+    step = max(1, chunk_size // max(1, len(aa)))
+    x = np.empty(npoint, dtype=float)
+    for start in range(0, npoint, step):
+        px = pp[start : start + step, 0]
+        py = pp[start : start + step, 1]
+        # U = a -> p
+        ux = px - ax
+        uy = py - ay
+        # Project U on to V, and correct for points outside of V's domain
+        tt = ux * ex
+        tt += uy * ey
+        np.clip(tt, 0.0, s, out=tt)
+        # Squared distance between point and its projection
+        ux -= tt * ex
+        uy -= tt * ey
+        ux *= ux
+        uy *= uy
+        ux += uy
+        # Find the segment with the minimum distance: this is where we want to
+        # draw the borehole.
+        closest = np.argmin(ux, axis=0)
+        x[start : start + step] = x0[closest] + tt[closest, np.arange(len(px))]
+    return x
+
+
 def project_points_to_section(
     points: List[QgsPoint], geometry: QgsGeometry
 ) -> np.ndarray:
     # vectors are denoted by upper case: U, V
     # scalar variables are lower case: a, p, s, x
-    # arrays of scalars are repeated lower case: pp, aa, bb, tt
-    # arrays of vectors are repeated upper case: UU
+    # arrays of scalars are repeated lower case: pp, aa, ss, tt
+    # arrays of vectors are repeated upper case: UU, VV
     #
     #   q              r
     #     \           /
@@ -94,32 +164,4 @@ def project_points_to_section(
     # Similarly, r will have its t > 1.0, and will be projected at c (t=s)
     vertices = np.array([(v.x(), v.y()) for v in geometry.vertices()])
     pp = np.array([(point.x(), point.y()) for point in points])
-    aa = vertices[:-1]
-    bb = vertices[1:]
-    nsegment = len(aa)
-    npoint = len(pp)
-
-    # This array holds the distance from p to x
-    distances = np.empty((nsegment, npoint), dtype=float)
-    # x is the accumulating distance along the geometry
-    xx = np.empty((nsegment, npoint), dtype=float)
-    x = 0.0
-    for i, (a, b) in enumerate(zip(aa, bb)):
-        UU = pp - a
-        V = b - a
-        s = np.linalg.norm(V)
-        # Project U on to V
-        tt = np.dot(UU, V) / s
-        # Correct points that fall outside of V's domain
-        tt[tt < 0.0] = 0.0
-        tt[tt > s] = s
-        xx[i] = x + tt
-        # Compute x, y locations of projection
-        pp_projected = a + ((tt / s)[:, np.newaxis] * V)
-        # Compute distance between point and its projection
-        distances[i] = np.linalg.norm(pp - pp_projected, axis=1)
-        x += s
-    # Find the intersection point with the minimum distance:
-    # this is where we want to draw the borehole.
-    closest = np.argmin(distances, axis=0)
-    return xx[closest, np.arange(npoint)]
+    return project_to_polyline(vertices, pp)
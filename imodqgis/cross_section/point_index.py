@@ -0,0 +1,86 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Spatial index of the points of a point layer, for selecting the boreholes and
+CPTs near a cross section line.
+
+The index is built once per layer, and discarded when the data of the layer
+changes.
+"""
+
+from typing import List, Tuple
+
+from qgis.core import (
+    QgsFeatureRequest,
+    QgsGeometry,
+    QgsPointXY,
+    QgsRectangle,
+    QgsSpatialIndex,
+)
+
+# Point indexes, by layer id
+POINT_INDEXES = {}
+# Ids of the layers whose signals discard their point index
+CONNECTED_LAYERS = set()
+
+
+class PointIndex:
+    def __init__(self, layer, indexcol: int):
+        self.indexcol = indexcol
+        self.index = QgsSpatialIndex()
+        self.names = {}
+        self.points = {}
+        request = QgsFeatureRequest().setSubsetOfAttributes([indexcol])
+        for feature in layer.getFeatures(request):
+            geometry = feature.geometry()
+            if geometry.isNull():
+                continue
+            point = geometry.asPoint()
+            fid = feature.id()
+            self.index.addFeature(fid, QgsRectangle(point, point))
+            self.names[fid] = feature.attribute(indexcol)
+            self.points[fid] = point
+
+    def within(
+        self, geometry: QgsGeometry, buffer_distance: float
+    ) -> Tuple[List[str], List[QgsPointXY]]:
+        """
+        Names and locations of the points within the buffer of a geometry, in
+        order of feature id.
+        """
+        buffered = geometry.buffer(buffer_distance, 4)
+        engine = QgsGeometry.createGeometryEngine(buffered.constGet())
+        engine.prepareGeometry()
+        names = []
+        points = []
+        for fid in sorted(self.index.intersects(buffered.boundingBox())):
+            point = self.points[fid]
+            if engine.contains(QgsGeometry.fromPointXY(point).constGet()):
+                names.append(self.names[fid])
+                points.append(point)
+        return names, points
+
+
+def discard_point_index(layer_id: str) -> None:
+    POINT_INDEXES.pop(layer_id, None)
+
+
+def forget_layer(layer_id: str) -> None:
+    discard_point_index(layer_id)
+    CONNECTED_LAYERS.discard(layer_id)
+
+
+def get_point_index(layer, indexcol: int) -> PointIndex:
+    """Return the point index of a layer, building it if required."""
+    layer_id = layer.id()
+    index = POINT_INDEXES.get(layer_id)
+    if index is not None and index.indexcol == indexcol:
+        return index
+    if layer_id not in CONNECTED_LAYERS:
+        layer.dataChanged.connect(lambda: discard_point_index(layer_id))
+        layer.willBeDeleted.connect(lambda: forget_layer(layer_id))
+        CONNECTED_LAYERS.add(layer_id)
+    index = PointIndex(layer, indexcol)
+    POINT_INDEXES[layer_id] = index
+    return index
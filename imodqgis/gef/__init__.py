@@ -1,11 +1,22 @@
 # Copyright © 2021 Deltares
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
+from imodqgis.gef.catalog import read_gef_catalog
 from imodqgis.gef.gef_dialog import ImodGefDialog
-from imodqgis.gef.reading import CptGefFile, GefType
+from imodqgis.gef.reading import (
+    BoreGefFile,
+    CptGefFile,
+    GefType,
+    read_bores,
+    read_cpt_dataframe,
+)
 
 __all__ = [
     "ImodGefDialog",
+    "BoreGefFile",
     "CptGefFile",
     "GefType",
-]
\ No newline at end of file
+    "read_bores",
+    "read_cpt_dataframe",
+    "read_gef_catalog",
+]
@@ -0,0 +1,99 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Catalog of the headers of the GEF files in a directory.
+
+The type, location, surface level, end depth and columns of every GEF file are
+persisted in the plugin settings directory, per directory, so that importing a
+survey only parses the files which have been added or changed since the
+previous import. The datablock of a CPT is only parsed if its end depth is
+not specified in its header.
+"""
+
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from imodqgis.gef.reading import read_gef_header
+from imodqgis.utils.index import is_current, read_index, stamp, write_index
+
+CATALOG_KIND = "gef-catalog"
+# Increment when the entries change, to discard existing catalogs.
+CATALOG_VERSION = 2
+
+
+def read_catalog_entry(path: pathlib.Path) -> Dict[str, Any]:
+    gef = read_gef_header(path)
+    enddepth = gef.enddepth
+    return {
+        "gef_type": gef.GEF_TYPE.name,
+        "nr": gef.nr,
+        "x": gef.x,
+        "y": gef.y,
+        "z": gef.z,
+        "enddepth": None if enddepth is None else float(enddepth),
+        "columns": gef.columns,
+    }
+
+
+def catalog_file(
+    path: pathlib.Path, previous: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], bool]:
+    """Catalog entry of a GEF file, and whether it had to be read."""
+    stat = os.stat(path)
+    if previous is not None and is_current(previous, stat):
+        return previous, False
+    return stamp(read_catalog_entry(path), stat), True
+
+
+def read_gef_catalog(
+    paths: List[str], max_workers: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Catalog GEF files, and persist the catalogs of their directories.
+
+    Only files which have been added or changed since they were cataloged are
+    read. Statting and reading is done concurrently. A thread pool is used
+    rather than a process pool: new processes cannot be started reliably from
+    the Python interpreter embedded in QGIS on Windows.
+
+    Parameters
+    ----------
+    paths: list of str
+    max_workers: int, optional
+        Maximum number of threads.
+
+    Returns
+    -------
+    entries: list of dict
+        Catalog entry per path, with keys gef_type, nr, x, y, z, enddepth, and
+        columns.
+    """
+    paths = [pathlib.Path(path) for path in paths]
+    directories = list(dict.fromkeys(path.parent for path in paths))
+    catalogs = {
+        directory: read_index(directory, CATALOG_KIND, CATALOG_VERSION)
+        for directory in directories
+    }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(
+                catalog_file,
+                paths,
+                [catalogs[path.parent].get(path.name) for path in paths],
+            )
+        )
+
+    # Entries of files which were not imported now are kept.
+    updated = set()
+    for path, (entry, was_read) in zip(paths, results):
+        catalogs[path.parent][path.name] = entry
+        if was_read:
+            updated.add(path.parent)
+    for directory in updated:
+        write_index(directory, CATALOG_KIND, CATALOG_VERSION, catalogs[directory])
+
+    return [entry for entry, _ in results]
@@ -3,8 +3,9 @@
 #
 import pathlib
 import shlex
+from typing import Any, Dict, List, Optional
 
-import pandas as pd
+from PyQt5.QtCore import QVariant
 from PyQt5.QtWidgets import (
     QDialog,
     QFileDialog,
@@ -14,64 +15,120 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QVBoxLayout,
 )
-from qgis.core import QgsProject, QgsVectorLayer
-
-from imodqgis.gef.reading import CptGefFile, GefType
-from imodqgis.utils.pathing import get_configdir
-
-
-def read_gef(paths) -> QgsVectorLayer:
-    filenames = [pathlib.Path(path).stem for path in paths]
-    x = []
-    y = []
-    label = []
-    gefdata = []
-    for path in paths:
-        try:
-            gef = CptGefFile(path)
-        except Exception as e:
-            raise type(e)(f"Error reading file: {path}: {e}")
-        x.append(gef.x)
-        y.append(gef.y)
-        label.append(gef.nr)
-        gefdata.append(gef)
-
-    header_dataframe = pd.DataFrame(
-        {"x": x, "y": y, "label": label, "filenames": filenames}
+from qgis.core import (
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProject,
+    QgsVectorLayer,
+)
+
+from imodqgis.gef.catalog import read_gef_catalog
+from imodqgis.gef.reading import BoreGefFile, GefType
+
+LAYER_NAMES = {
+    GefType.CPT: "GEF-CPT",
+    GefType.BOREHOLE: "GEF-BORE",
+}
+
+
+def gef_layer(
+    gef_type: GefType, paths: List[str], entries: List[Dict[str, Any]]
+) -> QgsVectorLayer:
+    layer = QgsVectorLayer("Point", LAYER_NAMES[gef_type], "memory")
+    provider = layer.dataProvider()
+    provider.addAttributes(
+        [
+            QgsField("x", QVariant.Double),
+            QgsField("y", QVariant.Double),
+            QgsField("label", QVariant.String),
+            QgsField("filenames", QVariant.String),
+            QgsField("z", QVariant.Double),
+            QgsField("enddepth", QVariant.Double),
+        ]
     )
+    layer.updateFields()
 
-    fp = get_configdir() / "gef_header.csv"
-
-    header_dataframe.to_csv(fp)
-    temppath = pathlib.Path(fp)
-
-    uri = "&".join(
-        (
-            f"file:///{temppath.as_posix()}?encoding=UTF-8",
-            "delimiter=,",
-            "type=csv",
-            "xField=x",
-            "yField=y",
-            "useHeader=yes",
-            "trimFields=yes",
-            "geomType=point",
+    features = []
+    for path, entry in zip(paths, entries):
+        x = entry["x"]
+        y = entry["y"]
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+        feature.setAttributes(
+            [
+                x,
+                y,
+                entry["nr"],
+                pathlib.Path(path).stem,
+                entry["z"],
+                entry["enddepth"],
+            ]
         )
-    )
+        features.append(feature)
+    provider.addFeatures(features)
+    provider.createSpatialIndex()
+    layer.updateExtents()
 
-    layer = QgsVectorLayer(uri, "GEF-CPT", "delimitedtext")
-    layer.setCustomProperty("gef_type", GefType.CPT.name)
+    layer.setCustomProperty("gef_type", gef_type.name)
     layer.setCustomProperty("gef_path", paths[0])
 
     # Gef index column can be hardcoded as we always take the same info from
-    # the header into the attribute table
-    layer.setCustomProperty("gef_indexcolumn", 4)
+    # the header into the attribute table: the filenames.
+    layer.setCustomProperty("gef_indexcolumn", 3)
     # Gef file does not have associated file, instead vertical information
     # stored in geffile itsself.
     layer.setCustomProperty("gef_assoc_ext", "gef")
 
+    if gef_type == GefType.BOREHOLE:
+        columns = dict.fromkeys(
+            column for entry in entries for column in entry["columns"]
+        )
+        for column in BoreGefFile.BOUNDARY_COLUMNS:
+            columns.pop(column, None)
+        # use an ASCII record separator: ␞
+        layer.setCustomProperty("gef_assoc_columns", "␞".join(columns))
+
     return layer
 
 
+def read_gef(
+    paths: List[str], max_workers: Optional[int] = None
+) -> List[QgsVectorLayer]:
+    """
+    Read the headers of GEF files into memory layers, with a point per file:
+    a layer for the CPTs, and a layer for the boreholes.
+
+    The files are cataloged with ``read_gef_catalog``: only files which were
+    added or changed since a previous import are parsed. The memory layers are
+    spatially indexed.
+
+    Parameters
+    ----------
+    paths: list of str
+    max_workers: int, optional
+        Maximum number of threads reading the files.
+
+    Returns
+    -------
+    layers: list of QgsVectorLayer
+        A layer per type of GEF file present.
+    """
+    entries = read_gef_catalog(paths, max_workers=max_workers)
+    layers = []
+    for gef_type in GefType:
+        selection = [
+            (path, entry)
+            for path, entry in zip(paths, entries)
+            if entry["gef_type"] == gef_type.name
+        ]
+        if len(selection) > 0:
+            type_paths, type_entries = zip(*selection)
+            layers.append(gef_layer(gef_type, list(type_paths), list(type_entries)))
+    return layers
+
+
 class ImodGefDialog(QDialog):
     def __init__(self, parent=None) -> None:
         QDialog.__init__(self, parent)
@@ -115,5 +172,5 @@ class ImodGefDialog(QDialog):
     def add_gefs(self):
         text = self.line_edit.text()
         paths = shlex.split(text, posix="/" in text)
-        layer = read_gef(paths)
-        QgsProject.instance().addMapLayer(layer)
+        for layer in read_gef(paths):
+            QgsProject.instance().addMapLayer(layer)
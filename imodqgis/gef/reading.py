@@ -6,15 +6,18 @@
 
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 from pathlib import WindowsPath
-from typing import NamedTuple, Union
+from typing import List, NamedTuple, Optional, Union
 
 import numpy as np
 import pandas as pd
 
+from imodqgis.utils.dataframe_cache import cached_reader
+from imodqgis.utils.intervals import BoreholeIntervals
+
 
-# At present, only CPT supported
 class GefType(IntEnum):
     CPT = 1
     BOREHOLE = 2
@@ -89,6 +92,12 @@ COLUMN_DEFS_DATA_BLOCK_CPT = {
 }
 
 
+COLUMN_DEFS_DATA_BLOCK_BORE = {
+    1: ColumnInfo("upper_boundary", "m", "depth upper boundary", True),
+    2: ColumnInfo("lower_boundary", "m", "depth lower boundary", True),
+}
+
+
 RESERVED_MEASURMENTVARS_CPT = {
     1: CptMeasurementVar(1000, "mm2", "nom. surface area cone tip", True),
     2: CptMeasurementVar(15000, "mm2", "nom. surface area friction sleeve", True),
@@ -159,17 +168,60 @@ GEF_CPT_REFERENCE_LEVELS = {
 }
 
 
-class CptGefFile:
+# Matches the end of the header, and the separator following it.
+END_OF_HEADER = re.compile(rb"#EOH[=\s+]+")
+# Matches every "#KEYWORD= value" line of the header in a single pass.
+HEADER_LINE = re.compile(r"^[#\s]*([A-Z]+)\s*=[ \t]*(.*)$", re.MULTILINE)
+# String quotes and unnecessary whitespace in header values.
+HEADER_CLUTTER = re.compile(r'["\']|\s\s+')
+FIELD_SEPARATOR = re.compile(r",\s*")
+# Matches the procedure or report code of a GEF-BORE file.
+BORE_REPORT_CODE = re.compile(
+    rb"\s*#\s*(?:PROCEDURE|REPORT)CODE\s*=\s*[\"']?GEF-BORE", re.IGNORECASE
+)
+# Matches the fields of a whitespace separated record, which may be quoted.
+WHITESPACE_FIELD = re.compile(r"'[^']*'|\"[^\"]*\"|\S+")
+
+
+def decode(content: bytes) -> str:
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        text = content.decode("cp1252")
+    # Universal newlines, as when reading in text mode.
+    return text.replace("\r\n", "\n")
+
+
+class GefFile:
+    """
+    GEF file. Subclasses parse the datablock of a specific type of GEF file.
+
+    Parameters
+    ----------
+    path: str or WindowsPath
+    sep: str, default " "
+        Column separator, if not specified in the header.
+
+    Only the header is parsed on construction. The datablock is parsed on
+    first access of ``df``, or of ``enddepth`` if the end depth is not
+    specified in the header.
+    """
+
+    # Known columns of the datablock, by quantity number
+    COLUMN_DEFS = {}
+    # Column of the datablock holding the depth below the surface
+    DEPTH_COLUMN = None
+
     def __init__(self, path: Union[str, WindowsPath], sep: str = " "):
         self.path = path
         self._header = None
+        self._datablock = None
         self._data = None
 
         self.nr = None
         self.x = None
         self.y = None
         self.z = None
-        self.enddepth = None
 
         ## mandatory gef header attributes
         self.gefid = None
@@ -206,28 +258,38 @@ class CptGefFile:
         return f"{self.__class__.__name__}(nr={self.nr})"
 
     def __open_file(self, path):
-        try:
-            with open(path, "r") as f:
-                text = f.read()
-        except UnicodeDecodeError:
-            with open(path, "r", encoding='cp1252') as f:
-                text = f.read()
-            
-        end_header = re.search(r"(?P<eoh>#EOH[=\s+]+)", text).group("eoh")
+        with open(path, "rb") as f:
+            content = f.read()
 
-        self._header, self._data = text.split(end_header)
+        end_header = END_OF_HEADER.search(content)
+        if end_header is None:
+            raise ValueError(f"No end of header (#EOH) in {path}")
+        self._header = decode(content[: end_header.start()])
+        self._datablock = content[end_header.end() :]
 
         self.parse_header()
-        self.parse_data()
 
-        self.get_enddepth()
+    def load_data(self):
+        """Parse the datablock, if it has not been parsed yet."""
+        if self._datablock is not None:
+            self._data = decode(self._datablock)
+            self._datablock = None
+            self.parse_data()
 
     @property
     def df(self):
         if not hasattr(self, "_df"):
+            self.load_data()
             self.to_df()
         return self._df
 
+    @property
+    def enddepth(self):
+        enddepth = self.measurementvars.get(16)
+        if enddepth:
+            return enddepth.value
+        return self.df[self.DEPTH_COLUMN].max()
+
     @property
     def header(self):
         header = pd.Series(
@@ -255,78 +317,17 @@ class CptGefFile:
         return int(idx) - 1
 
     def parse_header(self):
-        header = self._header.splitlines()
-
-        for line in header:
-            keyword = re.search(r"([#\s]*([A-Z]+)\s*=)\s*", line)
-
-            try:
-                keyword_method = keyword.group(2).lower()
-            except AttributeError:
-                continue
-
-            __method = f"_parse_{keyword_method}"
-            if hasattr(self, __method):
-                line = line.replace(keyword.group(0), "")
-                line = re.sub(
-                    r'["\']|\s\s+', "", line
-                )  # remove unnecessary whitespace and string quotes
-                self.__call_header_method(__method, line)
-
-    def parse_data(self):
-        """
-        Parse datablock of the gef file.
-
-        """
-        data = self._data
-
-        if not self.recordseparator:
-            self.recordseparator = "!"
-
-        data = re.sub(rf"{self.columnseparator}{self.recordseparator}*", ",", data)
-
-        data = [d.rstrip(",").split(",") for d in data.splitlines()]
-        self._data = data
-
-    def to_df(self):
-        """
-        Create a Pandas DataFrame from the gef datablock.
-
-        Returns
-        -------
-        None.
-
-        """
-        df = pd.DataFrame(self._data, dtype="float64")
-        df = df.replace(self.columnvoid, np.nan)
-        df.columns = self.columns
-
-        if "rf" not in df.columns:
-            df["rf"] = (df["fs"] / df["qc"]) * 100
-
-        if (
-            "corrected_depth" in df.columns
-        ):  # TODO: implement calc corrected depth from inclination if not in columns
-            df["depth"] = self.z - df["corrected_depth"]
-        else:
-            df["depth"] = self.z - df["length"]
-
-        self._df = df
-
-    def __call_header_method(self, method, line):
         """
-        Helper method to call the correct parser method of the class for a specific
-        header attribute (e.g. _parse_columninfo).
-
-        Parameters
-        ----------
-        method : str
-            Name of the header attribute.
-        line : str
-            Line in the header to parse.
+        Parse the header of the gef file. The keywords are tokenized in a
+        single pass over the header, and dispatched to the _parse_{keyword}
+        methods by HEADER_PARSERS.
 
         """
-        return getattr(self, method)(line)
+        for keyword, line in HEADER_LINE.findall(self._header):
+            parser = HEADER_PARSERS.get(keyword)
+            if parser is not None:
+                # remove unnecessary whitespace and string quotes
+                parser(self, HEADER_CLUTTER.sub("", line.rstrip()))
 
     def _parse_gefid(self, line):
         self.gefid = line
@@ -335,10 +336,9 @@ class CptGefFile:
         self.ncolumns = int(line)
 
     def _parse_columninfo(self, line: str):
-        __sep = re.search(",\s*", line).group(0)
-        idx, unit, value, number = line.split(__sep)
+        idx, unit, value, number = FIELD_SEPARATOR.split(line)
         idx = self.to_zero_indexed(idx)
-        info = COLUMN_DEFS_DATA_BLOCK_CPT.get(int(number), "empty")
+        info = self.COLUMN_DEFS.get(int(number), "empty")
 
         if info == "empty":
             logging.warning(f"Unknown information in datablock of {self.path}")
@@ -373,8 +373,7 @@ class CptGefFile:
     def _parse_zid(
         self, line: str
     ):  # TODO: check how to fix if zid occurs in header more than once
-        __sep = re.search(",\s*", line).group(0)
-        zid = line.split(__sep)
+        zid = FIELD_SEPARATOR.split(line)
         if len(zid) == 2:
             reference_system = zid[0]
             self.z = float(zid[1])
@@ -394,14 +393,12 @@ class CptGefFile:
     def _parse_measurementtext(
         self, line: str
     ):  # TODO: add correct parsing of reserved measurementtexts
-        __sep = re.search(",\s*", line).group(0)
-        text = line.split(__sep)
+        text = FIELD_SEPARATOR.split(line)
         nr, info = int(text[0]), text[1:]
         self.measurementtext.update({nr: info})
 
     def _parse_xyid(self, line: str):
-        __sep = re.search(",\s*", line).group(0)
-        xyid = line.split(__sep)
+        xyid = FIELD_SEPARATOR.split(line)
 
         if len(xyid) == 3:
             self.coord_system = xyid[0]
@@ -423,8 +420,7 @@ class CptGefFile:
             self.xyid = xyid
 
     def _parse_columnvoid(self, line: str):
-        __sep = re.search(",\s*", line).group(0)
-        idx, value = line.split(__sep)
+        idx, value = FIELD_SEPARATOR.split(line)
         idx = self.to_zero_indexed(idx)
         self.columnvoid.update({idx: float(value)})
 
@@ -432,14 +428,14 @@ class CptGefFile:
         pass
 
     def _parse_columnseparator(self, line: str):
-        self.columnseparator = line
+        # An empty value means whitespace separated columns.
+        self.columnseparator = line or " "
 
     def _parse_dataformat(self, line: str):
         pass
 
     def _parse_measurementvar(self, line: str):
-        __sep = re.search(",\s*", line).group(0)
-        num, val, unit, quantity = line.split(__sep)
+        num, val, unit, quantity = FIELD_SEPARATOR.split(line)
 
         num = int(num)
         val = safe_float(val)
@@ -471,11 +467,252 @@ class CptGefFile:
     def _parse_starttime(self, line: str):
         pass
 
-    def get_enddepth(self):
-        enddepth = self.measurementvars.get(16)
-        if enddepth:
-            d = enddepth.value
+
+# Header keywords, and the methods parsing their values.
+HEADER_PARSERS = {
+    name[len("_parse_") :].upper(): method
+    for name, method in vars(GefFile).items()
+    if name.startswith("_parse_")
+}
+
+
+class CptGefFile(GefFile):
+    """
+    CPT GEF file, see ``GefFile``.
+    """
+
+    GEF_TYPE = GefType.CPT
+    COLUMN_DEFS = COLUMN_DEFS_DATA_BLOCK_CPT
+    DEPTH_COLUMN = "length"
+
+    def parse_data(self):
+        """
+        Parse datablock of the gef file into a 2D array of floats.
+
+        """
+        data = self._data
+
+        if not self.recordseparator:
+            self.recordseparator = "!"
+
+        # Remove the record separators, and split on the column separators.
+        data = data.replace(self.recordseparator, " ")
+        if self.columnseparator.strip():
+            data = data.replace(self.columnseparator, " ")
+        values = np.array(data.split(), dtype=np.float64)
+
+        ncolumns = len(self.columninfo) or self.ncolumns
+        if ncolumns is None or values.size % ncolumns != 0:
+            raise ValueError(
+                f"Number of values in datablock of {self.path} does not match "
+                f"the number of columns: {ncolumns}"
+            )
+        self._data = values.reshape((-1, ncolumns))
+
+    def to_df(self):
+        """
+        Create a Pandas DataFrame from the gef datablock.
+
+        Returns
+        -------
+        None.
+
+        """
+        data = self._data.copy()
+        for idx, void in self.columnvoid.items():
+            column = data[:, idx]
+            column[column == void] = np.nan
+
+        # Compute the additional columns on the array, and create the
+        # DataFrame once: inserting columns into a DataFrame is expensive.
+        columns = self.columns
+        values = dict(zip(columns, data.T))
+        extra = []
+        if "rf" not in values:
+            columns = columns + ["rf"]
+            extra.append((values["fs"] / values["qc"]) * 100)
+
+        if (
+            "corrected_depth" in values
+        ):  # TODO: implement calc corrected depth from inclination if not in columns
+            extra.append(self.z - values["corrected_depth"])
         else:
-            d = self.df["length"].max()
+            extra.append(self.z - values["length"])
+        columns = columns + ["depth"]
+
+        data = np.column_stack([data] + extra)
+        self._df = pd.DataFrame(data, columns=columns)
+
+
+class BoreGefFile(GefFile):
+    """
+    Borehole (BORE) GEF file, see ``GefFile``.
+
+    Every record of the datablock describes a layer: the depths of its upper
+    and lower boundary, other numeric columns as specified in the header, and
+    text fields, such as the soil code. The first text field is available as
+    the "lithology" column, the following ones as "text2", "text3", etc.
+    """
+
+    GEF_TYPE = GefType.BOREHOLE
+    COLUMN_DEFS = COLUMN_DEFS_DATA_BLOCK_BORE
+    DEPTH_COLUMN = "lower_boundary"
+    BOUNDARY_COLUMNS = ("upper_boundary", "lower_boundary")
+
+    @property
+    def columns(self):
+        """Numeric columns and text columns. Requires parsing the datablock."""
+        self.load_data()
+        _, text = self._data
+        ntext = text.shape[1]
+        return super().columns + [
+            "lithology" if i == 0 else f"text{i + 1}" for i in range(ntext)
+        ]
+
+    def split_record(self, record: str) -> List[str]:
+        if self.columnseparator.strip():
+            return record.rstrip(self.columnseparator).split(self.columnseparator)
+        return WHITESPACE_FIELD.findall(record)
+
+    def parse_data(self):
+        """
+        Parse datablock of the gef file into a 2D array of floats, for the
+        numeric columns, and a 2D array of strings, for the text fields.
+
+        """
+        if not self.recordseparator:
+            self.recordseparator = "!"
+
+        ncolumns = len(self.columninfo) or self.ncolumns
+        if ncolumns is None:
+            raise ValueError(f"Number of columns not specified in {self.path}")
+
+        numbers = []
+        texts = []
+        for line in self._data.splitlines():
+            record = line.strip().rstrip(self.recordseparator).strip()
+            if not record:
+                continue
+            fields = [
+                field.strip().strip("'\"") for field in self.split_record(record)
+            ]
+            if len(fields) < ncolumns:
+                raise ValueError(
+                    f"Number of values in datablock of {self.path} does not match "
+                    f"the number of columns: {ncolumns}"
+                )
+            numbers.append(fields[:ncolumns])
+            texts.append(fields[ncolumns:])
+
+        ntext = max((len(text) for text in texts), default=0)
+        text = np.full((len(texts), ntext), np.nan, dtype=object)
+        for i, fields in enumerate(texts):
+            for j, field in enumerate(fields):
+                if field:
+                    text[i, j] = field
+        number = np.array(numbers, dtype=np.float64).reshape((-1, ncolumns))
+        for idx, void in self.columnvoid.items():
+            column = number[:, idx]
+            column[column == void] = np.nan
+        self._data = (number, text)
+
+    def column_values(self):
+        self.load_data()
+        number, text = self._data
+        return dict(zip(self.columns, list(number.T) + list(text.T)))
 
-        self.enddepth = d
+    def to_df(self):
+        """
+        Create a Pandas DataFrame from the gef datablock, with the vertical
+        coordinates of the layer boundaries as the top and bottom columns.
+
+        Returns
+        -------
+        None.
+
+        """
+        values = self.column_values()
+        values["top"] = self.z - values["upper_boundary"]
+        values["bottom"] = self.z - values["lower_boundary"]
+        self._df = pd.DataFrame(values)
+
+    @property
+    def intervals(self) -> BoreholeIntervals:
+        """The layers of the borehole, see ``BoreholeIntervals``."""
+        values = self.column_values()
+        upper = values.pop("upper_boundary")
+        lower = values.pop("lower_boundary")
+        return BoreholeIntervals(
+            [0, len(upper)], self.z - upper, self.z - lower, values
+        )
+
+
+GEF_FILES = {
+    GefType.CPT: CptGefFile,
+    GefType.BOREHOLE: BoreGefFile,
+}
+
+
+def read_gef_type(path: Union[str, WindowsPath]) -> GefType:
+    """
+    Determine the type of a GEF file from the procedure or report code in its
+    header. Files without a GEF-BORE code are considered CPTs.
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if BORE_REPORT_CODE.match(line):
+                return GefType.BOREHOLE
+            if line.lstrip().startswith(b"#EOH"):
+                break
+    return GefType.CPT
+
+
+def read_gef_header(path: Union[str, WindowsPath]) -> GefFile:
+    """
+    Read the header of a GEF file, as a ``CptGefFile`` or ``BoreGefFile``
+    depending on its type.
+    """
+    try:
+        return GEF_FILES[read_gef_type(path)](path)
+    except Exception as e:
+        raise RuntimeError(f"Error reading file: {path}: {e}") from e
+
+
+def read_bore_intervals(path: Union[str, WindowsPath]) -> BoreholeIntervals:
+    """Read the layers of a borehole GEF file, see ``BoreGefFile``."""
+    try:
+        return BoreGefFile(path).intervals
+    except Exception as e:
+        raise RuntimeError(f"Error reading file: {path}: {e}") from e
+
+
+def read_bores(
+    paths: List[Union[str, WindowsPath]], max_workers: Optional[int] = None
+) -> BoreholeIntervals:
+    """
+    Read the layers of borehole GEF files concurrently, without creating a
+    DataFrame per file.
+
+    Parameters
+    ----------
+    paths: list of str or WindowsPath
+    max_workers: int, optional
+        Maximum number of threads.
+
+    Returns
+    -------
+    intervals: BoreholeIntervals
+        With a borehole per path, in order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        parts = list(executor.map(read_bore_intervals, paths))
+    return BoreholeIntervals.concatenate(parts)
+
+
+@cached_reader
+def read_cpt_dataframe(path: Union[str, WindowsPath]) -> pd.DataFrame:
+    """
+    Read the data of a CPT GEF file, see ``CptGefFile.df``. The result is
+    cached (see ``DATAFRAME_CACHE``).
+    """
+    return CptGefFile(path).df
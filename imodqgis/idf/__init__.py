@@ -1,6 +1,7 @@
 # Copyright © 2021 Deltares
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
+from imodqgis.idf.conversion import IdfFile, read_idf
 from imodqgis.idf.idf_dialog import ImodIdfDialog
 
-__all__ = ["ImodIdfDialog"]
+__all__ = ["IdfFile", "ImodIdfDialog", "read_idf"]
@@ -0,0 +1,114 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Reuse of earlier IDF conversions.
+
+A converted raster is written next to its IDF. If the directory of the IDF is
+not writable, it is written to a cache directory in the plugin configuration
+directory instead. That directory is bounded in size: the least recently used
+rasters are removed first.
+
+The fingerprint of the IDF is stored in the metadata of the converted raster,
+so a conversion is only repeated when the IDF has changed since.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from imodqgis.utils.pathing import get_configdir
+
+FINGERPRINT_KEY = "IMOD_IDF_FINGERPRINT"
+IDF_CACHE_MAXSIZE = 4 * 1024**3  # bytes
+# Rasters used more recently than this may still be opened by another
+# conversion: they are not evicted.
+IDF_CACHE_MINAGE = 60.0  # seconds
+# Conversions run concurrently; evict one at a time.
+EVICT_LOCK = threading.Lock()
+
+
+def get_cachedir() -> Path:
+    cachedir = get_configdir() / "idf-cache"
+    cachedir.mkdir(exist_ok=True)
+    return cachedir
+
+
+def fingerprint(path: Path, header: bytes, *args: str) -> str:
+    """
+    Identify the state of an IDF file by its modification time, its size, and
+    a hash of its header and the conversion arguments.
+    """
+    stat = path.stat()
+    digest = hashlib.sha1(header)
+    for arg in args:
+        digest.update(arg.encode("utf-8"))
+    return f"{stat.st_mtime_ns}-{stat.st_size}-{digest.hexdigest()}"
+
+
+def raster_path(path: Path, suffix: str) -> Path:
+    """
+    Location of the raster to convert an IDF to: next to the IDF if possible,
+    in the cache directory otherwise.
+    """
+    path = Path(path)
+    if os.access(path.parent, os.W_OK):
+        return path.with_suffix(suffix)
+    key = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return get_cachedir() / f"{path.stem}-{key}{suffix}"
+
+
+def is_cached(path: Path) -> bool:
+    return Path(path).parent == get_cachedir()
+
+
+def touch(path: Path) -> None:
+    """Mark a cached raster as recently used."""
+    if is_cached(path):
+        os.utime(path)
+
+
+def evict(
+    keep: Path,
+    maxsize: int = IDF_CACHE_MAXSIZE,
+    cachedir: Optional[Path] = None,
+) -> None:
+    """
+    Remove the least recently used rasters from the cache directory, until its
+    size is below maxsize. The raster at path ``keep`` is never removed, nor
+    are rasters used within the last ``IDF_CACHE_MINAGE`` seconds. Rasters
+    which cannot be removed, e.g. because they are opened in QGIS, are
+    skipped.
+    """
+    if cachedir is None:
+        cachedir = get_cachedir()
+    keep = Path(keep)
+    with EVICT_LOCK:
+        entries = []
+        for entry in os.scandir(cachedir):
+            if entry.is_file() and not entry.name.endswith(".aux.xml"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+
+        total = sum(size for _, size, _ in entries)
+        threshold = time.time() - IDF_CACHE_MINAGE
+        for mtime, size, path in sorted(entries):
+            if total <= maxsize or mtime > threshold:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            try:
+                (path.parent / f"{path.name}.aux.xml").unlink()
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,157 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Catalog of the IDF files in a directory.
+
+Only the headers of the IDF files are read, concurrently. The catalog is
+persisted in the plugin settings directory, so that a directory only has to be
+read once: on the next scan, only new and changed files are read.
+"""
+
+import os
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from imodqgis.idf.conversion import IdfFile
+from imodqgis.utils.index import is_current, read_index, stamp, write_index
+
+CATALOG_KIND = "idf-catalog"
+# Increment when the entries change, to discard existing indexes.
+CATALOG_VERSION = 1
+
+# iMOD naming convention: {name}_{yyyymmdd[hhmmss]}_l{layer}.idf, where both
+# the date and the layer are optional.
+IDF_NAME_PATTERN = re.compile(
+    r"^(?P<name>.+?)(?:_(?P<time>\d{14}|\d{8}|steady-state))?(?:_l(?P<layer>\d+))?$",
+    re.IGNORECASE,
+)
+
+
+def parse_idf_name(path: str) -> Dict[str, Any]:
+    """
+    Parse the variable name, time, and layer from an IDF filename.
+
+    Returns
+    -------
+    parsed: dict
+        With keys "name", "time" (ISO format string or None), and "layer" (int
+        or None). Digits which do not form a valid date are part of the name.
+    """
+    match = IDF_NAME_PATTERN.match(Path(path).stem)
+    name = match.group("name")
+    time = match.group("time")
+    if time is None or not time.isdigit():  # steady-state
+        time = None
+    else:
+        fmt = "%Y%m%d" if len(time) == 8 else "%Y%m%d%H%M%S"
+        try:
+            time = datetime.strptime(time, fmt).isoformat()
+        except ValueError:  # Not a date, e.g. well_00000001: part of the name
+            name = f"{name}_{time}"
+            time = None
+    layer = match.group("layer")
+    return {
+        "name": name,
+        "time": time,
+        "layer": None if layer is None else int(layer),
+    }
+
+
+def read_entry(path: str) -> Dict[str, Any]:
+    """Read the catalog entry of a single IDF: its name and header."""
+    entry = parse_idf_name(path)
+    with IdfFile(path) as idf:
+        entry.update(
+            {
+                "nrow": idf.nrow,
+                "ncol": idf.ncol,
+                "xmin": idf.xmin,
+                "xmax": idf.xmax,
+                "ymin": idf.ymin,
+                "ymax": idf.ymax,
+                "dmin": idf.dmin,
+                "dmax": idf.dmax,
+                "nodata": idf.nodata,
+                "dtype": idf.dtype,
+                "equidistant": idf.equidistant,
+            }
+        )
+    return entry
+
+
+def scan_idf_directory(
+    directory: str, max_workers: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Catalog the IDF files in a directory (not recursively).
+
+    Headers are only read for files which have been added or changed since
+    the previous scan of the directory.
+
+    Parameters
+    ----------
+    directory: str
+    max_workers: int, optional
+        Maximum number of threads reading headers.
+
+    Returns
+    -------
+    entries: list of dict
+        One dict per IDF, sorted by path. Contains the path, the parsed name
+        (see ``parse_idf_name``), and the header information.
+    """
+    directory = Path(directory)
+    previous = read_index(directory, CATALOG_KIND, CATALOG_VERSION)
+
+    entries = {}
+    changed = []
+    with os.scandir(directory) as it:
+        for direntry in it:
+            if not direntry.name.lower().endswith(".idf") or not direntry.is_file():
+                continue
+            stat = direntry.stat()
+            entry = previous.get(direntry.name)
+            if entry is not None and is_current(entry, stat):
+                entries[direntry.name] = entry
+            else:
+                changed.append((direntry.name, stat))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_entry, directory / name) for name, _ in changed]
+        for (name, stat), future in zip(changed, futures):
+            try:
+                entry = future.result()
+            except (ValueError, struct.error):  # Not a readable IDF
+                continue
+            entries[name] = stamp(entry, stat)
+
+    if changed or len(entries) != len(previous):
+        write_index(directory, CATALOG_KIND, CATALOG_VERSION, entries)
+
+    return [
+        {"path": str(directory / name), **entries[name]} for name in sorted(entries)
+    ]
+
+
+def filter_catalog(
+    entries: List[Dict[str, Any]],
+    name: Optional[str] = None,
+    layer: Optional[int] = None,
+    time: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Select the catalog entries matching the variable name, layer, and time.
+    Arguments which are None match every entry.
+    """
+    return [
+        entry
+        for entry in entries
+        if (name is None or entry["name"].lower() == name.lower())
+        and (layer is None or entry["layer"] == layer)
+        and (time is None or entry["time"] == time)
+    ]
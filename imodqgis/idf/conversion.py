@@ -2,23 +2,79 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
 import struct
+import threading
 from pathlib import Path
-from typing import Any, Dict, Tuple, Union
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree
 
 import numpy as np
 from osgeo import gdal
 
+from imodqgis.idf import cache
+
+# Rasters are read in strips of about this size when writing IDFs.
+READ_NBYTES = 16 * 1024**2
+# Nodata value used when writing IDFs.
+IDF_NODATA = 1.0e20
+# Overviews are added until the coarsest overview is smaller than this size.
+OVERVIEW_MINSIZE = 256
+# Maximum number of cells of the regular grid of a non-equidistant IDF.
+RESAMPLE_MAXCELLS = 2**27
+
+
+def geotiff_options(compress: bool = True) -> List[str]:
+    """
+    GeoTIFF creation options: tiled, so that QGIS can read small parts of
+    large rasters efficiently; optionally compressed.
+
+    Parameters
+    ----------
+    compress: bool, default True
+        Compress with ZSTD if the GDAL build supports it, DEFLATE otherwise.
+        The floating point predictor is used, which greatly improves the
+        compression of smooth fields such as heads.
+
+    Returns
+    -------
+    options: list of str
+    """
+    # BigTIFF is used automatically when the file might exceed 4 GB.
+    options = ["TILED=YES", "BIGTIFF=IF_SAFER"]
+    if compress:
+        driver = gdal.GetDriverByName("GTiff")
+        creation_options = driver.GetMetadataItem("DMD_CREATIONOPTIONLIST")
+        method = "ZSTD" if "ZSTD" in creation_options else "DEFLATE"
+        options.extend([f"COMPRESS={method}", "PREDICTOR=3"])
+    return options
+
+
+def overview_levels(nrow: int, ncol: int) -> List[int]:
+    levels = []
+    level = 2
+    while min(nrow, ncol) // level >= OVERVIEW_MINSIZE:
+        levels.append(level)
+        level *= 2
+    return levels
+
 
 class NewGeoTiff:
     """
     Implements enter and exit to make sure the GDAL dataset is closed.
     """
 
-    def __init__(self, path: str, nrow: int, ncol: int, dtype: type):
+    def __init__(
+        self,
+        path: str,
+        nrow: int,
+        ncol: int,
+        dtype: type,
+        options: Optional[List[str]] = None,
+    ):
         self.__raster__ = None
         self.path = path
         self.nrow = nrow
         self.ncol = ncol
+        self.options = [] if options is None else options
         if dtype == "float32":
             self.gdal_dtype = gdal.GDT_Float32
         elif dtype == "float64":
@@ -29,7 +85,7 @@ class NewGeoTiff:
     def __enter__(self):
         driver = gdal.GetDriverByName("GTiff")
         self.__raster__ = driver.Create(
-            self.path, self.ncol, self.nrow, 1, self.gdal_dtype
+            self.path, self.ncol, self.nrow, 1, self.gdal_dtype, options=self.options
         )
         return self
 
@@ -42,12 +98,24 @@ class NewGeoTiff:
     def set_crs(self, crs_wkt: str) -> None:
         self.__raster__.SetProjection(crs_wkt)
 
-    def write_array(self, values: np.ndarray, nodata: float) -> None:
+    def set_metadata_item(self, key: str, value: str) -> None:
+        self.__raster__.SetMetadataItem(key, value)
+
+    def write_array(self, values: np.ndarray, nodata: float, yoff: int = 0) -> None:
         band = self.__raster__.GetRasterBand(1)
         band.SetNoDataValue(nodata)
-        band.WriteArray(values)
+        band.WriteArray(values, 0, yoff)
         band.FlushCache()
 
+    def build_overviews(self, resampling: str = "AVERAGE") -> None:
+        """
+        Add internal overviews, so that QGIS does not have to resample the
+        full resolution raster when zoomed out.
+        """
+        levels = overview_levels(self.nrow, self.ncol)
+        if levels:
+            self.__raster__.BuildOverviews(resampling, levels)
+
 
 class ReadOnlyRaster:
     """
@@ -68,89 +136,366 @@ class ReadOnlyRaster:
     def get_transform(self) -> Tuple[float]:
         return self.__raster__.GetGeoTransform()
 
+    def get_metadata_item(self, key: str) -> Optional[str]:
+        if self.__raster__ is None:
+            return None
+        return self.__raster__.GetMetadataItem(key)
+
     def read_array(self) -> Tuple[np.ndarray, Union[int, float, None]]:
         band = self.__raster__.GetRasterBand(1)
         values = band.ReadAsArray()
         nodata = band.GetNoDataValue()
         return values, nodata
 
+    def iter_row_blocks(
+        self, band: int = 1, nbytes: int = READ_NBYTES
+    ) -> Iterator[np.ndarray]:
+        """
+        Read the band in strips of full rows, from top to bottom.
+
+        Strips contain whole rows of GDAL blocks; as many as fit in nbytes, but
+        at least one.
+        """
+        raster_band = self.__raster__.GetRasterBand(band)
+        _, block_nrow = raster_band.GetBlockSize()
+        itemsize = gdal.GetDataTypeSize(raster_band.DataType) // 8
+        block_nbytes = block_nrow * self.ncol * itemsize
+        strip_nrow = block_nrow * max(1, nbytes // block_nbytes)
+        for row in range(0, self.nrow, strip_nrow):
+            nrow = min(strip_nrow, self.nrow - row)
+            yield raster_band.ReadAsArray(0, row, self.ncol, nrow)
+
+    def get_nodata(self, band: int = 1) -> Union[int, float, None]:
+        return self.__raster__.GetRasterBand(band).GetNoDataValue()
+
+    def file_list(self) -> List[str]:
+        return self.__raster__.GetFileList() or []
+
     @property
     def nband(self) -> int:
         return self.__raster__.RasterCount
 
+    @property
+    def nrow(self) -> int:
+        return self.__raster__.RasterYSize
 
-def read_idf(path: str) -> Tuple[Dict[str, Any], np.ndarray]:
-    """Read the IDF header information into a dictionary"""
-    attrs = {}
-    with open(path, "rb") as f:
-        reclen_id = struct.unpack("i", f.read(4))[0]  # Lahey RecordLength Ident.
-        if reclen_id == 1271:
-            floatsize = intsize = 4
-            floatformat = "f"
-            intformat = "i"
-            dtype = "float32"
-            doubleprecision = False
-        elif reclen_id == 2295:
-            floatsize = intsize = 8
-            floatformat = "d"
-            intformat = "q"
-            dtype = "float64"
-            doubleprecision = True
-        else:
-            raise ValueError(
-                f"Not a supported IDF file: {path}\n"
-                "Record length identifier should be 1271 or 2295, "
-                f"received {reclen_id} instead."
+    @property
+    def ncol(self) -> int:
+        return self.__raster__.RasterXSize
+
+
+# Layout of the fixed part of the IDF header, up to and including the ieq and
+# itb flags. The header is fully doubled in size in case of double precision:
+# integers are turned into 8 bytes as well, and padding is added.
+IDF_HEADER_FORMAT = {
+    1271: "<3i7f??2x",
+    2295: "<i4x2q7d??2x4x",
+}
+
+
+class IdfFile:
+    """
+    Read-only access to an iMOD IDF file.
+
+    Only the header is read on initialization. The grid values are exposed as
+    a read-only ``np.memmap``, which is created on first access. This makes it
+    cheap to inspect the extent, cell size and nodata value of large files.
+
+    For non-equidistant IDFs, ``dx`` and ``dy`` are arrays with the size of
+    every column and row. Use ``equidistant_indices`` to map the values on a
+    regular grid.
+
+    Implements enter and exit to make sure the memory map is released.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.__values__ = None
+        with open(self.path, "rb") as f:
+            header = f.read(struct.calcsize(IDF_HEADER_FORMAT[2295]) + 32)
+
+            reclen_id = struct.unpack_from("<i", header)[0]  # Lahey RecordLength Ident.
+            if reclen_id not in IDF_HEADER_FORMAT:
+                raise ValueError(
+                    f"Not a supported IDF file: {path}\n"
+                    "Record length identifier should be 1271 or 2295, "
+                    f"received {reclen_id} instead."
+                )
+            header_format = IDF_HEADER_FORMAT[reclen_id]
+            (
+                _,
+                self.ncol,
+                self.nrow,
+                self.xmin,
+                self.xmax,
+                self.ymin,
+                self.ymax,
+                self.dmin,
+                self.dmax,
+                self.nodata,
+                nonequidistant,
+                self.itb,
+            ) = struct.unpack_from(header_format, header)
+
+            # flip definition here such that True means equidistant
+            self.equidistant = not nonequidistant
+            self.doubleprecision = reclen_id == 2295
+            self.dtype = "float64" if self.doubleprecision else "float32"
+            floatformat = "<d" if self.doubleprecision else "<f"
+            floatsize = struct.calcsize(floatformat)
+            offset = struct.calcsize(header_format)
+
+            # dx and dy are stored positively in the IDF
+            # dy is made negative here to be consistent with the nonequidistant case
+            if self.equidistant:
+                dx, dy = struct.unpack_from(f"<2{floatformat[1]}", header, offset)
+                self.dx = dx
+                self.dy = -dy
+                offset += 2 * floatsize
+            self.top = None
+            self.bot = None
+            if self.itb:
+                self.top, self.bot = struct.unpack_from(
+                    f"<2{floatformat[1]}", header, offset
+                )
+                offset += 2 * floatsize
+            if not self.equidistant:
+                # The column widths and row heights follow in one block.
+                f.seek(offset)
+                nbytes = (self.ncol + self.nrow) * floatsize
+                header = header[:offset] + f.read(nbytes)
+                cellsizes = np.frombuffer(header, floatformat, offset=offset)
+                if cellsizes.size != self.ncol + self.nrow:
+                    raise ValueError(f"Truncated IDF header: {path}")
+                self.dx = cellsizes[: self.ncol].astype(np.float64)
+                self.dy = -cellsizes[self.ncol :].astype(np.float64)
+                offset += nbytes
+
+        self.header_size = offset
+        self.header = header[:offset]
+
+    def __repr__(self):
+        name = self.__class__.__name__
+        return f"{name}({self.path}, nrow={self.nrow}, ncol={self.ncol})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self) -> None:
+        self.__values__ = None
+
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        """Header information, as returned by ``read_idf``."""
+        attrs = {
+            "xmin": self.xmin,
+            "xmax": self.xmax,
+            "ymin": self.ymin,
+            "ymax": self.ymax,
+            "nodata": self.nodata,
+            "dx": self.dx,
+            "dy": self.dy,
+            "ncol": self.ncol,
+            "nrow": self.nrow,
+            "dtype": self.dtype,
+        }
+        if self.itb:
+            attrs["top"] = self.top
+            attrs["bot"] = self.bot
+        return attrs
+
+    @property
+    def values(self) -> np.memmap:
+        """Read-only memory map of the grid values, with shape (nrow, ncol)."""
+        if self.__values__ is None:
+            self.__values__ = np.memmap(
+                self.path,
+                dtype=self.dtype,
+                mode="r",
+                offset=self.header_size,
+                shape=(self.nrow, self.ncol),
+            )
+        return self.__values__
+
+    def read_window(
+        self,
+        row_start: int = 0,
+        row_end: Optional[int] = None,
+        col_start: int = 0,
+        col_end: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Read a rectangular window of the grid into memory.
+
+        Parameters
+        ----------
+        row_start, row_end: int
+            Row range to read, end exclusive. Defaults to all rows.
+        col_start, col_end: int
+            Column range to read, end exclusive. Defaults to all columns.
+
+        Returns
+        -------
+        values: np.ndarray of shape (row_end - row_start, col_end - col_start)
+        """
+        if row_end is None:
+            row_end = self.nrow
+        if col_end is None:
+            col_end = self.ncol
+        if not (0 <= row_start <= row_end <= self.nrow) or not (
+            0 <= col_start <= col_end <= self.ncol
+        ):
+            raise IndexError(
+                f"Window rows {row_start}:{row_end}, columns {col_start}:{col_end} "
+                f"out of bounds for IDF of shape ({self.nrow}, {self.ncol})"
             )
+        return np.array(self.values[row_start:row_end, col_start:col_end])
+
+
+def equidistant_indices(
+    idf: IdfFile, max_cells: int = RESAMPLE_MAXCELLS
+) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    """
+    Map the values of a non-equidistant IDF on a regular grid, with the
+    smallest column width and row height of the IDF as cell size.
 
-        # Header is fully doubled in size in case of double precision ...
-        # This means integers are also turned into 8 bytes
-        # and requires padding with some additional bytes
-        if doubleprecision:
-            f.read(4)  # not used
-
-        ncol = struct.unpack(intformat, f.read(intsize))[0]
-        nrow = struct.unpack(intformat, f.read(intsize))[0]
-        attrs["xmin"] = struct.unpack(floatformat, f.read(floatsize))[0]
-        attrs["xmax"] = struct.unpack(floatformat, f.read(floatsize))[0]
-        attrs["ymin"] = struct.unpack(floatformat, f.read(floatsize))[0]
-        attrs["ymax"] = struct.unpack(floatformat, f.read(floatsize))[0]
-        # dmin and dmax are recomputed during writing
-        f.read(floatsize)  # dmin, minimum data value present
-        f.read(floatsize)  # dmax, maximum data value present
-        nodata = struct.unpack(floatformat, f.read(floatsize))[0]
-        attrs["nodata"] = nodata
-        # flip definition here such that True means equidistant
-        # equidistant IDFs
-        ieq = not struct.unpack("?", f.read(1))[0]
-        itb = struct.unpack("?", f.read(1))[0]
-        if not ieq:
-            raise ValueError(f"Non-equidistant IDF are not supported: {path}\n")
-
-        f.read(2)  # not used
-        if doubleprecision:
-            f.read(4)  # not used
-
-        # dx and dy are stored positively in the IDF
-        # dy is made negative here to be consistent with the nonequidistant case
-        attrs["dx"] = struct.unpack(floatformat, f.read(floatsize))[0]
-        attrs["dy"] = -struct.unpack(floatformat, f.read(floatsize))[0]
-
-        if itb:
-            attrs["top"] = struct.unpack(floatformat, f.read(floatsize))[0]
-            attrs["bot"] = struct.unpack(floatformat, f.read(floatsize))[0]
-
-        # These are derived, remove after using them downstream
-        attrs["ncol"] = ncol
-        attrs["nrow"] = nrow
-        attrs["dtype"] = dtype
-
-        values = np.reshape(np.fromfile(f, dtype, nrow * ncol), (nrow, ncol))
+    A locally refined grid would result in a huge regular grid: the cell size
+    is then multiplied by the smallest whole factor for which the regular
+    grid has at most max_cells cells.
 
+    Returns
+    -------
+    rows: np.ndarray of int
+        For every row of the regular grid, the IDF row containing its center.
+    cols: np.ndarray of int
+        For every column of the regular grid, the IDF column containing its
+        center.
+    dx: float
+    dy: float
+        Cell size of the regular grid; dy is negative.
+    """
+    if idf.equidistant:
+        return np.arange(idf.nrow), np.arange(idf.ncol), idf.dx, idf.dy
+
+    def shape(dx, dy):
+        # Round to prevent an additional column or row by floating point error.
+        ncol = int(np.ceil(round((idf.xmax - idf.xmin) / dx, 6)))
+        nrow = int(np.ceil(round((idf.ymax - idf.ymin) / -dy, 6)))
+        return nrow, ncol
+
+    dx = float(idf.dx.min())
+    dy = float(idf.dy.max())
+    nrow, ncol = shape(dx, dy)
+    if nrow * ncol > max_cells:
+        factor = int(np.ceil(np.sqrt(nrow * ncol / max_cells)))
+        # The numbers of rows and columns are rounded up: increase the factor
+        # until the grid is small enough.
+        while True:
+            nrow, ncol = shape(dx * factor, dy * factor)
+            if nrow * ncol <= max(max_cells, 1):
+                break
+            factor += 1
+        dx *= factor
+        dy *= factor
+    # Distances of the cell edges and the regular cell centers, measured from
+    # the upper left corner.
+    x_edges = np.cumsum(idf.dx)
+    y_edges = np.cumsum(-idf.dy)
+    x = (np.arange(ncol) + 0.5) * dx
+    y = (np.arange(nrow) + 0.5) * -dy
+    cols = np.minimum(np.searchsorted(x_edges, x, side="right"), idf.ncol - 1)
+    rows = np.minimum(np.searchsorted(y_edges, y, side="right"), idf.nrow - 1)
+    return rows, cols, dx, dy
+
+
+def read_idf(path: str) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Read the IDF header information into a dictionary"""
+    with IdfFile(path) as idf:
+        attrs = idf.attrs
+        values = idf.read_window()
     return attrs, values
 
 
-def write(path, a, spatial_reference, nodata=1.0e20, dtype=np.float32):
+def data_range(a: np.ndarray, nodata: float) -> Tuple[float, float]:
+    """Minimum and maximum value of a, excluding nodata."""
+    values = a[(a != nodata) & ~np.isnan(a)]
+    if values.size == 0:
+        return nodata, nodata
+    return float(values.min()), float(values.max())
+
+
+def write_header(
+    f: BinaryIO,
+    nrow: int,
+    ncol: int,
+    spatial_reference: Tuple[float, float, float, float, float, float],
+    dmin: float,
+    dmax: float,
+    nodata: float,
+    doubleprecision: bool,
+) -> None:
+    """
+    Write the header of an equidistant IDF file.
+
+    Parameters
+    ----------
+    f: binary file object
+    nrow: int
+    ncol: int
+    spatial_reference: tuple
+        dx, xmin, xmax, dy, ymin, ymax
+    dmin: float
+        Minimum data value present.
+    dmax: float
+        Maximum data value present.
+    nodata: float
+    doubleprecision: bool
+        Whether the data are stored as np.float64 rather than np.float32.
+    """
+    # Header is fully doubled in size in case of double precision ...
+    # This means integers are also turned into 8 bytes
+    # and requires padding with some additional bytes
+    if doubleprecision:
+        reclenid = 2295
+        floatformat = "d"
+        intformat = "q"
+    else:
+        reclenid = 1271
+        floatformat = "f"
+        intformat = "i"
+
+    f.write(struct.pack("i", reclenid))  # Lahey RecordLength Ident.
+    if doubleprecision:
+        f.write(struct.pack("i", reclenid))
+    f.write(struct.pack(intformat, ncol))
+    f.write(struct.pack(intformat, nrow))
+
+    dx, xmin, xmax, dy, ymin, ymax = spatial_reference
+    f.write(struct.pack(floatformat, xmin))
+    f.write(struct.pack(floatformat, xmax))
+    f.write(struct.pack(floatformat, ymin))
+    f.write(struct.pack(floatformat, ymax))
+    f.write(struct.pack(floatformat, dmin))
+    f.write(struct.pack(floatformat, dmax))
+    f.write(struct.pack(floatformat, nodata))
+
+    ieq = True  # equidistant
+    f.write(struct.pack("?", not ieq))  # ieq
+
+    itb = False
+    f.write(struct.pack("?", itb))
+    f.write(struct.pack("xx"))  # not used
+    if doubleprecision:
+        f.write(struct.pack("xxxx"))  # not used
+
+    f.write(struct.pack(floatformat, abs(dx)))
+    f.write(struct.pack(floatformat, abs(dy)))
+
+
+def write(path, a, spatial_reference, nodata=IDF_NODATA, dtype=np.float32):
     """
     Write a 2D numpy array to an IDF file.
 
@@ -171,64 +516,41 @@ def write(path, a, spatial_reference, nodata=1.0e20, dtype=np.float32):
     """
     if a.ndim != 2:
         raise ValueError("Array to write must be 2D.")
-
-    # Header is fully doubled in size in case of double precision ...
-    # This means integers are also turned into 8 bytes
-    # and requires padding with some additional bytes
-    data_dtype = a.dtype
-    if dtype == np.float64:
-        if data_dtype != np.float64:
-            a = a.astype(np.float64)
-        reclenid = 2295
-        floatformat = "d"
-        intformat = "q"
-        doubleprecision = True
-    elif dtype == np.float32:
-        reclenid = 1271
-        floatformat = "f"
-        intformat = "i"
-        doubleprecision = False
-        if data_dtype != np.float32:
-            a = a.astype(np.float32)
-    else:
+    if dtype not in (np.float32, np.float64):
         raise ValueError("Invalid dtype, IDF allows only np.float32 and np.float64")
 
+    a = a.astype(dtype, copy=False)
+    nrow, ncol = a.shape
+    dmin, dmax = data_range(a, nodata)
     with open(path, "wb") as f:
-        f.write(struct.pack("i", reclenid))  # Lahey RecordLength Ident.
-        if doubleprecision:
-            f.write(struct.pack("i", reclenid))
-        nrow, ncol = a.shape
-        f.write(struct.pack(intformat, ncol))
-        f.write(struct.pack(intformat, nrow))
-
-        dx, xmin, xmax, dy, ymin, ymax = spatial_reference
-        f.write(struct.pack(floatformat, xmin))
-        f.write(struct.pack(floatformat, xmax))
-        f.write(struct.pack(floatformat, ymin))
-        f.write(struct.pack(floatformat, ymax))
-        f.write(struct.pack(floatformat, float(a.min())))  # dmin
-        f.write(struct.pack(floatformat, float(a.max())))  # dmax
-        f.write(struct.pack(floatformat, nodata))
-
-        ieq = True  # equidistant
-        f.write(struct.pack("?", not ieq))  # ieq
-
-        itb = False
-        f.write(struct.pack("?", itb))
-        f.write(struct.pack("xx"))  # not used
-        if doubleprecision:
-            f.write(struct.pack("xxxx"))  # not used
-
-        f.write(struct.pack(floatformat, abs(dx)))
-        f.write(struct.pack(floatformat, abs(dy)))
+        write_header(
+            f,
+            nrow,
+            ncol,
+            spatial_reference,
+            dmin,
+            dmax,
+            nodata,
+            doubleprecision=(dtype == np.float64),
+        )
         a.tofile(f)
     return
 
 
-def convert_idf_to_gdal(path: str, crs_wkt: str) -> Path:
+def convert_idf_to_gdal(
+    path: str, crs_wkt: str, compress: bool = True, overviews: bool = True
+) -> Path:
     """
     Read the contents of an iMOD IDF file and write it to a GeoTIFF, next to
-    the IDF. This is similar to how iMOD treats ASCII files.
+    the IDF. This is similar to how iMOD treats ASCII files. If the directory
+    of the IDF is not writable, the GeoTIFF is written to the IDF cache
+    directory instead.
+
+    Non-equidistant IDFs are resampled to a regular grid, see
+    ``equidistant_indices``.
+
+    If the GeoTIFF has been created before, and the IDF has not changed since,
+    the existing GeoTIFF is returned.
 
     Parameters
     ----------
@@ -237,76 +559,302 @@ def convert_idf_to_gdal(path: str, crs_wkt: str) -> Path:
     crs_wkt: str
         Desired CRS to write in the created GeoTIFF. IDFs do not have a CRS on
         their own, one must be provided.
+    compress: bool, default True
+        Whether to compress the GeoTIFF. See ``geotiff_options``.
+    overviews: bool, default True
+        Whether to add overviews to the GeoTIFF.
 
     Returns
     -------
     tiff_path: pathlib.Path
         Path to the newly created GeoTIFF file.
     """
-    attrs, values = read_idf(path)
-
     path = Path(path)
-    tiff_path = (path.parent / (path.stem)).with_suffix(".tif")
-    with NewGeoTiff(
-        path=str(tiff_path),
-        nrow=attrs["nrow"],
-        ncol=attrs["ncol"],
-        dtype=values.dtype,
-    ) as raster:
-        raster.set_transform(
-            xmin=attrs["xmin"],
-            dx=attrs["dx"],
-            ymax=attrs["ymax"],
-            dy=attrs["dy"],
+    tiff_path = cache.raster_path(path, ".tif")
+    with IdfFile(path) as idf:
+        fingerprint = cache.fingerprint(
+            path, idf.header, crs_wkt, str(compress), str(overviews)
         )
-        raster.set_crs(crs_wkt)
-        raster.write_array(values, attrs["nodata"])
-
+        if tiff_path.exists():
+            with ReadOnlyRaster(str(tiff_path)) as raster:
+                existing = raster.get_metadata_item(cache.FINGERPRINT_KEY)
+            if existing == fingerprint:
+                cache.touch(tiff_path)
+                return tiff_path
+
+        rows, cols, dx, dy = equidistant_indices(idf)
+        with NewGeoTiff(
+            path=str(tiff_path),
+            nrow=rows.size,
+            ncol=cols.size,
+            dtype=idf.dtype,
+            options=geotiff_options(compress),
+        ) as raster:
+            raster.set_transform(
+                xmin=idf.xmin,
+                dx=dx,
+                ymax=idf.ymax,
+                dy=dy,
+            )
+            raster.set_crs(crs_wkt)
+            raster.set_metadata_item(cache.FINGERPRINT_KEY, fingerprint)
+            if idf.equidistant:
+                raster.write_array(idf.values, idf.nodata)
+            else:
+                # Resample in strips of rows, the regular grid may be much
+                # larger than the IDF.
+                itemsize = np.dtype(idf.dtype).itemsize
+                strip_nrow = max(1, READ_NBYTES // (itemsize * cols.size))
+                for start in range(0, rows.size, strip_nrow):
+                    strip_rows = rows[start : start + strip_nrow]
+                    raster.write_array(
+                        idf.values[np.ix_(strip_rows, cols)], idf.nodata, yoff=start
+                    )
+            if overviews:
+                raster.build_overviews()
+
+    if cache.is_cached(tiff_path):
+        cache.evict(keep=tiff_path)
     return tiff_path
 
 
-def convert_gdal_to_idf(path: str, idf_path: str, dtype):
+def idf_vrt_band(idf: IdfFile, band: int, vrt_path: Path) -> ElementTree.Element:
+    """
+    Create a VRTRawRasterBand element, which lets GDAL read the values of the
+    IDF in place: the values are stored as a contiguous block of floats after
+    the header.
+    """
+    itemsize = np.dtype(idf.dtype).itemsize
+    element = ElementTree.Element(
+        "VRTRasterBand",
+        dataType="Float64" if idf.doubleprecision else "Float32",
+        band=str(band),
+        subClass="VRTRawRasterBand",
+    )
+    ElementTree.SubElement(element, "NoDataValue").text = repr(idf.nodata)
+    try:
+        filename = idf.path.resolve().relative_to(vrt_path.resolve().parent)
+        relative = True
+    except ValueError:
+        filename = idf.path.resolve()
+        relative = False
+    source = ElementTree.SubElement(
+        element, "SourceFilename", relativeToVRT=str(int(relative))
+    )
+    source.text = filename.as_posix()
+    ElementTree.SubElement(element, "ImageOffset").text = str(idf.header_size)
+    ElementTree.SubElement(element, "PixelOffset").text = str(itemsize)
+    ElementTree.SubElement(element, "LineOffset").text = str(itemsize * idf.ncol)
+    ElementTree.SubElement(element, "ByteOrder").text = "LSB"
+    return element
+
+
+def write_vrt(
+    vrt_path: Path, idf: IdfFile, crs_wkt: str, bands: List[ElementTree.Element]
+) -> None:
+    """Write a VRT with the grid definition of the IDF and the provided bands."""
+    root = ElementTree.Element(
+        "VRTDataset", rasterXSize=str(idf.ncol), rasterYSize=str(idf.nrow)
+    )
+    ElementTree.SubElement(root, "SRS").text = crs_wkt
+    ElementTree.SubElement(root, "GeoTransform").text = ", ".join(
+        repr(v) for v in (idf.xmin, idf.dx, 0.0, idf.ymax, 0.0, idf.dy)
+    )
+    root.extend(bands)
+    ElementTree.ElementTree(root).write(vrt_path, encoding="utf-8")
+
+
+def convert_idf_to_vrt(path: str, crs_wkt: str) -> Path:
     """
-    Read the content of a single-band GDAL supported raster file and write it
-    to an IDF file.
+    Write a GDAL VRT file next to the IDF, which refers to the values of the
+    IDF directly. Unlike ``convert_idf_to_gdal``, no values are read or
+    copied: opening an IDF this way takes as long as reading its header. If
+    the directory of the IDF is not writable, the VRT is written to the IDF
+    cache directory instead.
 
     Parameters
     ----------
     path: str
-        Path to the GDAL raster file.
-    idf_path: str
+        Path to the IDF file.
+    crs_wkt: str
+        Desired CRS to write in the created VRT. IDFs do not have a CRS on
+        their own, one must be provided.
+
+    Returns
+    -------
+    vrt_path: pathlib.Path
+        Path to the newly created VRT file.
+    """
+    path = Path(path)
+    vrt_path = cache.raster_path(path, ".vrt")
+    with IdfFile(path) as idf:
+        if not idf.equidistant:
+            raise ValueError(f"Non-equidistant IDF cannot be opened in place: {path}")
+        write_vrt(vrt_path, idf, crs_wkt, [idf_vrt_band(idf, 1, vrt_path)])
+    return vrt_path
+
+
+def convert_idf(
+    path: str,
+    crs_wkt: str,
+    in_place: bool = True,
+    compress: bool = True,
+    overviews: bool = True,
+) -> Path:
+    """
+    Make an IDF file available as a GDAL raster.
+
+    Parameters
+    ----------
+    path: str
+        Path to the IDF file.
+    crs_wkt: str
+        Desired CRS of the raster.
+    in_place: bool, default True
+        Whether to refer to the IDF values with a VRT. If False, if the IDF is
+        non-equidistant, or if GDAL cannot open the VRT, a GeoTIFF copy is
+        written instead.
+    compress: bool, default True
+        Whether to compress the GeoTIFF copy.
+    overviews: bool, default True
+        Whether to add overviews to the GeoTIFF copy.
+
+    Returns
+    -------
+    raster_path: pathlib.Path
+        Path to the VRT or GeoTIFF file.
+    """
+    if in_place:
+        with IdfFile(path) as idf:
+            in_place = idf.equidistant
+    if in_place:
+        vrt_path = convert_idf_to_vrt(path, crs_wkt)
+        # gdal.Open returns None on failure, or raises if exceptions are
+        # enabled.
+        try:
+            dataset = gdal.Open(str(vrt_path))
+        except RuntimeError:
+            dataset = None
+        if dataset is not None:
+            dataset = None  # Close the dataset
+            return vrt_path
+        vrt_path.unlink()
+    return convert_idf_to_gdal(path, crs_wkt, compress, overviews)
+
+
+def write_band(
+    raster: ReadOnlyRaster,
+    band: int,
+    idf_path: Union[str, Path],
+    dtype,
+    lock: Optional[threading.Lock] = None,
+) -> None:
+    """
+    Write a single band of an opened raster to an IDF file.
+
+    The raster is read and written in strips of rows, so that rasters larger
+    than memory can be exported. The header is written last, once the minimum
+    and maximum value are known.
+
+    Parameters
+    ----------
+    raster: ReadOnlyRaster
+    band: int
+        Band to write.
+    idf_path: str or Path
         Path to the IDF file that will be created.
     dtype: np.float32 or np.float64
         Data type of the output IDF file.
+    lock: threading.Lock, optional
+        GDAL datasets may not be read from multiple threads at once. Provide a
+        lock when writing bands of the same raster concurrently.
     """
-    with ReadOnlyRaster(path) as raster:
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("Invalid dtype, IDF allows only np.float32 and np.float64")
+    if lock is None:
+        lock = threading.Lock()
+
+    with lock:
         xmin, dx, x_rotation, ymax, y_rotation, dy = raster.get_transform()
-        values, nodata = raster.read_array()
         nband = raster.nband
-
+        nrow = raster.nrow
+        ncol = raster.ncol
+        file_list = raster.file_list()
+        nodata = raster.get_nodata(band) if band <= nband else None
     if x_rotation != 0 or y_rotation != 0:
         raise ValueError("IDFs do not support rotated rasters")
-    if nband != 1:
-        raise ValueError("IDFs can contain only the data of a single band")
+    if band > nband:
+        raise ValueError(f"Band {band} does not exist, raster has {nband}")
+    idf_path = Path(idf_path)
+    if any(Path(f).resolve() == idf_path.resolve() for f in file_list):
+        raise ValueError(f"Cannot export a raster to its own source: {idf_path}")
 
-    nrow, ncol = values.shape
     xmax = xmin + dx * ncol
     ymin = ymax + dy * nrow
+    spatial_reference = (dx, xmin, xmax, dy, ymin, ymax)
+    doubleprecision = dtype == np.float64
+
+    dmin = np.inf
+    dmax = -np.inf
+    blocks = raster.iter_row_blocks(band)
+    with open(idf_path, "wb") as f:
+        # Reserve the space for the header, it is written at the end.
+        write_header(
+            f, nrow, ncol, spatial_reference, 0.0, 0.0, IDF_NODATA, doubleprecision
+        )
+        while True:
+            with lock:
+                block = next(blocks, None)
+            if block is None:
+                break
+            # Make sure the IDF nodata value is supported.
+            if nodata is None:
+                isnodata = np.zeros(block.shape, dtype=bool)
+            elif np.isnan(nodata):
+                isnodata = np.isnan(block)
+            else:
+                isnodata = block == nodata
+            values = block.astype(dtype)
+            values[isnodata] = IDF_NODATA
+            active = values[~isnodata]
+            active = active[~np.isnan(active)]
+            if active.size > 0:
+                dmin = min(dmin, float(active.min()))
+                dmax = max(dmax, float(active.max()))
+            values.tofile(f)
+
+        if dmin > dmax:  # Nodata only
+            dmin = dmax = IDF_NODATA
+        f.seek(0)
+        write_header(
+            f,
+            nrow,
+            ncol,
+            spatial_reference,
+            dmin,
+            dmax,
+            IDF_NODATA,
+            doubleprecision,
+        )
+    return
 
-    # Make sure the IDF nodata value is supported.
-    IDF_NODATA = 1.0e20
-    if nodata is None:
-        pass
-    elif np.isnan(nodata):
-        values[np.isnan(nodata)] = IDF_NODATA
-    else:
-        values[values == nodata] = IDF_NODATA
-
-    write(
-        path=idf_path,
-        a=values.astype(dtype),
-        spatial_reference=(dx, xmin, xmax, dy, ymin, ymax),
-        nodata=IDF_NODATA,
-        dtype=dtype,
-    )
+
+def convert_gdal_to_idf(path: str, idf_path: str, dtype, band: int = 1):
+    """
+    Read the content of a single band of a GDAL supported raster file and write
+    it to an IDF file.
+
+    Parameters
+    ----------
+    path: str
+        Path to the GDAL raster file.
+    idf_path: str
+        Path to the IDF file that will be created.
+    dtype: np.float32 or np.float64
+        Data type of the output IDF file.
+    band: int, default 1
+        Band to export.
+    """
+    with ReadOnlyRaster(path) as raster:
+        write_band(raster, band, idf_path, dtype)
     return
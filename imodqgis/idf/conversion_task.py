@@ -0,0 +1,198 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Background conversion of IDF files.
+
+Converting IDF files mostly consists of file IO and numpy and GDAL calls, which
+release the GIL. The conversions are therefore run concurrently on a pool of
+threads, inside a QgsTask so the QGIS interface remains responsive.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from PyQt5.QtCore import QDateTime, pyqtSignal
+from PyQt5.QtWidgets import QProgressBar, QPushButton
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsDateTimeRange,
+    QgsProject,
+    QgsRasterLayer,
+    QgsTask,
+)
+
+from imodqgis.idf.conversion import convert_idf
+from imodqgis.idf.layer_styling import pseudocolor_renderer
+from imodqgis.idf.stack import convert_idfs_to_vrt, read_band_times
+
+# Python holds the only reference to a task while it runs: keep them here so
+# they are not garbage collected before they have finished.
+RUNNING_TASKS = set()
+
+
+def set_band_time_ranges(layer: QgsRasterLayer, times: List[datetime]) -> None:
+    """
+    Let the temporal controller show the band of the current time step. Every
+    band is valid from its own time until the time of the next band.
+
+    Requires QGIS 3.38 or later; the layer is left non-temporal otherwise.
+    """
+    properties = layer.temporalProperties()
+    if not hasattr(properties, "setFixedRangePerBand"):
+        return
+    ends = times[1:] + [times[-1] + (times[-1] - times[-2])]
+    ranges = {
+        band: QgsDateTimeRange(
+            QDateTime(start), QDateTime(end), includeBeginning=True, includeEnd=False
+        )
+        for band, (start, end) in enumerate(zip(times, ends), start=1)
+    }
+    properties.setFixedRangePerBand(ranges)
+    properties.setMode(Qgis.RasterTemporalMode.FixedRangePerBand)
+    properties.setIsActive(True)
+
+
+class IdfConversionTask(QgsTask):
+    """
+    Convert IDF files to GDAL rasters and add them to the project.
+
+    Layers are added in the order of ``paths``: a layer is added as soon as it
+    and all layers preceding it have been converted.
+
+    If ``combine`` is set, the IDFs are added as a single layer instead: a VRT
+    with one band per IDF, see ``convert_idfs_to_vrt``.
+    """
+
+    converted = pyqtSignal()
+
+    def __init__(
+        self,
+        paths: List[str],
+        crs_wkt: str,
+        in_place: bool,
+        compress: bool,
+        overviews: bool,
+        message_bar,
+        max_workers: Optional[int] = None,
+        combine: bool = False,
+    ):
+        super().__init__(f"Open {len(paths)} IDF file(s)", QgsTask.CanCancel)
+        self.paths = paths
+        self.crs_wkt = crs_wkt
+        self.in_place = in_place
+        self.compress = compress
+        self.overviews = overviews
+        self.message_bar = message_bar
+        self.max_workers = max_workers
+        self.combine = combine
+        self.raster_paths = [None] * (1 if combine else len(paths))
+        self.band_times = None
+        self.n_added = 0
+        self.exception = None
+        # Emitted from the worker thread, received in the main thread: only
+        # the main thread may add layers to the project.
+        self.converted.connect(self.add_layers)
+
+    def run(self) -> bool:
+        if self.combine:
+            return self.run_combine()
+        n_path = len(self.paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    convert_idf,
+                    path,
+                    self.crs_wkt,
+                    self.in_place,
+                    self.compress,
+                    self.overviews,
+                ): i
+                for i, path in enumerate(self.paths)
+            }
+            for n_done, future in enumerate(as_completed(futures), start=1):
+                if self.isCanceled():
+                    for pending in futures:
+                        pending.cancel()
+                    return False
+                i = futures[future]
+                try:
+                    self.raster_paths[i] = future.result()
+                except Exception as e:
+                    error = RuntimeError(f"Error converting {self.paths[i]}: {e}")
+                    error.__cause__ = e
+                    self.exception = error
+                    for pending in futures:
+                        pending.cancel()
+                    return False
+                self.converted.emit()
+                self.setProgress(100.0 * n_done / n_path)
+        return True
+
+    def run_combine(self) -> bool:
+        try:
+            vrt_path = convert_idfs_to_vrt(self.paths, self.crs_wkt)
+            times = read_band_times(vrt_path)
+        except Exception as e:
+            self.exception = e
+            return False
+        # A time per band, and a band per time: a single model layer.
+        if None not in times and len(set(times)) == len(times) > 1:
+            self.band_times = times
+        self.raster_paths[0] = vrt_path
+        self.setProgress(100.0)
+        return True
+
+    def add_layers(self) -> None:
+        while self.n_added < len(self.raster_paths):
+            raster_path = self.raster_paths[self.n_added]
+            if raster_path is None:
+                break
+            layer = QgsRasterLayer(str(raster_path), Path(raster_path).stem)
+            renderer = pseudocolor_renderer(layer, band=1, colormap="Turbo", nclass=10)
+            layer.setRenderer(renderer)
+            if self.band_times is not None:
+                set_band_time_ranges(layer, self.band_times)
+            QgsProject.instance().addMapLayer(layer)
+            self.n_added += 1
+
+    def finished(self, result: bool) -> None:
+        RUNNING_TASKS.discard(self)
+        self.add_layers()
+        if self.exception is not None:
+            self.message_bar.pushMessage(
+                title="Error",
+                text=str(self.exception),
+                level=Qgis.Critical,
+            )
+        elif not result:
+            self.message_bar.pushMessage(
+                title="Info",
+                text=f"Cancelled: opened {self.n_added} of {len(self.paths)} IDF file(s)",
+                level=Qgis.Info,
+            )
+
+
+def start_conversion_task(task: IdfConversionTask) -> None:
+    """
+    Show the progress of the task in the message bar, with a button to cancel
+    it, and hand it to the QGIS task manager.
+    """
+    message = task.message_bar.createMessage(task.description())
+    progress_bar = QProgressBar()
+    progress_bar.setMaximum(100)
+    cancel_button = QPushButton("Cancel")
+    cancel_button.clicked.connect(task.cancel)
+    message.layout().addWidget(progress_bar)
+    message.layout().addWidget(cancel_button)
+    item = task.message_bar.pushWidget(message, Qgis.Info)
+
+    task.progressChanged.connect(lambda progress: progress_bar.setValue(int(progress)))
+    task.taskCompleted.connect(lambda: task.message_bar.popWidget(item))
+    task.taskTerminated.connect(lambda: task.message_bar.popWidget(item))
+
+    RUNNING_TASKS.add(task)
+    QgsApplication.taskManager().addTask(task)
@@ -7,7 +7,9 @@ from pathlib import Path
 import numpy as np
 from PyQt5.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QDialog,
+    QDoubleSpinBox,
     QFileDialog,
     QHBoxLayout,
     QLabel,
@@ -17,16 +19,13 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from qgis.core import (
-    Qgis,
-    QgsMapLayerProxyModel,
-    QgsProject,
-    QgsRasterLayer,
-)
+from qgis.core import Qgis, QgsMapLayerProxyModel, QgsMapLayerType
 from qgis.gui import QgsCrsSelectionWidget, QgsMapLayerComboBox
 
-from imodqgis.idf.conversion import convert_gdal_to_idf, convert_idf_to_gdal
-from imodqgis.idf.layer_styling import pseudocolor_renderer
+from imodqgis.idf.catalog import filter_catalog, scan_idf_directory
+from imodqgis.idf.conversion import convert_gdal_to_idf
+from imodqgis.idf.conversion_task import IdfConversionTask, start_conversion_task
+from imodqgis.idf.series import convert_gdal_to_idf_series, export_mesh_to_idf_series
 
 
 class OpenWidget(QWidget):
@@ -38,6 +37,18 @@ class OpenWidget(QWidget):
         self.line_edit.setMinimumWidth(250)
         self.dialog_button = QPushButton("...")
         self.dialog_button.clicked.connect(self.file_dialog)
+        self.directory_button = QPushButton("Directory...")
+        self.directory_button.setToolTip(
+            "Select the IDF files of a directory by variable, time, and layer"
+        )
+        self.directory_button.clicked.connect(self.directory_dialog)
+        self.catalog = []
+        self.name_combo = QComboBox()
+        self.time_combo = QComboBox()
+        self.layer_combo = QComboBox()
+        for combo in (self.name_combo, self.time_combo, self.layer_combo):
+            combo.currentIndexChanged.connect(self.on_filter_changed)
+            combo.setEnabled(False)
         self.close_button = QPushButton("Close")
         self.add_button = QPushButton("Add")
         self.add_button.clicked.connect(self.add_idfs)
@@ -47,20 +58,55 @@ class OpenWidget(QWidget):
         self.add_button.setEnabled(False)
         self.crs_widget = QgsCrsSelectionWidget(self)
         self.crs_widget.setCrs(iface.mapCanvas().mapSettings().destinationCrs())
+        self.in_place_checkbox = QCheckBox("Open in place (no GeoTIFF copy)")
+        self.in_place_checkbox.setToolTip(
+            "Write a small VRT file next to the IDF which lets QGIS read the IDF "
+            "directly. If unchecked, or if the VRT cannot be opened, a GeoTIFF "
+            "copy of the IDF is written instead."
+        )
+        self.in_place_checkbox.setChecked(True)
+        self.compress_checkbox = QCheckBox("Compress GeoTIFF")
+        self.compress_checkbox.setChecked(True)
+        self.overviews_checkbox = QCheckBox("Build GeoTIFF overviews")
+        self.overviews_checkbox.setToolTip(
+            "Overviews speed up rendering of large rasters when zoomed out"
+        )
+        self.overviews_checkbox.setChecked(True)
+        self.combine_checkbox = QCheckBox("Combine into one layer")
+        self.combine_checkbox.setToolTip(
+            "Add the IDF files as the bands of a single layer, ordered by "
+            "variable, time, and layer. The IDF files must share their grid."
+        )
+        self.combine_checkbox.toggled.connect(self.on_combine_toggled)
         first_row = QHBoxLayout()
         first_row.addWidget(self.label)
         first_row.addWidget(self.line_edit)
         first_row.addWidget(self.dialog_button)
+        first_row.addWidget(self.directory_button)
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(QLabel("Variable"))
+        filter_row.addWidget(self.name_combo)
+        filter_row.addWidget(QLabel("Time"))
+        filter_row.addWidget(self.time_combo)
+        filter_row.addWidget(QLabel("Layer"))
+        filter_row.addWidget(self.layer_combo)
         second_row = QHBoxLayout()
         second_row.addWidget(self.crs_widget)
         third_row = QHBoxLayout()
-        third_row.addStretch()
-        third_row.addWidget(self.close_button)
-        third_row.addWidget(self.add_button)
+        third_row.addWidget(self.in_place_checkbox)
+        third_row.addWidget(self.compress_checkbox)
+        third_row.addWidget(self.overviews_checkbox)
+        third_row.addWidget(self.combine_checkbox)
+        fourth_row = QHBoxLayout()
+        fourth_row.addStretch()
+        fourth_row.addWidget(self.close_button)
+        fourth_row.addWidget(self.add_button)
         layout = QVBoxLayout()
         layout.addLayout(first_row)
+        layout.addLayout(filter_row)
         layout.addLayout(second_row)
         layout.addLayout(third_row)
+        layout.addLayout(fourth_row)
         self.setLayout(layout)
 
     def file_dialog(self) -> None:
@@ -73,6 +119,50 @@ class OpenWidget(QWidget):
             self.line_edit.setText(" ".join(f'"{p}"' for p in paths))
         return
 
+    def directory_dialog(self) -> None:
+        directory = QFileDialog.getExistingDirectory(self, "Select directory")
+        # directory is empty string if cancel is clicked
+        if directory == "":
+            return
+        self.catalog = scan_idf_directory(directory)
+        # The combo boxes hold the value to filter on as item data; None
+        # selects all.
+        for combo, key in (
+            (self.name_combo, "name"),
+            (self.time_combo, "time"),
+            (self.layer_combo, "layer"),
+        ):
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("All", None)
+            values = {entry[key] for entry in self.catalog} - {None}
+            for value in sorted(values):
+                combo.addItem(str(value), value)
+            combo.setEnabled(len(self.catalog) > 0)
+            combo.blockSignals(False)
+        self.on_filter_changed()
+        return
+
+    def on_filter_changed(self) -> None:
+        entries = filter_catalog(
+            self.catalog,
+            name=self.name_combo.currentData(),
+            time=self.time_combo.currentData(),
+            layer=self.layer_combo.currentData(),
+        )
+        self.line_edit.setText(" ".join(f'"{entry["path"]}"' for entry in entries))
+        return
+
+    def on_combine_toggled(self, checked: bool) -> None:
+        # A combined layer always refers to the IDF files in place.
+        for checkbox in (
+            self.in_place_checkbox,
+            self.compress_checkbox,
+            self.overviews_checkbox,
+        ):
+            checkbox.setEnabled(not checked)
+        return
+
     def add_idfs(self) -> None:
         text = self.line_edit.text()
         paths = list(reversed(shlex.split(text, posix="/" in text)))
@@ -81,13 +171,16 @@ class OpenWidget(QWidget):
             return
         crs_wkt = self.crs_widget.crs().toWkt()
 
-        for path in paths:
-            tiff_path = convert_idf_to_gdal(path, crs_wkt)
-            layer = QgsRasterLayer(str(tiff_path), tiff_path.stem)
-            renderer = pseudocolor_renderer(layer, band=1, colormap="Turbo", nclass=10)
-            layer.setRenderer(renderer)
-            QgsProject.instance().addMapLayer(layer)
-
+        task = IdfConversionTask(
+            paths=paths,
+            crs_wkt=crs_wkt,
+            in_place=self.in_place_checkbox.isChecked(),
+            compress=self.compress_checkbox.isChecked(),
+            overviews=self.overviews_checkbox.isChecked(),
+            message_bar=self.parent.message_bar,
+            combine=self.combine_checkbox.isChecked(),
+        )
+        start_conversion_task(task)
         return
 
 
@@ -96,7 +189,9 @@ class ExportWidget(QWidget):
         super().__init__()
         self.parent = parent
         self.raster_layer = QgsMapLayerComboBox()
-        self.raster_layer.setFilters(QgsMapLayerProxyModel.RasterLayer)
+        self.raster_layer.setFilters(
+            QgsMapLayerProxyModel.RasterLayer | QgsMapLayerProxyModel.MeshLayer
+        )
         self.raster_layer.layerChanged.connect(self.on_layer_changed)
         self.label = QLabel("Export to IDF file")
         self.line_edit = QLineEdit()
@@ -104,6 +199,12 @@ class ExportWidget(QWidget):
         self.dialog_button = QPushButton("...")
         self.dialog_button.clicked.connect(self.file_dialog)
         self.double_precision_checkbox = QCheckBox("Double Precision")
+        self.series_checkbox = QCheckBox("Export every band as a layer")
+        self.cellsize_label = QLabel("Cell size")
+        self.cellsize_spinbox = QDoubleSpinBox()
+        self.cellsize_spinbox.setRange(0.001, 1.0e6)
+        self.cellsize_spinbox.setDecimals(3)
+        self.cellsize_spinbox.setValue(25.0)
         self.close_button = QPushButton("Close")
         self.export_button = QPushButton("Export")
         self.export_button.clicked.connect(self.export_layer)
@@ -117,6 +218,9 @@ class ExportWidget(QWidget):
         first_row.addWidget(self.raster_layer)
         second_row = QHBoxLayout()
         second_row.addWidget(self.double_precision_checkbox)
+        second_row.addWidget(self.series_checkbox)
+        second_row.addWidget(self.cellsize_label)
+        second_row.addWidget(self.cellsize_spinbox)
         third_row = QHBoxLayout()
         third_row.addWidget(self.label)
         third_row.addWidget(self.line_edit)
@@ -147,6 +251,11 @@ class ExportWidget(QWidget):
         layer = self.raster_layer.currentLayer()
         if layer is None:  # If no raster layers in project
             return
+        is_mesh = layer.type() == QgsMapLayerType.MeshLayer
+        # A mesh is always exported as a series: one IDF per dataset.
+        self.series_checkbox.setVisible(not is_mesh)
+        self.cellsize_label.setVisible(is_mesh)
+        self.cellsize_spinbox.setVisible(is_mesh)
         path = Path(layer.dataProvider().dataSourceUri())
         idf_path = (path.parent / (path.name)).with_suffix(".idf")
         self.line_edit.setText(str(idf_path))
@@ -158,13 +267,38 @@ class ExportWidget(QWidget):
             dtype = np.float64
         else:
             dtype = np.float32
-        idf_path = self.line_edit.text()
-        gdal_path = layer.dataProvider().dataSourceUri()
-        convert_gdal_to_idf(gdal_path, idf_path, dtype)
+        idf_path = Path(self.line_edit.text())
+        try:
+            if layer.type() == QgsMapLayerType.MeshLayer:
+                idf_paths = export_mesh_to_idf_series(
+                    layer, idf_path.parent, dtype, self.cellsize_spinbox.value()
+                )
+            elif self.series_checkbox.isChecked():
+                idf_paths = convert_gdal_to_idf_series(
+                    layer.dataProvider().dataSourceUri(),
+                    idf_path.parent,
+                    idf_path.stem,
+                    dtype,
+                )
+            else:
+                convert_gdal_to_idf(
+                    layer.dataProvider().dataSourceUri(), idf_path, dtype
+                )
+                idf_paths = [idf_path]
+        except ValueError as e:
+            self.parent.message_bar.pushMessage(
+                title="Error",
+                text=str(e),
+                level=Qgis.Critical,
+            )
+            return
 
         self.parent.message_bar.pushMessage(
             title="Info",
-            text=f"Exported {layer.name()} to {idf_path}",
+            text=(
+                f"Exported {layer.name()} to {len(idf_paths)} IDF file(s) "
+                f"in {idf_path.parent}"
+            ),
             level=Qgis.Info,
         )
         return
@@ -0,0 +1,222 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Export of multi-band rasters and mesh datasets to a series of IDF files,
+following the iMOD naming convention: ``{name}_{yyyymmdd}_l{layer}.idf``.
+"""
+
+import math
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from qgis.core import (
+    QgsMeshDatasetIndex,
+    QgsMeshLayer,
+    QgsMeshUtils,
+    QgsProject,
+    QgsRasterBlock,
+    QgsRectangle,
+)
+
+from imodqgis.idf.conversion import IDF_NODATA, ReadOnlyRaster, write, write_band
+from imodqgis.utils.layers import NO_LAYERS, get_group_names, groupby_variable
+
+
+def idf_series_name(
+    name: str, time: Optional[datetime] = None, layer: Optional[int] = None
+) -> str:
+    """
+    Create an IDF filename following the iMOD naming convention.
+
+    Parameters
+    ----------
+    name: str
+    time: datetime, optional
+        Written as yyyymmdd, or as yyyymmddhhmmss if time is not midnight.
+    layer: int, optional
+
+    Returns
+    -------
+    filename: str
+    """
+    parts = [name]
+    if time is not None:
+        if (time.hour, time.minute, time.second) == (0, 0, 0):
+            parts.append(time.strftime("%Y%m%d"))
+        else:
+            parts.append(time.strftime("%Y%m%d%H%M%S"))
+    if layer is not None:
+        parts.append(f"l{layer}")
+    return "_".join(parts) + ".idf"
+
+
+def convert_gdal_to_idf_series(
+    path: str,
+    directory: str,
+    name: str,
+    dtype,
+    max_workers: Optional[int] = None,
+) -> List[Path]:
+    """
+    Write every band of a GDAL supported raster file to an IDF file. The band
+    number is used as the layer number.
+
+    The bands are written concurrently. They share the opened raster: reading
+    is serialized, conversion and writing are not.
+
+    Parameters
+    ----------
+    path: str
+        Path to the GDAL raster file.
+    directory: str
+        Directory in which the IDF files are created.
+    name: str
+        Name of the IDF files, to which the layer number is appended.
+    dtype: np.float32 or np.float64
+        Data type of the output IDF files.
+    max_workers: int, optional
+        Maximum number of threads.
+
+    Returns
+    -------
+    idf_paths: list of pathlib.Path
+    """
+    directory = Path(directory)
+    lock = threading.Lock()
+    with ReadOnlyRaster(path) as raster:
+        idf_paths = [
+            directory / idf_series_name(name, layer=band)
+            for band in range(1, raster.nband + 1)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(write_band, raster, band, idf_path, dtype, lock)
+                for band, idf_path in enumerate(idf_paths, start=1)
+            ]
+            for future in futures:
+                future.result()
+    return idf_paths
+
+
+def mesh_dataset_times(
+    layer: QgsMeshLayer, group_index: int
+) -> List[Optional[datetime]]:
+    """
+    Times of the datasets in a mesh dataset group. A group that is not
+    temporal has a single dataset, without time.
+    """
+    metadata = layer.datasetGroupMetadata(QgsMeshDatasetIndex(group_index, 0))
+    if not metadata.isTemporal():
+        return [None]
+    provider = layer.dataProvider()
+    reference_time = layer.temporalProperties().referenceTime().toPyDateTime()
+    # metadata.time() returns a floating point value: hours since the
+    # reference time.
+    return [
+        reference_time
+        + timedelta(
+            hours=provider.datasetMetadata(QgsMeshDatasetIndex(group_index, i)).time()
+        )
+        for i in range(provider.datasetCount(group_index))
+    ]
+
+
+def raster_block_values(block: QgsRasterBlock) -> np.ndarray:
+    values = np.frombuffer(bytes(block.data()), dtype=np.float64)
+    values = values.reshape((block.height(), block.width())).copy()
+    if block.hasNoDataValue():
+        values[values == block.noDataValue()] = IDF_NODATA
+    values[np.isnan(values)] = IDF_NODATA
+    return values
+
+
+def export_mesh_to_idf_series(
+    layer: QgsMeshLayer,
+    directory: str,
+    dtype,
+    cellsize: float,
+    max_workers: Optional[int] = None,
+) -> List[Path]:
+    """
+    Rasterize every dataset of every dataset group of a mesh layer and write it
+    to an IDF file. Dataset groups named ``{variable}_layer_{number}`` are
+    written as ``{variable}_{yyyymmdd}_l{number}.idf``.
+
+    Rasterizing is done by QGIS on the calling thread, the IDF files are
+    written concurrently. Rasterizing waits while max_workers blocks are
+    pending, so that only a few blocks are held in memory at once.
+
+    Parameters
+    ----------
+    layer: QgsMeshLayer
+    directory: str
+        Directory in which the IDF files are created.
+    dtype: np.float32 or np.float64
+        Data type of the output IDF files.
+    cellsize: float
+        Cell size of the IDF files.
+    max_workers: int, optional
+        Maximum number of threads.
+
+    Returns
+    -------
+    idf_paths: list of pathlib.Path
+    """
+    directory = Path(directory)
+    extent = layer.extent()
+    ncol = math.ceil(extent.width() / cellsize)
+    nrow = math.ceil(extent.height() / cellsize)
+    xmin = extent.xMinimum()
+    xmax = xmin + ncol * cellsize
+    ymax = extent.yMaximum()
+    ymin = ymax - nrow * cellsize
+    grid_extent = QgsRectangle(xmin, ymin, xmax, ymax)
+    spatial_reference = (cellsize, xmin, xmax, -cellsize, ymin, ymax)
+    transform_context = QgsProject.instance().transformContext()
+
+    if max_workers is None:
+        # The default of ThreadPoolExecutor.
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+    indexes, names = get_group_names(layer)
+    idf_paths = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for variable, layer_indexes in groupby_variable(names, indexes).items():
+            for layer_number, group_index in layer_indexes.items():
+                number = None if layer_number == NO_LAYERS[0] else int(layer_number)
+                times = mesh_dataset_times(layer, group_index)
+                for i, time in enumerate(times):
+                    if len(pending) >= max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    block = QgsMeshUtils.exportRasterBlock(
+                        layer,
+                        QgsMeshDatasetIndex(group_index, i),
+                        layer.crs(),
+                        transform_context,
+                        cellsize,
+                        grid_extent,
+                    )
+                    idf_path = directory / idf_series_name(variable, time, number)
+                    pending.add(
+                        executor.submit(
+                            write,
+                            idf_path,
+                            raster_block_values(block),
+                            spatial_reference,
+                            IDF_NODATA,
+                            dtype,
+                        )
+                    )
+                    idf_paths.append(idf_path)
+        for future in pending:
+            future.result()
+    return idf_paths
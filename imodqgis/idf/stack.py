@@ -0,0 +1,130 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Assemble a set of IDF files sharing a grid, for example the heads of every
+layer and time step of a model run, into a single multi-band VRT.
+
+The bands refer to the IDF files in place. Every band carries the variable
+name, time, and layer parsed from the IDF filename as metadata, so that the
+set can be shown as one QGIS layer.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from osgeo import gdal
+
+from imodqgis.idf import cache
+from imodqgis.idf.catalog import parse_idf_name
+from imodqgis.idf.conversion import IdfFile, idf_vrt_band, write_vrt
+
+# Keys of the band metadata items.
+NAME_KEY = "IMOD_NAME"
+TIME_KEY = "IMOD_TIME"
+LAYER_KEY = "IMOD_LAYER"
+
+
+def grid_definition(idf: IdfFile) -> Tuple:
+    return (idf.nrow, idf.ncol, idf.xmin, idf.ymax, idf.dx, idf.dy)
+
+
+def sort_key(parsed: Dict) -> Tuple:
+    # Sort by variable, then time, then layer. Missing times and layers
+    # (steady-state, or a single layer) come first.
+    return (
+        parsed["name"].lower(),
+        parsed["time"] or "",
+        -1 if parsed["layer"] is None else parsed["layer"],
+    )
+
+
+def stack_name(paths: List[str], crs_wkt: str) -> str:
+    """
+    Name of the stack: the variable name, if shared by all IDFs, followed by
+    a key of the IDFs and the CRS. A stack of another selection of IDFs in the
+    same directory, which may be in use by a layer, is never overwritten.
+    """
+    names = {parse_idf_name(path)["name"].lower() for path in paths}
+    prefix = f"{names.pop()}_stack" if len(names) == 1 else "idf_stack"
+    resolved = sorted(os.path.normcase(Path(path).resolve()) for path in paths)
+    key = hashlib.sha1("\n".join([*resolved, crs_wkt]).encode("utf-8"))
+    return f"{prefix}_{key.hexdigest()[:8]}"
+
+
+def convert_idfs_to_vrt(
+    paths: List[str], crs_wkt: str, name: Optional[str] = None
+) -> Path:
+    """
+    Write a GDAL VRT with one band per IDF, referring to the values of the
+    IDFs directly. The bands are ordered by variable name, time, and layer.
+
+    The VRT is written next to the first IDF, or in the IDF cache directory if
+    that directory is not writable.
+
+    Parameters
+    ----------
+    paths: list of str
+        Paths to the IDF files. They must be equidistant and share the same
+        grid.
+    crs_wkt: str
+        Desired CRS to write in the created VRT.
+    name: str, optional
+        Filename of the VRT, without suffix. Defaults to the variable name of
+        the IDFs followed by "_stack", and a key of the paths and CRS, see
+        ``stack_name``.
+
+    Returns
+    -------
+    vrt_path: pathlib.Path
+    """
+    if len(paths) == 0:
+        raise ValueError("At least one IDF file is required")
+    parsed = sorted(
+        ({"path": Path(path), **parse_idf_name(path)} for path in paths), key=sort_key
+    )
+    if name is None:
+        name = stack_name(paths, crs_wkt)
+    vrt_path = cache.raster_path(parsed[0]["path"].parent / name, ".vrt")
+
+    bands = []
+    first = None
+    for band, entry in enumerate(parsed, start=1):
+        with IdfFile(entry["path"]) as idf:
+            if not idf.equidistant:
+                raise ValueError(f"Non-equidistant IDF cannot be stacked: {idf.path}")
+            if first is None:
+                first = idf
+            elif grid_definition(idf) != grid_definition(first):
+                raise ValueError(
+                    f"Grid of {idf.path} differs from the grid of {first.path}"
+                )
+            element = idf_vrt_band(idf, band, vrt_path)
+        ElementTree.SubElement(element, "Description").text = entry["path"].stem
+        metadata = ElementTree.SubElement(element, "Metadata")
+        for key, value in (
+            (NAME_KEY, entry["name"]),
+            (TIME_KEY, entry["time"]),
+            (LAYER_KEY, entry["layer"]),
+        ):
+            if value is not None:
+                ElementTree.SubElement(metadata, "MDI", key=key).text = str(value)
+        bands.append(element)
+
+    write_vrt(vrt_path, first, crs_wkt, bands)
+    return vrt_path
+
+
+def read_band_times(vrt_path: Path) -> List[Optional[datetime]]:
+    """Time of every band of a VRT written by ``convert_idfs_to_vrt``."""
+    dataset = gdal.Open(str(vrt_path))
+    times = []
+    for band in range(1, dataset.RasterCount + 1):
+        time = dataset.GetRasterBand(band).GetMetadataItem(TIME_KEY)
+        times.append(None if time is None else datetime.fromisoformat(time))
+    dataset = None
+    return times
@@ -157,5 +157,8 @@ class ImodPlugin:
         from imodqgis import cross_section, ipf, nhi_data, timeseries, utils, viewer, widgets  # noqa
 
     def unload(self):
+        if self.timeseries_widget is not None:
+            # Hiding the widget stops its background reading.
+            self.timeseries_widget.close()
         del self.toolbar
         # self.toolbar.deleteLater()
@@ -8,6 +8,8 @@ from imodqgis.ipf.reading import (
     read_associated_header,
     read_associated_timeseries,
     read_ipf_header,
+    write_associated,
+    write_ipf,
 )
 
 __all__ = [
@@ -17,4 +19,6 @@ __all__ = [
     "read_associated_header",
     "read_associated_timeseries",
     "read_ipf_header",
+    "write_associated",
+    "write_ipf",
 ]
\ No newline at end of file
@@ -0,0 +1,246 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Index of the associated files of an IPF.
+
+An IPF may refer to tens of thousands of associated files. Their summaries
+(see ``read_associated_summary``) are persisted in the plugin settings
+directory, so that an IPF only has to be scanned fully once.
+
+Optionally, the associated files can be consolidated into a columnar store, see
+``consolidate_associated``.
+"""
+
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from imodqgis.ipf.reading import (
+    IpfType,
+    read_associated_borehole,
+    read_associated_header,
+    read_associated_summary,
+    read_associated_timeseries,
+)
+from imodqgis.ipf.store import open_store, store_lock, write_store
+from imodqgis.utils.index import is_current, read_index, stamp, write_index
+
+INDEX_KIND = "ipf-associated"
+# Increment when the entries change, to discard existing indexes.
+INDEX_VERSION = 1
+# Number of associated files read when opening an IPF lazily.
+SAMPLE_SIZE = 25
+
+
+def associated_filename(name: str, ext: str) -> str:
+    return f"{name}.{ext}"
+
+
+def read_associated_index(ipf_path: pathlib.Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the persisted index of the associated files of an IPF, without
+    checking whether it is still up to date.
+    """
+    return read_index(pathlib.Path(ipf_path), INDEX_KIND, INDEX_VERSION)
+
+
+def summarize_file(
+    path: pathlib.Path, previous: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], bool]:
+    """Summary of an associated file, and whether it had to be read."""
+    stat = os.stat(path)
+    if previous is not None and is_current(previous, stat):
+        return previous, False
+    return stamp(read_associated_summary(path), stat), True
+
+
+def scan_associated(
+    ipf_path: pathlib.Path,
+    names: Iterable[str],
+    ext: str,
+    max_workers: Optional[int] = None,
+    is_canceled: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Summarize the associated files of an IPF, and persist the summaries.
+
+    Only files which have been added or changed since the previous scan are
+    read. Statting and reading is done concurrently. Files which are missing
+    or cannot be read get None as their summary; they are read again by the
+    next scan.
+
+    Parameters
+    ----------
+    ipf_path: pathlib.Path
+    names: iterable of str
+        Values of the index column of the IPF.
+    ext: str
+        Extension of the associated files.
+    max_workers: int, optional
+        Maximum number of threads.
+    is_canceled: callable, optional
+        Called regularly; the scan stops, and the index is not updated, once
+        it returns True.
+
+    Returns
+    -------
+    entries: dict
+        Summary per associated filename, None for files which could not be
+        read. Empty if the scan was canceled.
+    """
+    ipf_path = pathlib.Path(ipf_path)
+    previous = read_associated_index(ipf_path)
+    filenames = list(dict.fromkeys(associated_filename(name, ext) for name in names))
+
+    entries = {}
+    n_read = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                summarize_file, ipf_path.parent / filename, previous.get(filename)
+            )
+            for filename in filenames
+        ]
+        for filename, future in zip(filenames, futures):
+            if is_canceled is not None and is_canceled():
+                for pending in futures:
+                    pending.cancel()
+                return {}
+            try:
+                entries[filename], was_read = future.result()
+            except Exception:  # Missing or not a valid associated file
+                entries[filename], was_read = None, True
+            n_read += was_read
+
+    if n_read > 0 or len(entries) != len(previous):
+        write_index(ipf_path, INDEX_KIND, INDEX_VERSION, entries)
+    return entries
+
+
+def sample_associated(
+    ipf_path: pathlib.Path, names: List[str], ext: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Summaries of the associated files of an IPF, from the persisted index if
+    available. Otherwise, a sample of at most SAMPLE_SIZE files, spread over
+    the IPF, is read.
+
+    Returns
+    -------
+    entries: dict
+        Summary per associated filename, None for files which could not be
+        read.
+    """
+    index = read_associated_index(ipf_path)
+    filenames = list(dict.fromkeys(associated_filename(name, ext) for name in names))
+    if all(filename in index for filename in filenames):
+        return {filename: index[filename] for filename in filenames}
+    step = max(1, len(filenames) // SAMPLE_SIZE)
+    directory = pathlib.Path(ipf_path).parent
+    entries = {}
+    for filename in filenames[::step][:SAMPLE_SIZE]:
+        try:
+            entries[filename] = read_associated_summary(directory / filename)
+        except Exception:  # Missing or not a valid associated file
+            entries[filename] = None
+    return entries
+
+
+def summarize(
+    entries: Iterable[Optional[Dict[str, Any]]],
+) -> Tuple[IpfType, List[str]]:
+    """
+    Type of the associated files, and the union of their columns (excluding
+    depth or datetime), in order of appearance. Files which could not be read
+    are skipped.
+    """
+    itype = None
+    columns = {}
+    for entry in entries:
+        if entry is None:
+            continue
+        if itype is None:
+            itype = IpfType(entry["itype"])
+        columns.update(dict.fromkeys(entry["columns"]))
+    return itype, list(columns)
+
+
+def read_associated(
+    path: pathlib.Path,
+) -> Optional[Tuple[int, pd.DataFrame, os.stat_result]]:
+    """
+    Read an associated file of any type, for ``write_store``. Returns None if
+    the file is missing or cannot be read.
+    """
+    try:
+        stat = os.stat(path)
+        with open(path) as f:
+            itype = read_associated_header(f)[0]
+        if itype == IpfType.TIMESERIES:
+            df = read_associated_timeseries(path)
+        else:
+            df = read_associated_borehole(path)
+    except Exception:  # Missing or not a valid associated file
+        return None
+    return int(itype), df, stat
+
+
+def consolidate_associated(
+    ipf_path: pathlib.Path,
+    names: Iterable[str],
+    ext: str,
+    max_workers: Optional[int] = None,
+) -> pathlib.Path:
+    """
+    Consolidate the associated files of an IPF into the columnar store of its
+    directory (see ``imodqgis.ipf.store``). Associated files of other IPFs in
+    the same directory which were stored before, and have not changed, are
+    kept. Associated files which cannot be read are not stored.
+
+    Parameters
+    ----------
+    ipf_path: pathlib.Path
+    names: iterable of str
+        Values of the index column of the IPF.
+    ext: str
+        Extension of the associated files.
+    max_workers: int, optional
+        Maximum number of threads.
+
+    Returns
+    -------
+    store_path: pathlib.Path
+    """
+    directory = pathlib.Path(ipf_path).parent
+    filenames = list(dict.fromkeys(associated_filename(name, ext) for name in names))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            read_associated, [directory / filename for filename in filenames]
+        )
+        frames = {
+            filename: result
+            for filename, result in zip(filenames, results)
+            if result is not None
+        }
+
+    # Other IPFs in the directory may be consolidated at the same time: hold
+    # the lock of the store while merging its entries, and writing it.
+    with store_lock(directory):
+        store = open_store(directory)
+        if store is not None:
+            for filename, entry in store.entries.items():
+                if filename in frames:
+                    continue
+                try:
+                    stat = os.stat(directory / filename)
+                    if is_current(entry, stat):
+                        df = store.read(filename)
+                        frames[filename] = (entry["itype"], df, stat)
+                except (OSError, ValueError):  # Removed, or not stored properly
+                    continue
+        return write_store(directory, frames)
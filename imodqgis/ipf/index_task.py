@@ -0,0 +1,137 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Background scan of the associated files of an IPF layer.
+
+When an IPF is opened lazily, its type and associated columns are determined
+from a sample of its associated files. This task scans all of them, updates
+the persisted index, and completes the associated columns and the datetime
+attributes of the layer. Optionally, it consolidates the associated files into
+the columnar store of their directory.
+"""
+
+import pathlib
+from typing import Any, Dict, List, Optional
+
+from PyQt5.QtCore import QDateTime, Qt
+from qgis.core import Qgis, QgsApplication, QgsMessageLog, QgsProject, QgsTask
+
+from imodqgis.ipf.index import (
+    associated_filename,
+    consolidate_associated,
+    scan_associated,
+    summarize,
+)
+from imodqgis.ipf.reading import IpfType
+
+# Python holds the only reference to a task while it runs: keep them here so
+# they are not garbage collected before they have finished.
+RUNNING_TASKS = set()
+
+
+def to_qdatetime(value: Optional[str]) -> Optional[QDateTime]:
+    """Convert an ISO format datetime string of an index entry."""
+    if value is None:
+        return None
+    return QDateTime.fromString(value, Qt.ISODate)
+
+
+def time_attributes(entry: Optional[Dict[str, Any]]) -> list:
+    """Values of the datetime_start and datetime_end attributes."""
+    if entry is None:
+        return [None, None]
+    return [to_qdatetime(entry["start"]), to_qdatetime(entry["end"])]
+
+
+class AssociatedScanTask(QgsTask):
+    def __init__(
+        self,
+        layer_id: str,
+        ipf_path: str,
+        names: List[str],
+        ext: str,
+        consolidate: bool = False,
+    ):
+        super().__init__(f"Index {pathlib.Path(ipf_path).name}", QgsTask.CanCancel)
+        self.layer_id = layer_id
+        self.ipf_path = pathlib.Path(ipf_path)
+        self.names = names
+        self.ext = ext
+        self.consolidate = consolidate
+        self.entries = {}
+        self.exception = None
+
+    def run(self) -> bool:
+        try:
+            self.entries = scan_associated(
+                self.ipf_path, self.names, self.ext, is_canceled=self.isCanceled
+            )
+            if self.consolidate and not self.isCanceled():
+                consolidate_associated(self.ipf_path, self.names, self.ext)
+        except Exception as e:
+            self.exception = e
+            return False
+        return not self.isCanceled()
+
+    def finished(self, result: bool) -> None:
+        RUNNING_TASKS.discard(self)
+        if self.exception is not None:
+            QgsMessageLog.logMessage(
+                f"Error indexing {self.ipf_path}: {self.exception}",
+                "iMOD",
+                Qgis.Warning,
+            )
+        missing = [name for name, entry in self.entries.items() if entry is None]
+        if len(missing) > 0:
+            QgsMessageLog.logMessage(
+                f"Could not read {len(missing)} associated file(s) of "
+                f"{self.ipf_path}, e.g. {missing[0]}",
+                "iMOD",
+                Qgis.Warning,
+            )
+        # The layer may have been removed in the meantime.
+        layer = QgsProject.instance().mapLayer(self.layer_id)
+        if not result or layer is None:
+            return
+        ipf_type, columns = summarize(self.entries.values())
+        # use an ASCII record separator: ␞
+        layer.setCustomProperty("ipf_assoc_columns", "␞".join(columns))
+        if ipf_type == IpfType.TIMESERIES:
+            self.update_time_attributes(layer)
+
+    def update_time_attributes(self, layer) -> None:
+        """Store the start and end datetime of all associated files."""
+        indexcol = int(layer.customProperty("ipf_indexcolumn"))
+        start = layer.fields().indexOf("datetime_start")
+        end = layer.fields().indexOf("datetime_end")
+        changes = {}
+        for feature in layer.getFeatures():
+            filename = associated_filename(str(feature.attribute(indexcol)), self.ext)
+            values = time_attributes(self.entries.get(filename))
+            changes[feature.id()] = {start: values[0], end: values[1]}
+        layer.dataProvider().changeAttributeValues(changes)
+        layer.triggerRepaint()
+
+
+def start_associated_scan(layer, consolidate: bool = False) -> None:
+    """
+    Scan the associated files of an IPF layer, created by ``read_ipf``, in the
+    background. The layer must have been added to the project.
+
+    If consolidate is True, the associated files are also consolidated into
+    the columnar store of their directory, see ``consolidate_associated``.
+    """
+    if layer.customProperty("ipf_type") is None:  # No associated files
+        return
+    indexcol = int(layer.customProperty("ipf_indexcolumn"))
+    names = [str(feature.attribute(indexcol)) for feature in layer.getFeatures()]
+    task = AssociatedScanTask(
+        layer.id(),
+        layer.customProperty("ipf_path"),
+        names,
+        layer.customProperty("ipf_assoc_ext"),
+        consolidate,
+    )
+    RUNNING_TASKS.add(task)
+    QgsApplication.taskManager().addTask(task)
@@ -1,12 +1,16 @@
 # Copyright © 2021 Deltares
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
-import csv
+import os
 import pathlib
 import shlex
+from typing import Optional
 
-from PyQt5.QtCore import QDateTime, QVariant
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QVariant
 from PyQt5.QtWidgets import (
+    QCheckBox,
     QDialog,
     QFileDialog,
     QHBoxLayout,
@@ -16,87 +20,56 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
 )
 from qgis.core import (
-    QgsExpression,
+    Qgis,
+    QgsFeature,
     QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsMessageLog,
+    QgsPointXY,
     QgsProject,
+    QgsProviderRegistry,
+    QgsVectorFileWriter,
     QgsVectorLayer,
     QgsVectorLayerTemporalProperties,
     qgsfunction,
 )
 
-from imodqgis.ipf.reading import IpfType, read_associated_header, read_ipf_header
+from imodqgis.ipf.index import (
+    associated_filename,
+    sample_associated,
+    scan_associated,
+    summarize,
+)
+from imodqgis.ipf.index_task import (
+    start_associated_scan,
+    time_attributes,
+    to_qdatetime,
+)
+from imodqgis.ipf.reading import IpfType, read_associated_summary, read_ipf_header
+from imodqgis.ipf.reading import read_ipf as read_ipf_dataframe
 
 
+# Deprecated: IPF layers store datetime_start and datetime_end as attributes.
+# These expression functions are only registered so that the expression fields
+# of projects saved by earlier versions still evaluate.
 @qgsfunction(args="auto", group="Custom", usesGeometry=False)
 def ipf_datetime_start(indexcol, ext, pathparent, feature, parent):
-    filename = feature.attribute(indexcol)
-    path = f"{pathparent}/{filename}.{ext}"
-    with open(path) as f:
-        f.readline()  # nrow
-        line = f.readline()
-        try:
-            # csv.reader parse one line
-            # this catches commas in quotes
-            ncol, itype = map(int, map(str.strip, next(csv.reader([line]))))
-        # itype can be implicit, in which case it's a timeseries
-        except ValueError:
-            ncol = int(line.strip())
-            itype = 1
-        if itype != 1:
-            raise ValueError("Not a timeseries IPF")
-
-        # Skip the column names, jump to the start of the data
-        for _ in range(ncol):
-            f.readline()
-        line = f.readline()
-
-    datetime = line.split(",")[0].strip()
-    length = len(datetime)
-    if length == 14:
-        return QDateTime.fromString(datetime, "yyyyMMddhhmmss")
-    elif length == 8:
-        return QDateTime.fromString(datetime, "yyyyMMdd")
-    else:
-        raise ValueError(f"{path}: datetime format must be yyyymmddhhmmss or yyyymmdd")
+    path = f"{pathparent}/{feature.attribute(indexcol)}.{ext}"
+    return to_qdatetime(read_associated_summary(path)["start"])
 
 
 @qgsfunction(args="auto", group="Custom", usesGeometry=False)
 def ipf_datetime_end(indexcol, ext, pathparent, feature, parent):
-    filename = feature.attribute(indexcol)
-    path = f"{pathparent}/{filename}.{ext}"
-    with open(path, "rb") as f:
-        f.seek(-2, 2)
-        while f.read(1) != b"\n":
-            f.seek(-2, 1)
-        line = f.read().decode("utf-8")
-    datetime = line.split(",")[0].strip()
-    length = len(datetime)
-    if length == 14:
-        return QDateTime.fromString(datetime, "yyyyMMddhhmmss")
-    elif length == 8:
-        return QDateTime.fromString(datetime, "yyyyMMdd")
-    else:
-        raise ValueError(f"{path}: datetime format must be yyyymmddhhmmss or yyyymmdd")
-
-
-def set_timeseries_windows(
-    layer: QgsVectorLayer,
-    indexcol: int,
-    ext: str,
-    pathparent: str,
-) -> None:
-    QgsExpression.registerFunction(ipf_datetime_start)
-    QgsExpression.registerFunction(ipf_datetime_end)
-    # DO NOT USE DOUBLE QUOTES INSIDE THE EXPRESSION
-    layer.addExpressionField(
-        f"ipf_datetime_start({indexcol}, '{ext}', '{pathparent}')",
-        (QgsField("datetime_start", QVariant.DateTime)),
-    )
-    layer.addExpressionField(
-        f"ipf_datetime_end({indexcol}, '{ext}', '{pathparent}')",
-        (QgsField("datetime_end", QVariant.DateTime)),
-    )
-    # Set the temporal properties
+    path = f"{pathparent}/{feature.attribute(indexcol)}.{ext}"
+    return to_qdatetime(read_associated_summary(path)["end"])
+
+
+def set_timeseries_windows(layer: QgsVectorLayer) -> None:
+    """
+    Let the temporal controller show a feature while its timeseries has data,
+    as stored in the datetime_start and datetime_end attributes.
+    """
     temporal_properties = layer.temporalProperties()
     temporal_properties.setStartField("datetime_start")
     temporal_properties.setEndField("datetime_end")
@@ -106,45 +79,146 @@ def set_timeseries_windows(
     temporal_properties.setIsActive(True)
 
 
-def read_ipf(path: str) -> QgsVectorLayer:
-    path = pathlib.Path(path)
-    _, ncol, colnames, indexcol, ext = read_ipf_header(path)
-
-    skip_lines = 2 + ncol + 1
-    # See: https://qgis.org/pyqgis/master/core/QgsVectorLayer.html
-    uri = "&".join(
-        [
-            f"file:///{str(path.as_posix())}?encoding=UTF-8",
-            "delimiter=,",
-            "type=csv",
-            "xField=field_1",
-            "yField=field_2",
-            f"skipLines={skip_lines}",
-            "useHeader=no",
-            "trimFields=yes",
-            "geomType=point",
-        ]
+def field_type(dtype: np.dtype) -> QVariant.Type:
+    if pd.api.types.is_bool_dtype(dtype):
+        return QVariant.Bool
+    elif pd.api.types.is_integer_dtype(dtype):
+        return QVariant.LongLong
+    elif pd.api.types.is_float_dtype(dtype):
+        return QVariant.Double
+    else:
+        return QVariant.String
+
+
+def write_geopackage(layer: QgsVectorLayer, gpkg_path: pathlib.Path) -> QgsVectorLayer:
+    """
+    Write a layer to a GeoPackage, with a spatial index, and open it. Custom
+    and temporal properties are not copied.
+    """
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = "GPKG"
+    options.layerName = layer.name()
+    options.layerOptions = ["SPATIAL_INDEX=YES"]
+    error, message, _, _ = QgsVectorFileWriter.writeAsVectorFormatV3(
+        layer, str(gpkg_path), QgsProject.instance().transformContext(), options
     )
-    layer = QgsVectorLayer(uri, path.stem, "delimitedtext")
-    # Set column names
-    for i, name in enumerate(colnames):
-        layer.setFieldAlias(i, name)
+    if error != QgsVectorFileWriter.NoError:
+        raise OSError(f"Could not write {gpkg_path}: {message}")
+    return QgsVectorLayer(f"{gpkg_path}|layername={layer.name()}", layer.name(), "ogr")
+
+
+def geopackage_path(path: pathlib.Path) -> Optional[pathlib.Path]:
+    """
+    GeoPackage to write the points of an IPF to: next to the IPF, numbered if
+    that GeoPackage is in use by a layer of the project. Returns None if the
+    directory of the IPF is not writable.
+    """
+    path = pathlib.Path(path)
+    if not os.access(path.parent, os.W_OK):
+        return None
+    registry = QgsProviderRegistry.instance()
+    in_use = set()
+    for layer in QgsProject.instance().mapLayers().values():
+        source = registry.decodeUri(layer.providerType(), layer.source()).get("path")
+        if source:
+            in_use.add(os.path.normcase(os.path.abspath(source)))
+
+    gpkg_path = path.with_suffix(".gpkg")
+    number = 0
+    while os.path.normcase(os.path.abspath(gpkg_path)) in in_use:
+        number += 1
+        gpkg_path = path.with_name(f"{path.stem}-{number}.gpkg")
+    return gpkg_path
 
+
+def read_ipf(
+    path: str, lazy: bool = False, gpkg_path: Optional[str] = None
+) -> QgsVectorLayer:
+    """
+    Read an IPF file into a memory layer, or a GeoPackage.
+
+    The IPF is parsed with pandas; the field types follow from the parsed
+    columns. The memory layer is spatially indexed.
+
+    For timeseries, the start and end datetime of every associated file are
+    stored as the datetime_start and datetime_end attributes, so that they do
+    not have to be read again while animating the temporal controller.
+
+    Parameters
+    ----------
+    path: str
+    lazy: bool, default False
+        If True, the type and columns of the associated files are determined
+        from the persisted index of the IPF, or from a sample of them if the
+        IPF has not been indexed before; datetimes which are not yet known are
+        left empty. Use ``start_associated_scan`` to complete them in the
+        background. If False, all associated files are scanned.
+    gpkg_path: str, optional
+        If provided, the layer is written to this GeoPackage, with a spatial
+        index, and the GeoPackage layer is returned. Note that a memory layer
+        is not kept when the project is saved.
+
+    Returns
+    -------
+    layer: QgsVectorLayer
+    """
+    path = pathlib.Path(path)
+    _, _, colnames, indexcol, _ = read_ipf_header(path)
+    df, ext = read_ipf_dataframe(path)
+
+    ipf_type = None
+    entries = {}
     if indexcol >= 2:  # x:0, y:1
-        assoc_columns = set()
-        for feature in layer.getFeatures():
-            filename = feature.attribute(indexcol)
-            assoc_path = path.parent.joinpath(f"{filename}.{ext}")
-            with open(assoc_path) as f:
-                ipf_type, _, _, colnames, _ = read_associated_header(f)
-            # Skip the first column, it's always depth or datetime
-            assoc_columns.update(colnames[1:])
-
-        if ipf_type == IpfType.TIMESERIES:
-            set_timeseries_windows(layer, indexcol, ext, path.parent.as_posix())
+        names = df.iloc[:, indexcol].astype(str).tolist()
+        if lazy:
+            entries = sample_associated(path, names, ext)
+        else:
+            entries = scan_associated(path, names, ext)
+        ipf_type, assoc_columns = summarize(entries.values())
+
+    fields = QgsFields()
+    for name, dtype in zip(colnames, df.dtypes):
+        fields.append(QgsField(name, field_type(dtype)))
+    is_timeseries = ipf_type == IpfType.TIMESERIES
+    if is_timeseries:
+        fields.append(QgsField("datetime_start", QVariant.DateTime))
+        fields.append(QgsField("datetime_end", QVariant.DateTime))
+
+    layer = QgsVectorLayer("Point", path.stem, "memory")
+    provider = layer.dataProvider()
+    provider.addAttributes(fields.toList())
+    layer.updateFields()
+
+    # Python native values, with None for missing values.
+    rows = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    x = df.iloc[:, 0].to_numpy(dtype=np.float64)
+    y = df.iloc[:, 1].to_numpy(dtype=np.float64)
+    features = []
+    for xx, yy, attributes in zip(x, y, rows):
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(xx, yy)))
+        if is_timeseries:
+            filename = associated_filename(str(attributes[indexcol]), ext)
+            attributes = attributes + time_attributes(entries.get(filename))
+        feature.setAttributes(attributes)
+        features.append(feature)
+    provider.addFeatures(features)
+    provider.createSpatialIndex()
+    layer.updateExtents()
+
+    if gpkg_path is not None:
+        layer = write_geopackage(layer, pathlib.Path(gpkg_path))
+
+    if ipf_type is not None:
+        if is_timeseries:
+            set_timeseries_windows(layer)
 
         layer.setCustomProperty("ipf_type", ipf_type.name)
-        layer.setCustomProperty("ipf_indexcolumn", indexcol)
+        # Refer to the index column of the layer, which differs from the IPF
+        # index column if the layer has other fields, e.g. a GeoPackage fid.
+        layer.setCustomProperty(
+            "ipf_indexcolumn", layer.fields().indexOf(colnames[indexcol])
+        )
         layer.setCustomProperty("ipf_assoc_ext", ext)
         layer.setCustomProperty("ipf_path", str(path))
         # use an ASCII record separator: ␞
@@ -171,17 +245,34 @@ class ImodIpfDialog(QDialog):
             lambda: self.add_button.setEnabled(self.line_edit != "")
         )
         self.add_button.setEnabled(False)
+        self.geopackage_checkbox = QCheckBox("Save as GeoPackage")
+        self.geopackage_checkbox.setToolTip(
+            "Write the points to a GeoPackage next to the IPF, so that they are "
+            "kept when the project is saved. The GeoPackage is overwritten if it "
+            "exists, unless a layer uses it: a numbered GeoPackage is written "
+            "then. If the directory of the IPF is not writable, or if this is "
+            "unchecked, the points are kept in memory instead."
+        )
+        self.consolidate_checkbox = QCheckBox("Consolidate associated files")
+        self.consolidate_checkbox.setToolTip(
+            "Store the data of all associated files in a single columnar store "
+            "next to them, so that they can be read without parsing text."
+        )
         first_row = QHBoxLayout()
         first_row.addWidget(self.label)
         first_row.addWidget(self.line_edit)
         first_row.addWidget(self.dialog_button)
         second_row = QHBoxLayout()
-        second_row.addStretch()
-        second_row.addWidget(self.close_button)
-        second_row.addWidget(self.add_button)
+        second_row.addWidget(self.geopackage_checkbox)
+        second_row.addWidget(self.consolidate_checkbox)
+        third_row = QHBoxLayout()
+        third_row.addStretch()
+        third_row.addWidget(self.close_button)
+        third_row.addWidget(self.add_button)
         layout = QVBoxLayout()
         layout.addLayout(first_row)
         layout.addLayout(second_row)
+        layout.addLayout(third_row)
         self.setLayout(layout)
 
     def file_dialog(self) -> None:
@@ -197,5 +288,18 @@ class ImodIpfDialog(QDialog):
         text = self.line_edit.text()
         paths = shlex.split(text, posix="/" in text)
         for path in paths:
-            layer = read_ipf(path)
+            gpkg_path = None
+            if self.geopackage_checkbox.isChecked():
+                gpkg_path = geopackage_path(path)
+            try:
+                layer = read_ipf(path, lazy=True, gpkg_path=gpkg_path)
+            except OSError as e:
+                # E.g. the GeoPackage is locked by another program.
+                if gpkg_path is None:
+                    raise
+                QgsMessageLog.logMessage(
+                    f"{e}: keeping the points in memory", "iMOD", Qgis.Warning
+                )
+                layer = read_ipf(path, lazy=True)
             QgsProject.instance().addMapLayer(layer)
+            start_associated_scan(layer, self.consolidate_checkbox.isChecked())
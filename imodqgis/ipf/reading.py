@@ -3,13 +3,19 @@
 #
 import csv
 import io
+import os
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from enum import IntEnum
-from typing import Any, List, TextIO, Tuple
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
 import numpy as np
 import pandas as pd
 
+from imodqgis.ipf.store import read_stored
+from imodqgis.utils.dataframe_cache import cached_reader
+
 
 class IpfType(IntEnum):
     TIMESERIES = 1
@@ -108,6 +114,121 @@ def read_associated_header(
     return itype, nrow, usecols, colnames, na_values
 
 
+def parse_ipf_datetime(value: str) -> datetime:
+    """Parse an IPF datetime: yyyymmdd or yyyymmddhhmmss."""
+    value = value.strip().strip("'").strip('"')
+    if len(value) == 14:
+        return datetime.strptime(value, "%Y%m%d%H%M%S")
+    elif len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+    else:
+        raise ValueError("datetime format must be yyyymmddhhmmss or yyyymmdd")
+
+
+def decode_ipf_datetimes(
+    values: np.ndarray, name: Optional[str] = None
+) -> pd.DatetimeIndex:
+    """
+    Decode IPF datetimes stored as integers: yyyymmdd or yyyymmddhhmmss. The
+    format is determined per value, so both may occur in a single file.
+
+    The components are split off with integer arithmetic, and assembled with
+    NumPy datetime arithmetic, which is much faster than parsing strings.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    is_date = (values >= 10**7) & (values < 10**8)
+    is_datetime = (values >= 10**13) & (values < 10**14)
+    if not (is_date | is_datetime).all():
+        raise ValueError("datetime format must be yyyymmddhhmmss or yyyymmdd")
+    date, clock = np.divmod(np.where(is_date, values * 10**6, values), 10**6)
+    year, monthday = np.divmod(date, 10**4)
+    month, day = np.divmod(monthday, 100)
+    hour, minutesecond = np.divmod(clock, 10**4)
+    minute, second = np.divmod(minutesecond, 100)
+
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    days = months.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    # Out of range days roll over into the next month.
+    valid = (
+        (month >= 1)
+        & (month <= 12)
+        & (day >= 1)
+        & (days.astype("datetime64[M]") == months)
+        & (hour < 24)
+        & (minute < 60)
+        & (second < 60)
+    )
+    if not valid.all():
+        invalid = values[~valid][0]
+        raise ValueError(f"invalid datetime: {invalid}")
+    seconds = hour * 3600 + minute * 60 + second
+    times = days.astype("datetime64[ns]") + seconds.astype("timedelta64[s]")
+    return pd.DatetimeIndex(times, name=name)
+
+
+def first_field(line: str) -> str:
+    # Associated files may be comma or whitespace separated.
+    return line.replace(",", " ").split()[0]
+
+
+def read_last_line(path: pathlib.Path, nbytes: int = 1024) -> str:
+    """Read the last non-empty line of a file, reading only its tail."""
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        while True:
+            f.seek(max(0, size - nbytes))
+            lines = f.read().splitlines()
+            # The first line may be incomplete, unless the whole file is read.
+            complete = lines if nbytes >= size else lines[1:]
+            nonempty = [line for line in complete if line.strip()]
+            if nonempty or nbytes >= size:
+                break
+            nbytes *= 2
+    if not nonempty:
+        raise ValueError(f"{path.name}: file is empty")
+    return nonempty[-1].decode("utf-8")
+
+
+def read_associated_summary(path: str) -> Dict[str, Any]:
+    """
+    Summarize an IPF associated file, without reading its data block: only
+    the header, and for timeseries the first and last line.
+
+    Parameters
+    ----------
+    path : pathlib.Path or str
+        Path to associated file.
+
+    Returns
+    -------
+    summary: dict
+        With keys "itype" (int), "nrow", "columns" (the column names, excluding
+        the first: depth or datetime), and for timeseries "start" and "end" (ISO
+        format strings, None for boreholes).
+    """
+    path = pathlib.Path(path)
+    start: Optional[str] = None
+    end: Optional[str] = None
+    with open(path) as f:
+        itype, nrow, _, colnames, _ = read_associated_header(f)
+        if itype == IpfType.TIMESERIES and nrow > 0:
+            line = f.readline()
+    if itype == IpfType.TIMESERIES and nrow > 0:
+        try:
+            start = parse_ipf_datetime(first_field(line)).isoformat()
+            end = parse_ipf_datetime(first_field(read_last_line(path))).isoformat()
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"{path.name}: {e}")
+    return {
+        "itype": int(itype),
+        "nrow": nrow,
+        "columns": [str(name) for name in colnames[1:]],
+        "start": start,
+        "end": end,
+    }
+
+
+@cached_reader
 def read_associated_timeseries(path: str, **kwargs) -> pd.DataFrame:
     """
     Read an IPF associated timeseries file (TXT), itype=1.
@@ -118,7 +239,10 @@ def read_associated_timeseries(path: str, **kwargs) -> pd.DataFrame:
         Path to associated file.
     kwargs : dict
         Dictionary containing the ``pandas.read_csv()`` keyword arguments for the
-        associated (TXT) file (e.g. `{"delim_whitespace": True}`).
+        associated (TXT) file (e.g. `{"delim_whitespace": True}`). Without keyword
+        arguments, the result is cached (see ``DATAFRAME_CACHE``), and read from
+        the consolidated store of the directory if available (see
+        ``consolidate_associated``).
 
     Returns
     -------
@@ -128,6 +252,12 @@ def read_associated_timeseries(path: str, **kwargs) -> pd.DataFrame:
     # deal with e.g. incorrect capitalization
     path = pathlib.Path(path).resolve()
 
+    # Use the consolidated store of the directory, if available.
+    if not kwargs:
+        df = read_stored(path, IpfType.TIMESERIES)
+        if df is not None:
+            return df
+
     with open(path) as f:
         itype, nrow, usecols, colnames, na_values = read_associated_header(f)
         if itype != IpfType.TIMESERIES:
@@ -141,25 +271,20 @@ def read_associated_timeseries(path: str, **kwargs) -> pd.DataFrame:
             "nrows": nrow,
             "na_values": na_values,
             "skipinitialspace": True,
-            "dtype": {colnames[0]: str},  # yyyymmdd or yyyymmddhhmmss
+            "dtype": {colnames[0]: np.int64},  # yyyymmdd or yyyymmddhhmmss
         }
         itype_kwargs.update(kwargs)
         df = pd.read_csv(f, **itype_kwargs)
 
-        time_column = colnames[0]
-        len_date = len(df[time_column].iloc[0])
-        if len_date == 14:
-            df.index = pd.to_datetime(df[time_column], format="%Y%m%d%H%M%S")
-        elif len_date == 8:
-            df.index = pd.to_datetime(df[time_column], format="%Y%m%d")
-        else:
-            raise ValueError(
-                f"{path.name}: datetime format must be yyyymmddhhmmss or yyyymmdd"
-            )
-
+    time_column = colnames[0]
+    try:
+        df.index = decode_ipf_datetimes(df[time_column].to_numpy(), name=time_column)
+    except ValueError as e:
+        raise ValueError(f"{path.name}: {e}")
     return df
 
 
+@cached_reader
 def read_associated_borehole(path: str, **kwargs) -> pd.DataFrame:
     """
     Read an IPF associated borehole file (TXT), itype=2.
@@ -170,7 +295,10 @@ def read_associated_borehole(path: str, **kwargs) -> pd.DataFrame:
         Path to associated file.
     kwargs : dict
         Dictionary containing the ``pandas.read_csv()`` keyword arguments for the
-        associated (TXT) file (e.g. `{"delim_whitespace": True}`).
+        associated (TXT) file (e.g. `{"delim_whitespace": True}`). Without keyword
+        arguments, the result is cached (see ``DATAFRAME_CACHE``), and read from
+        the consolidated store of the directory if available (see
+        ``consolidate_associated``).
 
     Returns
     -------
@@ -180,6 +308,12 @@ def read_associated_borehole(path: str, **kwargs) -> pd.DataFrame:
     # deal with e.g. incorrect capitalization
     path = pathlib.Path(path).resolve()
 
+    # Use the consolidated store of the directory, if available.
+    if not kwargs:
+        df = read_stored(path, IpfType.BOREHOLE)
+        if df is not None:
+            return df
+
     with open(path) as f:
         itype, nrow, usecols, colnames, na_values = read_associated_header(f)
         if itype != IpfType.BOREHOLE:
@@ -199,3 +333,150 @@ def read_associated_borehole(path: str, **kwargs) -> pd.DataFrame:
         df = pd.read_csv(f, **itype_kwargs)
 
     return df
+
+
+# Buffer size of the files written, in bytes.
+WRITE_BUFFER_SIZE = 1024**2
+
+
+def encode_ipf_datetimes(times: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Encode datetimes as IPF integers: yyyymmdd if all datetimes are at
+    midnight, yyyymmddhhmmss otherwise. The inverse of
+    ``decode_ipf_datetimes``.
+    """
+    values = times.to_numpy(dtype="datetime64[s]")
+    days = values.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    year = months.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months).astype(np.int64) + 1
+    date = year * 10**4 + month * 100 + day
+    seconds = (values - days).astype(np.int64)
+    if (seconds == 0).all():
+        return date
+    hour, minutesecond = np.divmod(seconds, 3600)
+    minute, second = np.divmod(minutesecond, 60)
+    return date * 10**6 + hour * 10**4 + minute * 100 + second
+
+
+def write_values(f: TextIO, df: pd.DataFrame, nodata: Optional[float] = None) -> None:
+    # Strings are quoted, so that they may contain separators; the nodata
+    # value is not. Missing values are written as empty fields if nodata is
+    # None. Lines are terminated by os.linesep, like the lines written by
+    # pandas.
+    if nodata is not None:
+        df = df.fillna(nodata)
+    df.to_csv(
+        f,
+        header=False,
+        index=False,
+        quoting=csv.QUOTE_NONNUMERIC,
+    )
+
+
+def write_associated(path: str, df: pd.DataFrame, nodata: float = 1.0e20) -> None:
+    """
+    Write an IPF associated file (TXT).
+
+    A DataFrame with a DatetimeIndex, as returned by
+    ``read_associated_timeseries``, is written as a timeseries (itype=1): the
+    index is written as the first column, named after the index. A column
+    with the same name is replaced, unless it holds the datetimes of the index
+    as IPF integers. Other DataFrames are written as borehole
+    (itype=2), with the depth or top of layer as the first column, as returned
+    by ``read_associated_borehole``.
+
+    Parameters
+    ----------
+    path : pathlib.Path or str
+        Path to associated file.
+    df : pandas.DataFrame
+    nodata : float, default 1.0e20
+        Written for missing values, and as the nodata value of every column.
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        itype = IpfType.TIMESERIES
+        time_column = "time" if df.index.name is None else df.index.name
+        times = encode_ipf_datetimes(df.index)
+        if time_column in df.columns:
+            # Keep the original format if the index has not been modified.
+            original = df[time_column].to_numpy()
+            if np.issubdtype(original.dtype, np.integer) and np.array_equal(
+                decode_ipf_datetimes(original).to_numpy(), df.index.to_numpy()
+            ):
+                times = original
+        values = df.drop(columns=time_column, errors="ignore")
+        values.insert(0, time_column, times)
+    else:
+        itype = IpfType.BOREHOLE
+        values = df
+
+    with open(path, "w", newline="", buffering=WRITE_BUFFER_SIZE) as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        f.write(f"{len(values)}{os.linesep}")
+        writer.writerow([values.shape[1], int(itype)])
+        writer.writerows([name, nodata] for name in values.columns)
+        write_values(f, values, nodata)
+
+
+def write_ipf(
+    path: str,
+    df: pd.DataFrame,
+    associated: Optional[Dict[str, pd.DataFrame]] = None,
+    ext: str = "txt",
+    nodata: float = 1.0e20,
+    max_workers: Optional[int] = None,
+) -> None:
+    """
+    Write one pandas.DataFrame to an IPF file, and optionally its associated
+    files.
+
+    The columns follow the conventions of ``read_ipf``: the first two columns
+    hold the x and y coordinates, and the associated files are referred to by
+    the column named "indexcolumn", if present.
+
+    Parameters
+    ----------
+    path: pathlib.Path or str
+    df: pandas.DataFrame
+    associated: dict of pandas.DataFrame, optional
+        DataFrames of the associated files, by value of the index column; see
+        ``write_associated``. The associated files are written next to the
+        IPF, concurrently.
+    ext: str, default "txt"
+        Extension of the associated files.
+    nodata: float, default 1.0e20
+        Written for missing values of the associated files.
+    max_workers: int, optional
+        Maximum number of threads writing associated files.
+    """
+    path = pathlib.Path(path)
+    columns = list(df.columns)
+    if "indexcolumn" in columns:
+        indexcol = columns.index("indexcolumn") + 1  # IPFs are 1-based
+    elif associated:
+        raise ValueError(
+            'An "indexcolumn" column is required to write associated files'
+        )
+    else:
+        indexcol = 0
+
+    with open(path, "w", newline="", buffering=WRITE_BUFFER_SIZE) as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerows([[len(df)], [len(columns)]])
+        writer.writerows([name] for name in columns)
+        writer.writerow([indexcol, ext])
+        # IPFs have no nodata value: missing attributes are left empty.
+        write_values(f, df)
+
+    if associated:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    write_associated, path.parent / f"{name}.{ext}", frame, nodata
+                )
+                for name, frame in associated.items()
+            ]
+            for future in futures:
+                future.result()
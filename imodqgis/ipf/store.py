@@ -0,0 +1,302 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Columnar store of the associated files in a directory.
+
+Parsing thousands of small text files dominates reading the associated data of
+an IPF. The store consolidates the parsed associated files of a directory into
+one NumPy file per column, with an index of the rows of every file. The column
+files are memory-mapped: reading an associated file from the store is a slice
+of every column, without any text parsing.
+
+The store is located in the STORE_DIRNAME directory, next to the associated
+files. It only serves files which have not changed since they were stored;
+``read_associated_timeseries`` and ``read_associated_borehole`` use it when
+available. See ``consolidate_associated`` to create it.
+"""
+
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from imodqgis.utils.index import is_current, stamp
+
+STORE_DIRNAME = ".imod-associated"
+# Increment when the format changes, to ignore existing stores.
+STORE_VERSION = 1
+# Name of the column holding the datetime index of timeseries.
+INDEX_COLUMN = "__index__"
+
+# Opened stores, by directory
+_STORES = {}
+# Locks serializing the writes of a store, by directory
+_WRITE_LOCKS = {}
+_STORES_LOCK = threading.Lock()
+
+
+def store_directory(directory: pathlib.Path) -> pathlib.Path:
+    return pathlib.Path(directory) / STORE_DIRNAME
+
+
+def store_lock(directory: pathlib.Path) -> threading.RLock:
+    """
+    Lock of the store of a directory. Hold it while reading the store in order
+    to write an updated store, see ``consolidate_associated``.
+    """
+    key = str(pathlib.Path(directory))
+    with _STORES_LOCK:
+        return _WRITE_LOCKS.setdefault(key, threading.RLock())
+
+
+def generation_of(filename: str) -> Optional[int]:
+    """Generation of a column file of the store."""
+    try:
+        return int(filename.split("-")[0])
+    except ValueError:
+        return None
+
+
+class AssociatedStore:
+    def __init__(self, directory: pathlib.Path, index: Dict[str, Any], mtime_ns: int):
+        self.directory = store_directory(directory)
+        self.index = index
+        self.mtime_ns = mtime_ns
+        self.names = [column["name"] for column in index["columns"]]
+        self.arrays = {}
+        self.lock = threading.Lock()
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return self.index["entries"]
+
+    def array(self, column: int) -> np.ndarray:
+        """Memory-map the column, on first use."""
+        with self.lock:
+            if column not in self.arrays:
+                filename = self.index["columns"][column]["file"]
+                self.arrays[column] = np.load(
+                    self.directory / filename, mmap_mode="r", allow_pickle=False
+                )
+            return self.arrays[column]
+
+    def values(self, column: int, start: int, stop: int, dtype: str) -> np.ndarray:
+        # Copy the slice, so that the file is not kept open by the result.
+        values = np.array(self.array(column)[start:stop])
+        if dtype == "object":
+            values = values.astype(object)
+            values[values == ""] = np.nan
+            return values
+        if values.dtype.kind == "U":
+            # The column holds strings in other files; missing values are
+            # stored as empty strings.
+            values = np.where(values == "", "nan", values)
+        return values.astype(dtype)
+
+    def read(self, filename: str) -> pd.DataFrame:
+        """Read the DataFrame of a stored associated file."""
+        entry = self.entries[filename]
+        start = entry["offset"]
+        stop = start + entry["nrow"]
+        data = {
+            self.names[column]: self.values(column, start, stop, dtype)
+            for column, dtype in zip(entry["columns"], entry["dtypes"])
+        }
+        df = pd.DataFrame(data, columns=[self.names[c] for c in entry["columns"]])
+        if entry["datetime_index"]:
+            index = self.names.index(INDEX_COLUMN)
+            df.index = pd.DatetimeIndex(
+                self.values(index, start, stop, "datetime64[ns]"),
+                name=self.names[entry["columns"][0]],
+            )
+        return df
+
+
+def open_store(directory: pathlib.Path) -> Optional[AssociatedStore]:
+    """
+    Open the store of a directory. Returns None if there is no store, or if it
+    was written with a different version.
+    """
+    directory = pathlib.Path(directory)
+    index_path = store_directory(directory) / "index.json"
+    try:
+        mtime_ns = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return None
+
+    key = str(directory)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is not None and store.mtime_ns == mtime_ns:
+            return store
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != STORE_VERSION:
+            return None
+        store = AssociatedStore(directory, index, mtime_ns)
+        _STORES[key] = store
+        return store
+
+
+def read_stored(path: pathlib.Path, itype: int) -> Optional[pd.DataFrame]:
+    """
+    Read an associated file from the store of its directory. Returns None if
+    the file is not stored, or has changed since it was stored.
+    """
+    path = pathlib.Path(path)
+    store = open_store(path.parent)
+    if store is None:
+        return None
+    entry = store.entries.get(path.name)
+    if entry is None or entry["itype"] != itype:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if not is_current(entry, stat):
+        return None
+    try:
+        return store.read(path.name)
+    except (OSError, ValueError):
+        # E.g. the columns have been removed by another write of the store.
+        # The caller parses the associated file instead.
+        return None
+
+
+def missing(name: str, n: int) -> np.ndarray:
+    if name == INDEX_COLUMN:
+        # Never read: only files with a datetime index read the index column.
+        return np.zeros(n, dtype=np.int64)
+    return np.full(n, np.nan)
+
+
+def column_array(name: str, values: List[Tuple[np.ndarray, bool]]) -> np.ndarray:
+    """
+    Concatenate the values of a column of all files. Columns containing
+    strings are stored as fixed-width unicode, with missing values as empty
+    strings; other columns as floats.
+    """
+    if name == INDEX_COLUMN:
+        return np.concatenate([v for v, _ in values]).view("datetime64[ns]")
+    if any(is_object for _, is_object in values):
+        parts = [np.where(pd.isna(v), "", v.astype(str)).astype(str) for v, _ in values]
+        return np.concatenate(parts).astype(str)
+    return np.concatenate([v.astype(np.float64) for v, _ in values])
+
+
+def write_store(
+    directory: pathlib.Path,
+    frames: Dict[str, Tuple[int, pd.DataFrame, os.stat_result]],
+) -> pathlib.Path:
+    """
+    Write the store of a directory, replacing an existing store. Writes of the
+    store of a directory are serialized by ``store_lock``.
+
+    Parameters
+    ----------
+    directory: pathlib.Path
+        Directory of the associated files.
+    frames: dict
+        Per associated filename: the itype, the DataFrame as returned by the
+        associated file readers, and the stat of the associated file.
+
+    Returns
+    -------
+    store_path: pathlib.Path
+    """
+    directory = pathlib.Path(directory)
+    with store_lock(directory):
+        return _write_store(directory, frames)
+
+
+def _write_store(
+    directory: pathlib.Path,
+    frames: Dict[str, Tuple[int, pd.DataFrame, os.stat_result]],
+) -> pathlib.Path:
+    store_path = store_directory(directory)
+    store_path.mkdir(exist_ok=True)
+
+    names = []
+    columns = {}  # column name -> list of (values, is_object), with fills
+    entries = {}
+    offset = 0
+    for filename, (itype, df, stat) in frames.items():
+        nrow = len(df)
+        datetime_index = isinstance(df.index, pd.DatetimeIndex)
+        data = {name: df[name].to_numpy() for name in df.columns}
+        if datetime_index:
+            data[INDEX_COLUMN] = df.index.to_numpy(dtype="datetime64[ns]")
+        for name in data:
+            if name not in columns:
+                # Fill the rows of the preceding files.
+                names.append(name)
+                columns[name] = [(missing(name, offset), False)]
+        for name, column in columns.items():
+            if name in data:
+                values = data[name]
+                if name == INDEX_COLUMN:
+                    values = values.view(np.int64)
+                column.append((values, values.dtype == object))
+            else:
+                column.append((missing(name, nrow), False))
+        entries[filename] = stamp(
+            {
+                "itype": int(itype),
+                "offset": offset,
+                "nrow": nrow,
+                "columns": [names.index(name) for name in df.columns],
+                "dtypes": [str(df[name].dtype) for name in df.columns],
+                "datetime_index": datetime_index,
+            },
+            stat,
+        )
+        offset += nrow
+
+    # Use new filenames, so that a store which is still memory-mapped is not
+    # overwritten.
+    generation = time.time_ns()
+    index_columns = []
+    for i, name in enumerate(names):
+        values = column_array(name, columns[name])
+        filename = f"{generation}-{i}.npy"
+        np.save(store_path / filename, values, allow_pickle=False)
+        index_columns.append({"name": name, "file": filename})
+
+    index_path = store_path / "index.json"
+    with tempfile.NamedTemporaryFile(
+        "w", dir=store_path, suffix=".tmp", delete=False
+    ) as f:
+        json.dump(
+            {"version": STORE_VERSION, "columns": index_columns, "entries": entries},
+            f,
+        )
+    with _STORES_LOCK:
+        _STORES.pop(str(directory), None)
+    try:
+        os.replace(f.name, index_path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+    # Remove the columns of previous stores; never those of a newer store
+    # written by another process. They cannot be removed while they are
+    # memory-mapped on Windows; they are removed on the next write.
+    for path in store_path.glob("*.npy"):
+        previous = generation_of(path.name)
+        if previous is not None and previous < generation:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    return store_path
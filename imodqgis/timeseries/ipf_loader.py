@@ -0,0 +1,113 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Concurrent reading of the associated timeseries of selected IPF points.
+
+Reading hundreds of associated files one after the other blocks the GUI for
+many seconds. The loader reads them on a thread pool instead, and emits every
+timeseries as soon as it has been read, so that the plot can be updated while
+the remaining files are still being read.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from qgis.core import Qgis, QgsFeatureRequest, QgsMessageLog
+
+from imodqgis.ipf.index import associated_filename
+from imodqgis.ipf.reading import read_associated_timeseries
+
+
+def selected_associated_paths(layer, feature_ids: List[int]) -> Dict[str, str]:
+    """
+    Paths of the associated files of the selected points of an IPF layer, by
+    value of the index column. The attributes are fetched with a single
+    feature request, without geometries.
+    """
+    index = int(layer.customProperty("ipf_indexcolumn"))
+    ext = layer.customProperty("ipf_assoc_ext")
+    parent = Path(layer.customProperty("ipf_path")).parent
+    request = (
+        QgsFeatureRequest()
+        .setFilterFids(feature_ids)
+        .setSubsetOfAttributes([index])
+        .setFlags(QgsFeatureRequest.NoGeometry)
+    )
+    names = sorted(
+        str(feature.attribute(index)) for feature in layer.getFeatures(request)
+    )
+    return {name: str(parent / associated_filename(name, ext)) for name in names}
+
+
+class AssociatedTimeseriesLoader(QObject):
+    """
+    Reads associated timeseries on a thread pool.
+
+    Every call to ``load`` starts a new generation, and cancels the previous
+    one: files which have not been read yet are skipped, and results of the
+    previous generation which are still emitted should be ignored by
+    comparing their generation with ``generation``.
+
+    The thread pool is started on the first call to ``load``; call
+    ``shutdown`` to stop it when the loader is no longer used.
+    """
+
+    # generation, name, dataframe. Emitted from the worker threads; connected
+    # slots of objects living in the GUI thread are called in the GUI thread.
+    loaded = pyqtSignal(int, str, object)
+
+    def __init__(self, parent=None, max_workers: Optional[int] = None):
+        QObject.__init__(self, parent)
+        self.max_workers = max_workers
+        self.executor = None
+        self.generation = 0
+        self.futures = []
+
+    def cancel(self) -> None:
+        self.generation += 1
+        for future in self.futures:
+            future.cancel()
+        self.futures = []
+
+    def shutdown(self) -> None:
+        """Cancel reading, and stop the thread pool without waiting for it."""
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def load(self, paths: Dict[str, str]) -> int:
+        """
+        Read the associated files in the background.
+
+        Parameters
+        ----------
+        paths: dict
+            Path of the associated file, by name.
+
+        Returns
+        -------
+        generation: int
+        """
+        self.cancel()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        generation = self.generation
+        self.futures = [
+            self.executor.submit(self.read, generation, name, path)
+            for name, path in paths.items()
+        ]
+        return generation
+
+    def read(self, generation: int, name: str, path: str) -> None:
+        if generation != self.generation:
+            return
+        try:
+            dataframe = read_associated_timeseries(path)
+        except Exception as e:
+            QgsMessageLog.logMessage(f"Error reading {path}: {e}", "iMOD", Qgis.Warning)
+            return
+        self.loaded.emit(generation, name, dataframe)
@@ -14,6 +14,7 @@ from itertools import compress
 
 import numpy as np
 import pandas as pd
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import (
     QCheckBox,
@@ -37,12 +38,16 @@ from qgis.core import (
 )
 from qgis.gui import QgsColorButton, QgsMapLayerComboBox
 
-from imodqgis.arrow import read_arrow
+from imodqgis.arrow import read_arrow_timeseries
 from imodqgis.dependencies import pyqtgraph_0_12_3 as pg
 from imodqgis.dependencies.pyqtgraph_0_12_3.GraphicsScene.exportDialog import (
     ExportDialog,
 )
-from imodqgis.ipf import IpfType, read_associated_timeseries
+from imodqgis.ipf import IpfType
+from imodqgis.timeseries.ipf_loader import (
+    AssociatedTimeseriesLoader,
+    selected_associated_paths,
+)
 from imodqgis.utils.layers import get_group_names, groupby_variable
 from imodqgis.utils.temporal import get_group_is_temporal, is_temporal_meshlayer
 from imodqgis.widgets import (
@@ -53,6 +58,8 @@ from imodqgis.widgets import (
 )
 
 PYQT_DELETED_ERROR = "wrapped C/C++ object of type QgsVectorLayer has been deleted"
+# Timeseries which arrive within this interval (ms) are plotted in one go.
+REDRAW_INTERVAL = 100
 
 
 def timeseries_x_data(layer, group_index):
@@ -269,6 +276,14 @@ class ImodTimeSeriesWidget(QWidget):
         self.selected = (None, None, None)
         self.variables_indexes = None
 
+        # Associated IPF timeseries are read in the background
+        self.ipf_loader = AssociatedTimeseriesLoader(self)
+        self.ipf_loader.loaded.connect(self.on_ipf_loaded)
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(REDRAW_INTERVAL)
+        self.redraw_timer.timeout.connect(self.plot_dataframes)
+
         # Initialize stored layer
         self.previous_layer = None
 
@@ -296,6 +311,8 @@ class ImodTimeSeriesWidget(QWidget):
         self.iface.actionPan().trigger()
 
         self.clear()
+        # The thread pool is started again when timeseries are loaded.
+        self.ipf_loader.shutdown()
 
         # Explicitly disconnect signal
         layer = self.layer_selection.currentLayer()
@@ -329,6 +346,7 @@ class ImodTimeSeriesWidget(QWidget):
         self.selected = (None, None, None)
 
     def clear(self):
+        self.ipf_loader.cancel()
         self.feature_ids = None
         self.dataframes = {}
         self.stored_dataframes = {}
@@ -412,6 +430,7 @@ class ImodTimeSeriesWidget(QWidget):
         if layer is None:
             return
         # Reset state
+        self.ipf_loader.cancel()
         self.id_label.setVisible(True)
         self.id_selection_box.setVisible(True)
         self.variables_indexes = None
@@ -509,7 +528,13 @@ class ImodTimeSeriesWidget(QWidget):
             )
 
     def sync_ipf_data(self, layer):
-        """Synchronize (load & unload) timeseries data from an IPF dataset"""
+        """
+        Synchronize (load & unload) timeseries data from an IPF dataset.
+
+        Newly selected timeseries are read in the background, and plotted as
+        they arrive (see on_ipf_loaded). Reading the timeseries of a previous
+        selection is canceled.
+        """
         feature_ids = layer.selectedFeatureIds()  # Returns a new list
         # Do not read the data if the selection is the same
         if self.feature_ids == feature_ids:
@@ -518,41 +543,41 @@ class ImodTimeSeriesWidget(QWidget):
             # warn user: no features selected in current layer
             return
 
-        index = int(layer.customProperty("ipf_indexcolumn"))
-        ext = layer.customProperty("ipf_assoc_ext")
-        ipf_path = layer.customProperty("ipf_path")
-        parent = Path(ipf_path).parent
-        names = sorted(
-            [str(layer.getFeature(fid).attribute(index)) for fid in feature_ids]
-        )
+        paths = selected_associated_paths(layer, feature_ids)
 
         # Filter names to add and to remove, to prevent loading duplicates
-        names_to_add = set(names).difference(self.dataframes.keys())
-        names_to_pop = set(self.dataframes.keys()).difference(names)
-
-        for name in names_to_add:
-            dataframe = read_associated_timeseries(f"{parent.joinpath(name)}.{ext}")
-            self.dataframes[name] = dataframe
-
+        names_to_pop = set(self.dataframes.keys()).difference(paths)
         for name in names_to_pop:
             self.dataframes.pop(name)
 
+        paths_to_add = {
+            name: path for name, path in paths.items() if name not in self.dataframes
+        }
+        self.ipf_loader.load(paths_to_add)
+
         # Store feature_ids for future comparison
         self.feature_ids = feature_ids
         return
 
+    def on_ipf_loaded(self, generation, name, dataframe):
+        # Ignore timeseries of a previous selection
+        if generation != self.ipf_loader.generation:
+            return
+        self.dataframes[name] = dataframe
+        # Redrawing for every timeseries would make the GUI unresponsive:
+        # gather the timeseries arriving in quick succession instead.
+        if not self.redraw_timer.isActive():
+            self.redraw_timer.start()
+
     def load_arrow_data(self, layer):
         """Synchronize timeseries data from an Arrow dataset"""
         arrow_path = layer.customProperty("arrow_path")
         column = layer.customProperty("arrow_fid_column")
         # Don't crash if Ribasim did not yet run
         if Path(arrow_path).is_file():
-            self.stored_dataframes = {}
-            df = read_arrow(arrow_path)
-            # Don't crash if the dataframe is empty
-            if not df.empty:
-                for key, groupdf in df.groupby(column):
-                    self.stored_dataframes[key] = groupdf.set_index("time")
+            # A mapping of id to timeseries: the DataFrame of an id is only
+            # created once it is selected.
+            self.stored_dataframes = read_arrow_timeseries(arrow_path, column)
         return
 
     def sync_arrow_data(self, layer):
@@ -668,10 +693,13 @@ class ImodTimeSeriesWidget(QWidget):
         self.draw_plot()
 
     def draw_plot(self):
+        self.load()
+        self.plot_dataframes()
+
+    def plot_dataframes(self):
         # Always clear plot before drawing
         self.clear_plot()
 
-        self.load()
         columns_to_plot = self.multi_variable_selection.checked_variables()
         series_list = []
         for name, dataframe in self.dataframes.items():
@@ -0,0 +1,120 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Process-wide cache of DataFrames parsed from files.
+
+The timeseries and cross section widgets read the same associated IPF files
+and GEF files over and over again, e.g. every time the selection, the cross
+section line, or the buffer distance changes. Parsed files are kept in a least
+recently used cache of limited size, so that only new or changed files are
+parsed again.
+"""
+
+import functools
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+import pandas as pd
+
+# Maximum size of the cached DataFrames, in bytes.
+MAX_BYTES = 256 * 1024**2
+
+
+class DataFrameCache:
+    """
+    Least recently used cache of DataFrames read from files, bounded by the
+    memory used by the DataFrames.
+
+    Entries are keyed by the reader, the resolved path, and the modification
+    time and size of the file: a changed file is read again. The cache may be
+    used from multiple threads.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path, read: Callable[..., pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the DataFrame of the file at path, calling ``read(path)`` if it
+        has not been cached yet.
+
+        A copy is returned, so that modifying it does not modify the cache.
+        """
+        path = pathlib.Path(path).resolve()
+        stat = os.stat(path)
+        key = (read.__module__, read.__qualname__, str(path))
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1].copy()
+            self.misses += 1
+
+        # Read outside of the lock, so that files are read concurrently.
+        df = read(path)
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            self._pop(key)
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (stamp, df, nbytes)
+                self.nbytes += nbytes
+                while self.nbytes > self.max_bytes:
+                    self._pop(next(iter(self._entries)))
+        return df.copy()
+
+    def _pop(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+DATAFRAME_CACHE = DataFrameCache()
+
+
+def cached_reader(read: Callable[..., pd.DataFrame]) -> Callable[..., pd.DataFrame]:
+    """
+    Decorate a reader taking a path, so that its results are stored in the
+    process-wide DataFrame cache. Calls with additional keyword arguments
+    bypass the cache.
+    """
+
+    @functools.wraps(read)
+    def wrapper(path, **kwargs):
+        if kwargs:
+            return read(path, **kwargs)
+        return DATAFRAME_CACHE.get(path, read)
+
+    return wrapper
@@ -0,0 +1,63 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Persisted indexes of files, stored as JSON in the plugin settings directory.
+
+An index maps filenames to entries. Every entry holds the modification time
+and size of the file it describes, so that only added and changed files have
+to be read again.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from imodqgis.utils.pathing import get_index_path
+
+
+def read_index(source: Path, kind: str, version: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the persisted index of source. Returns an empty index if none exists,
+    or if it was written with a different version.
+    """
+    try:
+        with open(get_index_path(source, kind), "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != version:
+        return {}
+    return index["entries"]
+
+
+def write_index(
+    source: Path, kind: str, version: int, entries: Dict[str, Dict[str, Any]]
+) -> None:
+    index_path = get_index_path(source, kind)
+    # Write to a temporary file first, so that a concurrent reader never reads
+    # a partially written index. Every writer uses its own temporary file: the
+    # same source may be indexed by several tasks at once.
+    with tempfile.NamedTemporaryFile(
+        "w", dir=index_path.parent, suffix=".tmp", delete=False
+    ) as f:
+        json.dump({"version": version, "entries": entries}, f)
+    try:
+        os.replace(f.name, index_path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+def is_current(entry: Dict[str, Any], stat: os.stat_result) -> bool:
+    """Whether the entry still describes the file with the given stat."""
+    return entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+
+def stamp(entry: Dict[str, Any], stat: os.stat_result) -> Dict[str, Any]:
+    """Record the modification time and size of the file in the entry."""
+    entry["mtime_ns"] = stat.st_mtime_ns
+    entry["size"] = stat.st_size
+    return entry
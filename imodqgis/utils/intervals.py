@@ -0,0 +1,154 @@
+# Copyright © 2021 Deltares
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+"""
+Columnar storage of the layer intervals of many boreholes.
+
+Rather than a DataFrame per borehole, the intervals of all boreholes are
+concatenated into a single array per attribute. The intervals of borehole i
+are found at ``offsets[i]:offsets[i + 1]``. This keeps loading and plotting
+thousands of boreholes cheap.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def concatenate_values(parts: List[np.ndarray]) -> np.ndarray:
+    """
+    Concatenate the values of an attribute. Attributes containing strings are
+    stored as object arrays, with missing values as NaN; others as floats.
+    """
+    if any(part.dtype.kind not in "biuf" for part in parts):
+        return np.concatenate([part.astype(object) for part in parts])
+    return np.concatenate([part.astype(np.float64) for part in parts])
+
+
+class BoreholeIntervals:
+    """
+    Layer intervals of boreholes.
+
+    Parameters
+    ----------
+    offsets: np.ndarray of int, shape (nborehole + 1,)
+        Start of the intervals of every borehole, and the total number of
+        intervals.
+    top: np.ndarray of float, shape (ninterval,)
+        Vertical coordinate of the top of every interval.
+    bottom: np.ndarray of float, shape (ninterval,)
+        Vertical coordinate of the bottom of every interval.
+    values: dict of np.ndarray, each of shape (ninterval,)
+        Value of every interval, per attribute. Stored as ``data``.
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        top: np.ndarray,
+        bottom: np.ndarray,
+        values: Dict[str, np.ndarray],
+    ):
+        offsets = np.asarray(offsets, dtype=np.int64)
+        n = offsets[-1]
+        if not (len(top) == len(bottom) == n):
+            raise ValueError("Lengths of top and bottom must match offsets")
+        for name, array in values.items():
+            if len(array) != n:
+                raise ValueError(f"Length of values of {name} must match offsets")
+        self.offsets = offsets
+        self.top = np.asarray(top, dtype=np.float64)
+        self.bottom = np.asarray(bottom, dtype=np.float64)
+        self.data = {name: np.asarray(array) for name, array in values.items()}
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(nborehole={len(self)}, "
+            f"ninterval={self.offsets[-1]}, columns={self.columns})"
+        )
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.data)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of intervals of every borehole."""
+        return np.diff(self.offsets)
+
+    def borehole(self, i: int) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Top, bottom, and values of the intervals of borehole i."""
+        start = self.offsets[i]
+        stop = self.offsets[i + 1]
+        return (
+            self.top[start:stop],
+            self.bottom[start:stop],
+            {name: array[start:stop] for name, array in self.data.items()},
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of an attribute, NaN for every interval if it is missing."""
+        array = self.data.get(name)
+        if array is None:
+            return np.full(self.offsets[-1], np.nan)
+        return array
+
+    def repeat(self, values: np.ndarray) -> np.ndarray:
+        """Repeat a value per borehole for every interval of the borehole."""
+        return np.repeat(values, self.counts)
+
+    @classmethod
+    def from_boundaries(
+        cls,
+        boundaries: Sequence[np.ndarray],
+        values: Dict[str, Sequence[np.ndarray]],
+    ) -> "BoreholeIntervals":
+        """
+        Create intervals from the layer boundaries of every borehole, as in
+        associated IPF borehole files: every boundary is the top of an
+        interval, which extends to the next boundary. The value of the last
+        boundary is not used.
+
+        Parameters
+        ----------
+        boundaries: sequence of np.ndarray
+            Vertical coordinates of the boundaries, per borehole.
+        values: dict of sequences of np.ndarray
+            Value at every boundary, per attribute, per borehole.
+        """
+        counts = [max(len(b) - 1, 0) for b in boundaries]
+        offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        if len(boundaries) == 0:
+            return cls(offsets, [], [], {name: np.array([]) for name in values})
+        top = np.concatenate([np.asarray(b, dtype=np.float64)[:-1] for b in boundaries])
+        bottom = np.concatenate(
+            [np.asarray(b, dtype=np.float64)[1:] for b in boundaries]
+        )
+        interval_values = {
+            name: concatenate_values(
+                [np.asarray(v)[:n] for v, n in zip(arrays, counts)]
+            )
+            for name, arrays in values.items()
+        }
+        return cls(offsets, top, bottom, interval_values)
+
+    @classmethod
+    def concatenate(cls, parts: Sequence["BoreholeIntervals"]) -> "BoreholeIntervals":
+        """
+        Concatenate the boreholes of several intervals. Attributes missing in
+        some of the parts are filled with NaN.
+        """
+        names = list(dict.fromkeys(name for part in parts for name in part.columns))
+        if len(parts) == 0:
+            return cls(np.zeros(1, dtype=np.int64), [], [], {})
+        counts = np.concatenate([part.counts for part in parts])
+        offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        top = np.concatenate([part.top for part in parts])
+        bottom = np.concatenate([part.bottom for part in parts])
+        values = {}
+        for name in names:
+            values[name] = concatenate_values([part.column(name) for part in parts])
+        return cls(offsets, top, bottom, values)
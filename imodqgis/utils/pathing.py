@@ -1,6 +1,7 @@
 # Copyright © 2021 Deltares
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
+import hashlib
 import os
 import platform
 from pathlib import Path
@@ -25,3 +26,25 @@ def get_configdir() -> Path:
     configdir.mkdir(exist_ok=True, mode=766)
 
     return configdir
+
+
+def get_index_path(source: Path, kind: str) -> Path:
+    """
+    Location of a persisted index of a file or directory, in the index
+    directory of the plugin settings.
+
+    Parameters
+    ----------
+    source: pathlib.Path
+        File or directory the index describes.
+    kind: str
+        Kind of index, used as the prefix of the filename.
+
+    Returns
+    -------
+    index_path: pathlib.Path
+    """
+    indexdir = get_configdir() / "index"
+    indexdir.mkdir(exist_ok=True)
+    key = hashlib.sha1(str(Path(source).resolve()).encode("utf-8")).hexdigest()
+    return indexdir / f"{kind}-{key}.json"
@@ -38,7 +38,7 @@ from qgis.gui import (
     QgsMessageBar,
 )
 
-from imodqgis.ipf import IpfType
+from imodqgis.ipf import IpfType, read_ipf_header
 from imodqgis.utils.layers import groupby_variable
 from imodqgis.utils.pathing import get_configdir
 from imodqgis.viewer import xml_tree
@@ -421,16 +421,21 @@ class ImodViewerWidget(QWidget):
     def update_borehole_data(self):
         """Update data for xml command to render boreholes"""
         current_layer = self.layer_selection.currentLayer()
-        uri = current_layer.dataProvider().dataSourceUri()
-        path = self.path_from_vector_uri(uri)
+        path = current_layer.customProperty("ipf_path")
+        if path is None:
+            uri = current_layer.dataProvider().dataSourceUri()
+            path = self.path_from_vector_uri(uri)
         self.borehole_data.path = path
         self.borehole_data.name = "boreholes_from_qgis"
 
         self.borehole_data.guids_grids = [uuid.uuid4()]
 
+        # The layer may have other fields than the IPF, e.g. the fid of a
+        # GeoPackage: take the coordinate columns from the IPF itself.
+        colnames = read_ipf_header(path)[2]
         columnmapping = {}
-        columnmapping["X"] = current_layer.fields().toList()[0].alias()
-        columnmapping["Y"] = current_layer.fields().toList()[1].alias()
+        columnmapping["X"] = colnames[0]
+        columnmapping["Y"] = colnames[1]
         # Hardcoded commands to tell the viewer to use the first column
         # of the associated file to plot tops and bottoms.
         columnmapping["Z0"] = "tops 1dBoreholes"
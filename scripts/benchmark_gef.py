@@ -0,0 +1,94 @@
+"""
+Benchmark reading CPT GEF files.
+
+Compares CptGefFile with the previous parser, which searched every header line
+with a regular expression and converted the datablock via lists of strings.
+Run from the QGIS Python environment, with a directory of CPT GEF files:
+
+    python scripts/benchmark_gef.py path/to/directory
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str((Path(sys.path[0]) / "..").resolve()))
+
+from imodqgis.gef.reading import CptGefFile  # noqa: E402
+
+
+class PreviousCptGefFile(CptGefFile):
+    def parse_header(self):
+        for line in self._header.splitlines():
+            keyword = re.search(r"([#\s]*([A-Z]+)\s*=)\s*", line)
+            try:
+                keyword_method = keyword.group(2).lower()
+            except AttributeError:
+                continue
+            method = f"_parse_{keyword_method}"
+            if hasattr(self, method):
+                line = line.replace(keyword.group(0), "")
+                line = re.sub(r'["\']|\s\s+', "", line)
+                getattr(self, method)(line)
+
+    def parse_data(self):
+        if not self.recordseparator:
+            self.recordseparator = "!"
+        data = re.sub(
+            rf"{re.escape(self.columnseparator)}{re.escape(self.recordseparator)}*",
+            ",",
+            self._data,
+        )
+        self._data = [d.rstrip(",").split(",") for d in data.splitlines()]
+
+    def to_df(self):
+        df = pd.DataFrame(self._data, dtype="float64")
+        df = df.replace(self.columnvoid, np.nan)
+        df.columns = self.columns
+        if "rf" not in df.columns:
+            df["rf"] = (df["fs"] / df["qc"]) * 100
+        if "corrected_depth" in df.columns:
+            df["depth"] = self.z - df["corrected_depth"]
+        else:
+            df["depth"] = self.z - df["length"]
+        self._df = df
+
+
+def read_all(cls, paths):
+    start = time.perf_counter()
+    frames = []
+    for path in paths:
+        gef = cls(path)
+        frames.append((gef.header, gef.df))
+    return time.perf_counter() - start, frames
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    paths = sorted(Path(sys.argv[1]).glob("**/*.gef"), key=str)
+    # Read every file once beforehand, so that neither run profits from the
+    # file system cache.
+    for path in paths:
+        path.read_bytes()
+
+    previous, expected = read_all(PreviousCptGefFile, paths)
+    elapsed, actual = read_all(CptGefFile, paths)
+    for path, (header, df), (expected_header, expected_df) in zip(
+        paths, actual, expected
+    ):
+        assert header.equals(expected_header), path
+        pd.testing.assert_frame_equal(df, expected_df, obj=str(path))
+
+    print(f"files:    {len(paths)}")
+    print(f"previous: {previous:.3f} s")
+    print(f"current:  {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
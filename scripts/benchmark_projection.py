@@ -0,0 +1,83 @@
+"""
+Benchmark the projection of points on to a cross section line.
+
+Compares project_to_polyline with the previous implementation, which
+allocates (nsegment x npoint) arrays and loops over the segments in Python.
+Run from the QGIS Python environment:
+
+    python scripts/benchmark_projection.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str((Path(sys.path[0]) / "..").resolve()))
+
+from imodqgis.cross_section.plot_util import project_to_polyline  # noqa: E402
+
+NPOINTS = [10**2, 10**3, 10**4, 10**5]
+NSEGMENTS = [10, 10**2, 10**3, 10**4]
+# Skip the previous implementation above this number of segment-point
+# combinations: it would require many gigabytes of memory.
+MAX_REFERENCE_SIZE = 10**8
+
+
+def project_to_polyline_reference(vertices, pp):
+    aa = vertices[:-1]
+    bb = vertices[1:]
+    nsegment = len(aa)
+    npoint = len(pp)
+    distances = np.empty((nsegment, npoint), dtype=float)
+    xx = np.empty((nsegment, npoint), dtype=float)
+    x = 0.0
+    for i, (a, b) in enumerate(zip(aa, bb)):
+        UU = pp - a
+        V = b - a
+        s = np.linalg.norm(V)
+        tt = np.dot(UU, V) / s
+        tt[tt < 0.0] = 0.0
+        tt[tt > s] = s
+        xx[i] = x + tt
+        pp_projected = a + ((tt / s)[:, np.newaxis] * V)
+        distances[i] = np.linalg.norm(pp - pp_projected, axis=1)
+        x += s
+    closest = np.argmin(distances, axis=0)
+    return xx[closest, np.arange(npoint)]
+
+
+def timeit(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>8} {'segments':>8} {'reference (s)':>14} {'chunked (s)':>12}")
+    for nsegment in NSEGMENTS:
+        # A meandering line through a 10 x 10 km area
+        vertices = np.column_stack(
+            [
+                np.linspace(0.0, 10_000.0, nsegment + 1),
+                5_000.0 + 2_000.0 * np.sin(np.linspace(0.0, 20.0, nsegment + 1)),
+            ]
+        )
+        for npoint in NPOINTS:
+            pp = rng.uniform(0.0, 10_000.0, size=(npoint, 2))
+            elapsed, x = timeit(project_to_polyline, vertices, pp)
+            if nsegment * npoint <= MAX_REFERENCE_SIZE:
+                reference, expected = timeit(
+                    project_to_polyline_reference, vertices, pp
+                )
+                assert np.allclose(x, expected)
+                reference = f"{reference:.4f}"
+            else:
+                reference = "-"
+            print(f"{npoint:>8} {nsegment:>8} {reference:>14} {elapsed:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+from qgis.testing import unittest
+from qgis.utils import plugins
+
+
+class FakeArrowStream:
+    """
+    Stream of record batches, like the one returned by OGR. The arrays of a
+    batch are overwritten when the next batch is fetched.
+    """
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.previous = None
+
+    def GetNextRecordBatch(self):
+        if self.previous is not None:
+            for array in self.previous.values():
+                array[...] = array[0]
+        if len(self.batches) == 0:
+            return None
+        self.previous = self.batches.pop(0)
+        return self.previous
+
+
+def fake_dataset(batches):
+    names = list(batches[0])
+    definition = MagicMock()
+    definition.GetFieldCount.return_value = len(names)
+    definition.GetFieldDefn.side_effect = lambda i: MagicMock(
+        **{"GetName.return_value": names[i]}
+    )
+    layer = MagicMock()
+    layer.GetLayerDefn.return_value = definition
+    layer.GetArrowStreamAsNumPy.return_value = FakeArrowStream(batches)
+    dataset = MagicMock()
+    dataset.GetLayer.return_value = layer
+    return dataset
+
+
+def timeseries_batches():
+    # Node 2 spans both batches; the rows are not sorted by time.
+    return [
+        {
+            "node_id": np.array([1, 1, 2, 2]),
+            "time": np.array(
+                ["2020-01-02", "2020-01-01", "2020-01-03", "2020-01-01"],
+                dtype="datetime64[ns]",
+            ),
+            "level": np.array([1.2, 1.1, 2.3, 2.1]),
+        },
+        {
+            "node_id": np.array([2, 3, 1]),
+            "time": np.array(
+                ["2020-01-02", "2020-01-01", "2020-01-03"], dtype="datetime64[ns]"
+            ),
+            "level": np.array([2.2, 3.1, 1.3]),
+        },
+    ]
+
+
+class TestArrowReading(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+    def test_attribute_filter(self):
+        from imodqgis.arrow.reading import attribute_filter
+
+        self.assertIsNone(attribute_filter())
+        self.assertEqual(attribute_filter("node_id", [1, 3]), '"node_id" IN (1,3)')
+        # No ids: no rows
+        self.assertEqual(attribute_filter("node_id", []), "0 = 1")
+        self.assertEqual(
+            attribute_filter("node_id", iter([]), end=pd.Timestamp("2020-01-01")),
+            "0 = 1 AND \"time\" < '2020/01/01 00:00:00'",
+        )
+        self.assertEqual(
+            attribute_filter(
+                "node_id",
+                [2],
+                start=pd.Timestamp("2020-01-01"),
+                end=pd.Timestamp("2020-02-01 12:00"),
+            ),
+            '"node_id" IN (2) AND "time" >= \'2020/01/01 00:00:00\' '
+            "AND \"time\" < '2020/02/01 12:00:00'",
+        )
+        self.assertEqual(
+            attribute_filter(time_column="t", start="2020-01-01"),
+            "\"t\" >= '2020/01/01 00:00:00'",
+        )
+
+    def test_read_arrow(self):
+        from imodqgis.arrow.reading import read_arrow
+
+        batches = timeseries_batches()
+        dataset = fake_dataset(batches)
+        with patch("imodqgis.arrow.reading.ogr") as ogr:
+            ogr.Open.return_value = dataset
+            df = read_arrow("results.arrow")
+
+        ogr.Open.assert_called_once_with("results.arrow")
+        layer = dataset.GetLayer.return_value
+        layer.SetIgnoredFields.assert_not_called()
+        layer.SetAttributeFilter.assert_not_called()
+        self.assertEqual(list(df.columns), ["node_id", "time", "level"])
+        # The values of all batches, not overwritten by fetching the next.
+        self.assertEqual(df["node_id"].tolist(), [1, 1, 2, 2, 2, 3, 1])
+        self.assertTrue(np.allclose(df["level"], [1.2, 1.1, 2.3, 2.1, 2.2, 3.1, 1.3]))
+
+    def test_read_arrow_columns_where(self):
+        from imodqgis.arrow.reading import read_arrow
+
+        batches = timeseries_batches()
+        dataset = fake_dataset(batches)
+        with patch("imodqgis.arrow.reading.ogr") as ogr:
+            ogr.Open.return_value = dataset
+            df = read_arrow(
+                "results.arrow", columns=["level", "node_id"], where='"node_id" = 1'
+            )
+
+        layer = dataset.GetLayer.return_value
+        layer.SetIgnoredFields.assert_called_once_with(["time"])
+        layer.SetAttributeFilter.assert_called_once_with('"node_id" = 1')
+        # In the order of the requested columns
+        self.assertEqual(list(df.columns), ["level", "node_id"])
+        self.assertEqual(len(df), 7)
+
+    def test_read_arrow_empty(self):
+        from imodqgis.arrow.reading import read_arrow
+
+        dataset = fake_dataset([{"node_id": np.array([])}])
+        dataset.GetLayer.return_value.GetArrowStreamAsNumPy.return_value = (
+            FakeArrowStream([])
+        )
+        with patch("imodqgis.arrow.reading.ogr") as ogr:
+            ogr.Open.return_value = dataset
+            df = read_arrow("results.arrow")
+        self.assertTrue(df.empty)
+
+    def test_arrow_timeseries(self):
+        from imodqgis.arrow.reading import ArrowTimeseries
+
+        batches = timeseries_batches()
+        df = pd.DataFrame(
+            {
+                name: np.concatenate([batch[name] for batch in batches])
+                for name in batches[0]
+            }
+        )
+        timeseries = ArrowTimeseries(df, "node_id")
+
+        self.assertEqual(len(timeseries), 3)
+        self.assertEqual(list(timeseries), [1, 2, 3])
+        self.assertIn(2, timeseries)
+        self.assertNotIn(4, timeseries)
+
+        # The rows of node 2 are taken from both batches, sorted by time.
+        node = timeseries[2]
+        self.assertEqual(node.index.name, "time")
+        self.assertEqual(
+            node.index.tolist(),
+            list(pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03"])),
+        )
+        self.assertTrue(np.allclose(node["level"], [2.1, 2.2, 2.3]))
+        self.assertTrue((node["node_id"] == 2).all())
+        self.assertTrue(np.allclose(timeseries[1]["level"], [1.1, 1.2, 1.3]))
+        self.assertTrue(np.allclose(timeseries[3]["level"], [3.1]))
+
+        with self.assertRaises(KeyError):
+            timeseries[4]
+
+    def test_arrow_timeseries_empty(self):
+        from imodqgis.arrow.reading import ArrowTimeseries
+
+        df = pd.DataFrame({"node_id": [], "time": [], "level": []})
+        timeseries = ArrowTimeseries(df, "node_id")
+        self.assertEqual(len(timeseries), 0)
+        self.assertEqual(list(timeseries), [])
+        with self.assertRaises(KeyError):
+            timeseries[1]
+
+    def test_read_arrow_timeseries(self):
+        from imodqgis.arrow.reading import read_arrow_timeseries
+
+        batches = timeseries_batches()
+        dataset = fake_dataset(batches)
+        with patch("imodqgis.arrow.reading.ogr") as ogr:
+            ogr.Open.return_value = dataset
+            timeseries = read_arrow_timeseries(
+                "results.arrow",
+                "node_id",
+                columns=["level"],
+                ids=[1, 2],
+                start=pd.Timestamp("2020-01-01"),
+            )
+
+        layer = dataset.GetLayer.return_value
+        layer.SetIgnoredFields.assert_called_once_with([])
+        layer.SetAttributeFilter.assert_called_once_with(
+            '"node_id" IN (1,2) AND "time" >= \'2020/01/01 00:00:00\''
+        )
+        self.assertEqual(list(timeseries[2].columns), ["node_id", "level"])
+        self.assertTrue(np.allclose(timeseries[2]["level"], [2.1, 2.2, 2.3]))
+
+
+def run_all():
+    """
+    Default function that is called by the runner if nothing else is specified
+    """
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(TestArrowReading))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
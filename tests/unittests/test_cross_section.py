@@ -0,0 +1,200 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from qgis.core import (
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
+    QgsVectorLayer,
+    edit,
+)
+from qgis.testing import unittest
+from qgis.utils import plugins
+
+
+def point_feature(layer, x, y, name):
+    feature = QgsFeature(layer.fields())
+    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+    feature.setAttributes([name])
+    return feature
+
+
+class TestPointIndex(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        self.layer = QgsVectorLayer("Point?field=id:string", "points", "memory")
+        self.layer.dataProvider().addFeatures(
+            [
+                point_feature(self.layer, 0.0, 0.0, "a"),
+                point_feature(self.layer, 10.0, 1.0, "b"),
+                point_feature(self.layer, 100.0, 100.0, "c"),
+            ]
+        )
+        self.line = QgsGeometry.fromPolylineXY(
+            [QgsPointXY(-5.0, 0.0), QgsPointXY(20.0, 0.0)]
+        )
+
+    def tearDown(self):
+        from imodqgis.cross_section.point_index import forget_layer
+
+        forget_layer(self.layer.id())
+
+    def test_within(self):
+        from imodqgis.cross_section.point_index import PointIndex
+
+        index = PointIndex(self.layer, 0)
+        names, points = index.within(self.line, 2.0)
+        self.assertEqual(names, ["a", "b"])
+        self.assertEqual(points, [QgsPointXY(0.0, 0.0), QgsPointXY(10.0, 1.0)])
+
+        # Outside of the buffer
+        names, points = index.within(self.line, 0.5)
+        self.assertEqual(names, ["a"])
+
+        far = QgsGeometry.fromPolylineXY(
+            [QgsPointXY(500.0, 500.0), QgsPointXY(600.0, 500.0)]
+        )
+        self.assertEqual(index.within(far, 2.0), ([], []))
+
+    def test_get_point_index(self):
+        from imodqgis.cross_section.point_index import get_point_index
+
+        index = get_point_index(self.layer, 0)
+        # Cached
+        self.assertIs(get_point_index(self.layer, 0), index)
+
+        # Changing the data of the layer discards the index
+        with edit(self.layer):
+            self.layer.addFeature(point_feature(self.layer, 15.0, -1.0, "d"))
+        updated = get_point_index(self.layer, 0)
+        self.assertIsNot(updated, index)
+        names, _ = updated.within(self.line, 2.0)
+        self.assertEqual(names, ["a", "b", "d"])
+
+    def test_select_nothing(self):
+        from imodqgis.cross_section.cross_section_data import BoreholeData
+
+        self.layer.setCustomProperty("ipf_indexcolumn", 0)
+        self.layer.setCustomProperty("ipf_assoc_ext", "txt")
+        self.layer.setCustomProperty("ipf_path", "points.ipf")
+        data = BoreholeData(self.layer, "lithology")
+
+        far = QgsGeometry.fromPolylineXY(
+            [QgsPointXY(500.0, 500.0), QgsPointXY(600.0, 500.0)]
+        )
+        point_id, paths, x = data.select_geometry(far, 2.0)
+        self.assertEqual(point_id, [])
+        self.assertEqual(paths, [])
+        self.assertIsInstance(x, np.ndarray)
+        self.assertEqual(x.size, 0)
+
+        # Nothing is read, and nothing is plotted.
+        data.load(far, 2.0)
+        data.plot(plot_widget=None)
+        self.assertEqual(data.x.size, 0)
+
+    def test_load_missing_variable(self):
+        from imodqgis.cross_section.cross_section_data import GefBoreholeData
+        from imodqgis.utils.intervals import BoreholeIntervals
+
+        self.layer.setCustomProperty("gef_indexcolumn", 0)
+        self.layer.setCustomProperty("gef_assoc_ext", "gef")
+        self.layer.setCustomProperty("gef_path", "points.gef")
+        data = GefBoreholeData(self.layer, "lithology")
+
+        # None of the boreholes has the variable.
+        intervals = BoreholeIntervals(
+            [0, 1, 2], [0.0, 1.0], [-1.0, -1.0], {"text2": ["ZMO", "ZMO"]}
+        )
+        with patch.object(data, "read_intervals", return_value=intervals):
+            data.load(self.line, 2.0)
+        self.assertIsNone(data.styling_data)
+        self.assertTrue(np.isnan(data.intervals.column("lithology")).all())
+
+        plot_widget = MagicMock()
+        data.plot(plot_widget)
+        plot_widget.addItem.assert_called_once()
+
+
+def project_to_polyline_reference(vertices, pp):
+    """
+    Unchunked projection, one segment at a time: the implementation preceding
+    project_to_polyline.
+    """
+    aa = vertices[:-1]
+    bb = vertices[1:]
+    distances = np.empty((len(aa), len(pp)))
+    xx = np.empty((len(aa), len(pp)))
+    x = 0.0
+    for i, (a, b) in enumerate(zip(aa, bb)):
+        V = b - a
+        s = np.linalg.norm(V)
+        tt = np.clip(np.dot(pp - a, V) / s, 0.0, s)
+        xx[i] = x + tt
+        distances[i] = np.linalg.norm(pp - (a + (tt / s)[:, np.newaxis] * V), axis=1)
+        x += s
+    closest = np.argmin(distances, axis=0)
+    return xx[closest, np.arange(len(pp))]
+
+
+class TestProjectToPolyline(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        self.vertices = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0]])
+
+    def test_project(self):
+        from imodqgis.cross_section.plot_util import project_to_polyline
+
+        pp = np.array(
+            [
+                [5.0, 3.0],  # On the first segment
+                [12.0, 5.0],  # On the second segment
+                [-5.0, 1.0],  # Before the start
+                [15.0, 15.0],  # Beyond the end
+            ]
+        )
+        x = project_to_polyline(self.vertices, pp)
+        self.assertTrue(np.allclose(x, [5.0, 15.0, 0.0, 20.0]))
+
+    def test_project_chunks(self):
+        from imodqgis.cross_section.plot_util import project_to_polyline
+
+        rng = np.random.default_rng(0)
+        vertices = np.cumsum(rng.uniform(-10.0, 10.0, size=(20, 2)), axis=0)
+        # Include points well beyond the ends of the line.
+        lower = vertices.min(axis=0) - 50.0
+        upper = vertices.max(axis=0) + 50.0
+        pp = rng.uniform(lower, upper, size=(1000, 2))
+        expected = project_to_polyline_reference(vertices, pp)
+
+        # A chunk holds 5 points of the 19 segments: 200 chunks.
+        actual = project_to_polyline(vertices, pp, chunk_size=100)
+        self.assertTrue(np.allclose(actual, expected))
+        # A single chunk
+        actual = project_to_polyline(vertices, pp)
+        self.assertTrue(np.allclose(actual, expected))
+
+    def test_project_zero_length_segment(self):
+        from imodqgis.cross_section.plot_util import project_to_polyline
+
+        vertices = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 0.0], [10.0, 10.0]])
+        pp = np.array([[5.0, 1.0], [11.0, 5.0]])
+        x = project_to_polyline(vertices, pp)
+        self.assertTrue(np.allclose(x, [5.0, 15.0]))
+
+
+def run_all():
+    """
+    Default function that is called by the runner if nothing else is specified
+    """
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(TestPointIndex))
+    suite.addTests(unittest.makeSuite(TestProjectToPolyline))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,210 @@
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from qgis.testing import unittest
+from qgis.utils import plugins
+
+
+class TestGefReading(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        script_dir = Path(__file__).parent
+        self.gefdir = (script_dir / ".." / "testdata" / "gef").resolve()
+        self.cpt = self.gefdir / "cpt-01.gef"
+        # Whitespace separated, without end depth in the header
+        self.cpt_without_enddepth = self.gefdir / "cpt-02.gef"
+        self.bores = [self.gefdir / "bore-01.gef", self.gefdir / "bore-02.gef"]
+
+    def test_read_gef_type(self):
+        from imodqgis.gef.reading import GefType, read_gef_type
+
+        self.assertEqual(read_gef_type(self.cpt), GefType.CPT)
+        self.assertEqual(read_gef_type(self.bores[0]), GefType.BOREHOLE)
+
+    def test_read_gef_header(self):
+        from imodqgis.gef.reading import BoreGefFile, CptGefFile, read_gef_header
+
+        gef = read_gef_header(self.cpt)
+        self.assertIsInstance(gef, CptGefFile)
+        self.assertEqual(gef.nr, "CPT-01")
+        self.assertAlmostEqual(gef.x, 132127.181)
+        self.assertAlmostEqual(gef.y, 458102.351)
+        self.assertAlmostEqual(gef.z, 1.3)
+        self.assertEqual(gef.columns, ["length", "qc", "fs", "rf"])
+        # The end depth is specified in the header: the datablock is not parsed.
+        self.assertAlmostEqual(gef.enddepth, 1.5)
+        self.assertIsNotNone(gef._datablock)
+        self.assertIsNone(gef._data)
+
+        gef = read_gef_header(self.bores[0])
+        self.assertIsInstance(gef, BoreGefFile)
+        self.assertEqual(gef.nr, "B-01")
+        self.assertAlmostEqual(gef.z, 2.5)
+
+    def test_no_end_of_header(self):
+        from imodqgis.gef.reading import CptGefFile, read_gef_header
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "no-eoh.gef"
+            content = self.cpt.read_bytes().replace(b"#EOH=", b"")
+            path.write_bytes(content)
+            with self.assertRaises(ValueError):
+                CptGefFile(path)
+            with self.assertRaises(RuntimeError):
+                read_gef_header(path)
+
+    def test_cpt_df(self):
+        from imodqgis.gef.reading import CptGefFile
+
+        gef = CptGefFile(self.cpt)
+        df = gef.df
+        self.assertIsNone(gef._datablock)
+        self.assertEqual(list(df.columns), ["length", "qc", "fs", "rf", "depth"])
+        self.assertTrue(np.allclose(df["length"], [0.0, 0.5, 1.0, 1.5]))
+        # The void value is replaced by NaN
+        self.assertTrue(np.isnan(df["qc"][0]))
+        self.assertTrue(np.allclose(df["qc"][1:], [0.883, 1.418, 2.0]))
+        self.assertTrue(np.allclose(df["depth"], [1.3, 0.8, 0.3, -0.2]))
+
+    def test_cpt_enddepth_from_data(self):
+        from imodqgis.gef.reading import CptGefFile
+
+        gef = CptGefFile(self.cpt_without_enddepth)
+        self.assertEqual(gef.columns, ["length", "qc", "fs"])
+        self.assertAlmostEqual(gef.enddepth, 2.5)
+        self.assertIsNone(gef._datablock)
+
+        df = gef.df
+        # The friction ratio is computed if missing
+        self.assertTrue(np.allclose(df["rf"], [1.0, 2.0, 1.0]))
+        self.assertTrue(np.allclose(df["depth"], [-0.5, -1.5, -3.0]))
+
+    def test_bore_df(self):
+        from imodqgis.gef.reading import BoreGefFile
+
+        gef = BoreGefFile(self.bores[0])
+        self.assertEqual(
+            gef.columns,
+            ["upper_boundary", "lower_boundary", "lithology", "text2", "text3"],
+        )
+        self.assertAlmostEqual(gef.enddepth, 3.0)
+
+        df = gef.df
+        self.assertEqual(df["lithology"].tolist(), ["Zs1", "Kz3", "Vm"])
+        # Empty and missing text fields are NaN
+        self.assertEqual(df["text2"][0], "ZMO")
+        self.assertTrue(df["text2"][1:].isna().all())
+        self.assertEqual(df["text3"][1], "DO TBR")
+        self.assertTrue(df["text3"][[0, 2]].isna().all())
+
+    def test_bore_intervals(self):
+        from imodqgis.gef.reading import read_bore_intervals
+
+        intervals = read_bore_intervals(self.bores[0])
+        self.assertEqual(len(intervals), 1)
+        self.assertTrue(np.allclose(intervals.top, [2.5, 2.0, 1.3]))
+        self.assertTrue(np.allclose(intervals.bottom, [2.0, 1.3, -0.5]))
+        self.assertEqual(intervals.data["lithology"].tolist(), ["Zs1", "Kz3", "Vm"])
+
+    def test_read_bores(self):
+        from imodqgis.gef.reading import read_bores
+
+        intervals = read_bores(self.bores)
+        self.assertEqual(intervals.offsets.tolist(), [0, 3, 5])
+        self.assertTrue(np.allclose(intervals.top, [2.5, 2.0, 1.3, 1.0, -1.0]))
+        self.assertTrue(np.allclose(intervals.bottom, [2.0, 1.3, -0.5, -1.0, -3.0]))
+        self.assertEqual(
+            intervals.data["lithology"].tolist(), ["Zs1", "Kz3", "Vm", "Zs2", "Kz1"]
+        )
+        # The second borehole has no text columns: filled with NaN
+        text2 = intervals.data["text2"]
+        self.assertEqual(text2[0], "ZMO")
+        self.assertTrue(all(np.isnan(v) for v in text2[1:]))
+        _, _, values = intervals.borehole(0)
+        self.assertEqual(values["text3"][1], "DO TBR")
+
+
+class TestGefCatalog(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        script_dir = Path(__file__).parent
+        gefdir = (script_dir / ".." / "testdata" / "gef").resolve()
+        # Catalogs are persisted per directory: use a fresh one.
+        self.tmpdir = tempfile.mkdtemp()
+        self.paths = []
+        for path in sorted(gefdir.glob("*.gef")):
+            copy = Path(self.tmpdir) / path.name
+            shutil.copy(path, copy)
+            self.paths.append(str(copy))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_catalog(self):
+        """Catalog the files, and return the entries and the files read."""
+        import imodqgis.gef.catalog as catalog
+
+        with patch.object(
+            catalog, "read_catalog_entry", wraps=catalog.read_catalog_entry
+        ) as read_entry:
+            entries = catalog.read_gef_catalog(self.paths)
+        read = sorted(Path(call.args[0]).name for call in read_entry.call_args_list)
+        return entries, read
+
+    def test_catalog_entries(self):
+        entries, read = self.read_catalog()
+        self.assertEqual(len(read), 4)
+        bore, _, cpt, cpt_without_enddepth = entries
+        self.assertEqual(bore["gef_type"], "BOREHOLE")
+        self.assertEqual(bore["nr"], "B-01")
+        self.assertAlmostEqual(bore["enddepth"], 3.0)
+        self.assertEqual(cpt["gef_type"], "CPT")
+        self.assertEqual(cpt["nr"], "CPT-01")
+        self.assertAlmostEqual(cpt["x"], 132127.181)
+        self.assertAlmostEqual(cpt["z"], 1.3)
+        self.assertAlmostEqual(cpt["enddepth"], 1.5)
+        self.assertEqual(cpt["columns"], ["length", "qc", "fs", "rf"])
+        self.assertAlmostEqual(cpt_without_enddepth["enddepth"], 2.5)
+
+    def test_catalog_reuse(self):
+        expected, _ = self.read_catalog()
+
+        # Nothing changed: nothing is read.
+        entries, read = self.read_catalog()
+        self.assertEqual(read, [])
+        self.assertEqual(entries, expected)
+
+        # Only the changed file is read.
+        with open(self.paths[3], "a") as f:
+            f.write("3.5 5.0 0.05\n")
+        entries, read = self.read_catalog()
+        self.assertEqual(read, ["cpt-02.gef"])
+        self.assertAlmostEqual(entries[3]["enddepth"], 3.5)
+        self.assertEqual(entries[:3], expected[:3])
+
+    def test_catalog_version(self):
+        self.read_catalog()
+        # Catalogs of a previous version are discarded.
+        with patch("imodqgis.gef.catalog.CATALOG_VERSION", 0):
+            _, read = self.read_catalog()
+        self.assertEqual(len(read), 4)
+
+
+def run_all():
+    """
+    Default function that is called by the runner if nothing else is specified
+    """
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(TestGefReading))
+    suite.addTests(unittest.makeSuite(TestGefCatalog))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
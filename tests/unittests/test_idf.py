@@ -0,0 +1,469 @@
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from qgis.core import QgsCoordinateReferenceSystem
+from qgis.testing import unittest
+from qgis.utils import plugins
+
+
+def write_nonequidistant(path, values, dx, dy, xmin, ymax):
+    """Write a single precision non-equidistant IDF; dx and dy positive."""
+    nrow, ncol = values.shape
+    xmax = xmin + sum(dx)
+    ymin = ymax - sum(dy)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<3i", 1271, ncol, nrow))
+        f.write(struct.pack("<7f", xmin, xmax, ymin, ymax, 0.0, 0.0, 1.0e20))
+        f.write(struct.pack("<??2x", True, False))
+        f.write(struct.pack(f"<{ncol}f", *dx))
+        f.write(struct.pack(f"<{nrow}f", *dy))
+        values.astype(np.float32).tofile(f)
+
+
+class TestCaseIdfFile(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        from imodqgis.idf.conversion import write
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.values = np.arange(12, dtype=np.float32).reshape((3, 4))
+        # dx, xmin, xmax, dy, ymin, ymax
+        self.spatial_reference = (25.0, 0.0, 100.0, -25.0, 0.0, 75.0)
+
+        self.idf32 = Path(self.tempdir.name) / "single.idf"
+        write(self.idf32, self.values, self.spatial_reference, dtype=np.float32)
+        self.idf64 = Path(self.tempdir.name) / "double.idf"
+        write(self.idf64, self.values, self.spatial_reference, dtype=np.float64)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_header(self):
+        from imodqgis.idf.conversion import IdfFile
+
+        for path, dtype in ((self.idf32, "float32"), (self.idf64, "float64")):
+            with IdfFile(path) as idf:
+                self.assertEqual(idf.nrow, 3)
+                self.assertEqual(idf.ncol, 4)
+                self.assertEqual(idf.dtype, dtype)
+                self.assertEqual(idf.xmin, 0.0)
+                self.assertEqual(idf.xmax, 100.0)
+                self.assertEqual(idf.ymin, 0.0)
+                self.assertEqual(idf.ymax, 75.0)
+                self.assertEqual(idf.dx, 25.0)
+                self.assertEqual(idf.dy, -25.0)
+                self.assertEqual(idf.dmin, 0.0)
+                self.assertEqual(idf.dmax, 11.0)
+                self.assertTrue(np.isclose(idf.nodata, 1.0e20))
+                self.assertTrue(idf.equidistant)
+
+    def test_values(self):
+        from imodqgis.idf.conversion import IdfFile
+
+        with IdfFile(self.idf64) as idf:
+            values = idf.values
+            self.assertIsInstance(values, np.memmap)
+            self.assertFalse(values.flags.writeable)
+            self.assertTrue(np.array_equal(values, self.values))
+
+    def test_read_window(self):
+        from imodqgis.idf.conversion import IdfFile
+
+        with IdfFile(self.idf32) as idf:
+            window = idf.read_window(1, 3, 1, 3)
+            self.assertTrue(np.array_equal(window, self.values[1:3, 1:3]))
+            self.assertTrue(np.array_equal(idf.read_window(), self.values))
+            with self.assertRaises(IndexError):
+                idf.read_window(0, 4)
+
+    def test_nonequidistant(self):
+        from imodqgis.idf.conversion import IdfFile, equidistant_indices
+
+        path = Path(self.tempdir.name) / "nonequidistant.idf"
+        values = np.arange(6, dtype=np.float32).reshape((2, 3))
+        write_nonequidistant(path, values, [10.0, 20.0, 10.0], [10.0, 20.0], 0.0, 30.0)
+        with IdfFile(path) as idf:
+            self.assertFalse(idf.equidistant)
+            self.assertTrue(np.array_equal(idf.dx, [10.0, 20.0, 10.0]))
+            self.assertTrue(np.array_equal(idf.dy, [-10.0, -20.0]))
+            self.assertTrue(np.array_equal(idf.values, values))
+            rows, cols, dx, dy = equidistant_indices(idf)
+            self.assertEqual((dx, dy), (10.0, -10.0))
+            self.assertTrue(np.array_equal(rows, [0, 1, 1]))
+            self.assertTrue(np.array_equal(cols, [0, 1, 1, 2]))
+
+            # A larger grid than allowed: the cell size is multiplied.
+            rows, cols, dx, dy = equidistant_indices(idf, max_cells=4)
+            self.assertEqual((dx, dy), (20.0, -20.0))
+            self.assertTrue(np.array_equal(rows, [1, 1]))
+            self.assertTrue(np.array_equal(cols, [1, 2]))
+
+    def test_read_idf(self):
+        from imodqgis.idf.conversion import read_idf
+
+        attrs, values = read_idf(self.idf32)
+        self.assertEqual(attrs["nrow"], 3)
+        self.assertEqual(attrs["ncol"], 4)
+        self.assertEqual(attrs["dtype"], "float32")
+        self.assertTrue(np.array_equal(values, self.values))
+
+
+class TestCaseIdfConversion(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        from imodqgis.idf.conversion import write
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.values = np.arange(12, dtype=np.float64).reshape((3, 4))
+        self.values[0, 0] = 1.0e20
+        self.spatial_reference = (25.0, 0.0, 100.0, -25.0, 0.0, 75.0)
+        self.crs_wkt = QgsCoordinateReferenceSystem("EPSG:28992").toWkt()
+        self.idf_paths = []
+        for dtype in (np.float32, np.float64):
+            path = Path(self.tempdir.name) / f"{np.dtype(dtype).name}.idf"
+            write(path, self.values, self.spatial_reference, dtype=dtype)
+            self.idf_paths.append(path)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def assert_raster(self, path, expected_dtype):
+        from osgeo import gdal
+
+        dataset = gdal.Open(str(path))
+        band = dataset.GetRasterBand(1)
+        self.assertEqual(dataset.GetGeoTransform(), (0.0, 25.0, 0.0, 75.0, 0.0, -25.0))
+        self.assertEqual(gdal.GetDataTypeName(band.DataType), expected_dtype)
+        self.assertTrue(np.isclose(band.GetNoDataValue(), 1.0e20))
+        self.assertTrue(np.allclose(band.ReadAsArray(), self.values))
+        dataset = None
+
+    def test_geotiff_options(self):
+        from imodqgis.idf.conversion import geotiff_options
+
+        self.assertEqual(
+            geotiff_options(compress=False), ["TILED=YES", "BIGTIFF=IF_SAFER"]
+        )
+        options = geotiff_options()
+        self.assertEqual(options[:2], ["TILED=YES", "BIGTIFF=IF_SAFER"])
+        self.assertIn(options[2], ("COMPRESS=ZSTD", "COMPRESS=DEFLATE"))
+        self.assertEqual(options[3], "PREDICTOR=3")
+
+        # ZSTD if GDAL supports it, DEFLATE otherwise.
+        for creation_options, method in (
+            ("<Value>DEFLATE</Value><Value>ZSTD</Value>", "ZSTD"),
+            ("<Value>DEFLATE</Value>", "DEFLATE"),
+        ):
+            with patch("imodqgis.idf.conversion.gdal.GetDriverByName") as driver:
+                driver.return_value.GetMetadataItem.return_value = creation_options
+                self.assertEqual(
+                    geotiff_options(),
+                    [
+                        "TILED=YES",
+                        "BIGTIFF=IF_SAFER",
+                        f"COMPRESS={method}",
+                        "PREDICTOR=3",
+                    ],
+                )
+
+    def test_overview_levels(self):
+        from imodqgis.idf.conversion import OVERVIEW_MINSIZE, overview_levels
+
+        self.assertEqual(OVERVIEW_MINSIZE, 256)
+        self.assertEqual(overview_levels(3, 4), [])
+        # Overviews are added while the coarsest is at least OVERVIEW_MINSIZE.
+        self.assertEqual(overview_levels(2 * OVERVIEW_MINSIZE - 1, 10000), [])
+        self.assertEqual(overview_levels(2 * OVERVIEW_MINSIZE, 10000), [2])
+        self.assertEqual(overview_levels(5000, 4096), [2, 4, 8, 16])
+        self.assertEqual(overview_levels(4096, 5000), overview_levels(5000, 4096))
+
+    def test_convert_idf_to_gdal(self):
+        from imodqgis.idf.conversion import convert_idf_to_gdal
+
+        for path, dtype in zip(self.idf_paths, ("Float32", "Float64")):
+            tiff_path = convert_idf_to_gdal(path, self.crs_wkt)
+            self.assertEqual(tiff_path.suffix, ".tif")
+            self.assert_raster(tiff_path, dtype)
+
+    def test_convert_idf_to_gdal_reuse(self):
+        from imodqgis.idf.conversion import convert_idf_to_gdal, write
+
+        path = self.idf_paths[0]
+        tiff_path = convert_idf_to_gdal(path, self.crs_wkt)
+        mtime = tiff_path.stat().st_mtime_ns
+        # Unchanged IDF: the existing GeoTIFF is reused.
+        self.assertEqual(convert_idf_to_gdal(path, self.crs_wkt), tiff_path)
+        self.assertEqual(tiff_path.stat().st_mtime_ns, mtime)
+
+        # Changed IDF: the GeoTIFF is written again.
+        self.values = self.values + 1.0
+        write(path, self.values, self.spatial_reference, dtype=np.float32)
+        os.utime(path, ns=(mtime + 1, mtime + 1))
+        convert_idf_to_gdal(path, self.crs_wkt)
+        self.assert_raster(tiff_path, "Float32")
+
+    def test_evict(self):
+        from imodqgis.idf import cache
+
+        cachedir = Path(self.tempdir.name) / "idf-cache"
+        cachedir.mkdir()
+        paths = [cachedir / f"test-evict-{i}.tif" for i in range(4)]
+        for i, path in enumerate(paths):
+            path.write_bytes(b"0" * 100)
+            os.utime(path, (i, i))
+        # The most recent raster is in use by another conversion.
+        os.utime(paths[3])
+
+        # Removing the least recently used file is sufficient, but paths[0]
+        # must be kept.
+        cache.evict(keep=paths[0], maxsize=300, cachedir=cachedir)
+        self.assertTrue(paths[0].exists())
+        self.assertFalse(paths[1].exists())
+        self.assertTrue(paths[2].exists())
+        self.assertTrue(paths[3].exists())
+
+        # Recently used rasters are never removed.
+        cache.evict(keep=paths[0], maxsize=0, cachedir=cachedir)
+        self.assertTrue(paths[0].exists())
+        self.assertFalse(paths[2].exists())
+        self.assertTrue(paths[3].exists())
+
+    def test_convert_gdal_to_idf(self):
+        from imodqgis.idf.conversion import (
+            IdfFile,
+            convert_gdal_to_idf,
+            convert_idf_to_gdal,
+            convert_idf_to_vrt,
+        )
+
+        tiff_path = convert_idf_to_gdal(self.idf_paths[1], self.crs_wkt)
+        idf_path = Path(self.tempdir.name) / "exported.idf"
+        convert_gdal_to_idf(str(tiff_path), idf_path, np.float32)
+        with IdfFile(idf_path) as idf:
+            self.assertEqual(idf.dtype, "float32")
+            self.assertEqual(idf.dx, 25.0)
+            self.assertEqual(idf.dy, -25.0)
+            self.assertEqual(idf.ymin, 0.0)
+            self.assertEqual(idf.xmax, 100.0)
+            # Nodata is excluded from the data range
+            self.assertEqual(idf.dmin, 1.0)
+            self.assertEqual(idf.dmax, 11.0)
+            self.assertTrue(np.allclose(idf.values, self.values))
+
+        # A raster cannot be exported to the IDF it reads from.
+        vrt_path = convert_idf_to_vrt(self.idf_paths[1], self.crs_wkt)
+        with self.assertRaises(ValueError):
+            convert_gdal_to_idf(str(vrt_path), self.idf_paths[1], np.float64)
+
+    def test_idf_series_name(self):
+        from datetime import datetime
+
+        from imodqgis.idf.series import idf_series_name
+
+        self.assertEqual(idf_series_name("head"), "head.idf")
+        self.assertEqual(idf_series_name("head", layer=3), "head_l3.idf")
+        self.assertEqual(
+            idf_series_name("head", datetime(2020, 1, 2), 1), "head_20200102_l1.idf"
+        )
+        self.assertEqual(
+            idf_series_name("head", datetime(2020, 1, 2, 12, 30)),
+            "head_20200102123000.idf",
+        )
+
+    def test_convert_gdal_to_idf_series(self):
+        from imodqgis.idf.conversion import IdfFile, convert_idf_to_gdal
+        from imodqgis.idf.series import convert_gdal_to_idf_series
+
+        tiff_path = convert_idf_to_gdal(self.idf_paths[1], self.crs_wkt)
+        idf_paths = convert_gdal_to_idf_series(
+            str(tiff_path), self.tempdir.name, "exported", np.float64
+        )
+        self.assertEqual([p.name for p in idf_paths], ["exported_l1.idf"])
+        with IdfFile(idf_paths[0]) as idf:
+            self.assertTrue(np.allclose(idf.values, self.values))
+
+    def test_convert_nonequidistant(self):
+        from osgeo import gdal
+
+        from imodqgis.idf.conversion import convert_idf
+
+        path = Path(self.tempdir.name) / "nonequidistant.idf"
+        values = np.arange(6, dtype=np.float32).reshape((2, 3))
+        write_nonequidistant(path, values, [10.0, 20.0, 10.0], [10.0, 20.0], 0.0, 30.0)
+        # Cannot be opened in place: resampled to a GeoTIFF instead.
+        tiff_path = convert_idf(path, self.crs_wkt)
+        self.assertEqual(tiff_path.suffix, ".tif")
+        dataset = gdal.Open(str(tiff_path))
+        self.assertEqual(dataset.GetGeoTransform(), (0.0, 10.0, 0.0, 30.0, 0.0, -10.0))
+        expected = [[0.0, 1.0, 1.0, 2.0], [3.0, 4.0, 4.0, 5.0], [3.0, 4.0, 4.0, 5.0]]
+        self.assertTrue(np.array_equal(dataset.ReadAsArray(), expected))
+        dataset = None
+
+    def test_convert_idf_fallback(self):
+        from imodqgis.idf.conversion import convert_idf
+
+        # GDAL cannot open the VRT: returning None, or raising if exceptions
+        # are enabled. A GeoTIFF is written instead.
+        for path, failure in zip(
+            self.idf_paths, ({"return_value": None}, {"side_effect": RuntimeError})
+        ):
+            with patch("imodqgis.idf.conversion.gdal.Open", **failure):
+                raster_path = convert_idf(path, self.crs_wkt)
+            self.assertEqual(raster_path.suffix, ".tif")
+            self.assertFalse(path.with_suffix(".vrt").exists())
+
+    def test_convert_idf_to_vrt(self):
+        from imodqgis.idf.conversion import convert_idf_to_vrt
+
+        for path, dtype in zip(self.idf_paths, ("Float32", "Float64")):
+            vrt_path = convert_idf_to_vrt(path, self.crs_wkt)
+            self.assertEqual(vrt_path.suffix, ".vrt")
+            self.assert_raster(vrt_path, dtype)
+
+
+class TestCaseIdfCatalog(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        # Required call in order to import widgets
+        imodplugin._import_all_submodules()
+
+        from imodqgis.idf.conversion import write
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        values = np.ones((3, 4))
+        spatial_reference = (25.0, 0.0, 100.0, -25.0, 0.0, 75.0)
+        for name in (
+            "head_20200101_l1.idf",
+            "head_20200101_l2.IDF",
+            "head_20200102_l1.idf",
+            "top_l1.idf",
+        ):
+            write(Path(self.tempdir.name) / name, values, spatial_reference)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_parse_idf_name(self):
+        from imodqgis.idf.catalog import parse_idf_name
+
+        self.assertEqual(
+            parse_idf_name("head_20200101_l1.idf"),
+            {"name": "head", "time": "2020-01-01T00:00:00", "layer": 1},
+        )
+        self.assertEqual(
+            parse_idf_name("upper_head_20200101120000.IDF"),
+            {"name": "upper_head", "time": "2020-01-01T12:00:00", "layer": None},
+        )
+        self.assertEqual(
+            parse_idf_name("bot_l12.idf"), {"name": "bot", "time": None, "layer": 12}
+        )
+        self.assertEqual(
+            parse_idf_name("dem.idf"), {"name": "dem", "time": None, "layer": None}
+        )
+        # Not a valid date: part of the name
+        self.assertEqual(
+            parse_idf_name("well_00000001.idf"),
+            {"name": "well_00000001", "time": None, "layer": None},
+        )
+        self.assertEqual(
+            parse_idf_name("well_20201399123456_l2.idf"),
+            {"name": "well_20201399123456", "time": None, "layer": 2},
+        )
+
+    def test_scan_idf_directory(self):
+        from imodqgis.idf.catalog import filter_catalog, scan_idf_directory
+        from imodqgis.idf.conversion import write
+
+        entries = scan_idf_directory(self.tempdir.name)
+        self.assertEqual(len(entries), 4)
+        self.assertEqual(entries[0]["nrow"], 3)
+        self.assertEqual(entries[0]["ncol"], 4)
+        self.assertEqual(len(filter_catalog(entries, name="head")), 3)
+        self.assertEqual(len(filter_catalog(entries, layer=1)), 3)
+        selection = filter_catalog(entries, name="head", time="2020-01-02T00:00:00")
+        self.assertEqual(Path(selection[0]["path"]).name, "head_20200102_l1.idf")
+
+        # Changed files are read again
+        path = Path(self.tempdir.name) / "top_l1.idf"
+        write(path, np.ones((5, 4)), (25.0, 0.0, 100.0, -25.0, 0.0, 125.0))
+        mtime = path.stat().st_mtime_ns + 1
+        os.utime(path, ns=(mtime, mtime))
+        entries = scan_idf_directory(self.tempdir.name)
+        self.assertEqual(filter_catalog(entries, name="top")[0]["nrow"], 5)
+
+        # Digits which are not a date do not exclude the IDF from the catalog.
+        path = Path(self.tempdir.name) / "well_00000001.idf"
+        write(path, np.ones((3, 4)), (25.0, 0.0, 100.0, -25.0, 0.0, 75.0))
+        entries = scan_idf_directory(self.tempdir.name)
+        self.assertEqual(len(filter_catalog(entries, name="well_00000001")), 1)
+
+    def test_convert_idfs_to_vrt(self):
+        from datetime import datetime
+
+        from osgeo import gdal
+
+        from imodqgis.idf.conversion import write
+        from imodqgis.idf.stack import convert_idfs_to_vrt, read_band_times
+
+        crs_wkt = QgsCoordinateReferenceSystem("EPSG:28992").toWkt()
+        paths = [
+            str(Path(self.tempdir.name) / name)
+            for name in (
+                "head_20200102_l1.idf",
+                "head_20200101_l2.IDF",
+                "head_20200101_l1.idf",
+            )
+        ]
+        vrt_path = convert_idfs_to_vrt(paths, crs_wkt)
+        self.assertTrue(vrt_path.name.startswith("head_stack_"))
+        self.assertEqual(vrt_path.suffix, ".vrt")
+        dataset = gdal.Open(str(vrt_path))
+        self.assertEqual(dataset.RasterCount, 3)
+        descriptions = [dataset.GetRasterBand(i).GetDescription() for i in range(1, 4)]
+        self.assertEqual(
+            descriptions,
+            ["head_20200101_l1", "head_20200101_l2", "head_20200102_l1"],
+        )
+        self.assertTrue(np.allclose(dataset.ReadAsArray(), 1.0))
+        dataset = None
+        self.assertEqual(
+            read_band_times(vrt_path),
+            [datetime(2020, 1, 1), datetime(2020, 1, 1), datetime(2020, 1, 2)],
+        )
+
+        # The same IDFs, in any order, are written to the same VRT; other
+        # selections do not overwrite it.
+        self.assertEqual(convert_idfs_to_vrt(paths[::-1], crs_wkt), vrt_path)
+        subset_path = convert_idfs_to_vrt(paths[:2], crs_wkt)
+        self.assertNotEqual(subset_path, vrt_path)
+        dataset = gdal.Open(str(vrt_path))
+        self.assertEqual(dataset.RasterCount, 3)
+        dataset = None
+
+        # The grids of the IDFs must match.
+        other = Path(self.tempdir.name) / "head_20200103_l1.idf"
+        write(other, np.ones((2, 2)), (25.0, 0.0, 50.0, -25.0, 0.0, 50.0))
+        with self.assertRaises(ValueError):
+            convert_idfs_to_vrt(paths + [str(other)], crs_wkt)
+
+
+def run_all():
+    """
+    Default function that is called by the runner if nothing else is specified
+    """
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(TestCaseIdfFile))
+    suite.addTests(unittest.makeSuite(TestCaseIdfConversion))
+    suite.addTests(unittest.makeSuite(TestCaseIdfCatalog))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -1,9 +1,11 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 from qgis.core import (
     QgsExpression,
+    QgsExpressionContext,
     QgsProject,
     QgsVectorLayer,
     QgsVectorLayerTemporalProperties,
@@ -138,29 +140,13 @@ class TestCaseIpfTimeseries(unittest.TestCase):
     def test_set_timeseries_windows(self):
         from imodqgis.ipf.ipf_dialog import set_timeseries_windows
 
-        skip_lines = 6
-
-        uri = "&".join(
-            [
-                f"file:///{str(self.ipffile.as_posix())}?encoding=UTF-8",
-                "delimiter=,",
-                "type=csv",
-                "xField=field_1",
-                "yField=field_2",
-                f"skipLines={skip_lines}",
-                "useHeader=no",
-                "trimFields=yes",
-                "geomType=point",
-            ]
+        layer = QgsVectorLayer(
+            "Point?field=id:string&field=datetime_start:datetime"
+            "&field=datetime_end:datetime",
+            "timeseries",
+            "memory",
         )
-        layer = QgsVectorLayer(uri, self.ipffile.stem, "delimitedtext")
-
-        # Functions are registered during the call of this function
-        set_timeseries_windows(layer, 2, "txt", self.ipffile.parent.as_posix())
-
-        # Test if functions properly registered
-        QgsExpression().isFunctionName("ipf_datetime_start")
-        QgsExpression().isFunctionName("ipf_datetime_end")
+        set_timeseries_windows(layer)
 
         # Test temporal properties
         temporal_properties = layer.temporalProperties()
@@ -172,6 +158,40 @@ class TestCaseIpfTimeseries(unittest.TestCase):
             QgsVectorLayerTemporalProperties.ModeFeatureDateTimeStartAndEndFromFields,
         )
 
+    def test_datetime_attributes(self):
+        from imodqgis.ipf.ipf_dialog import read_ipf
+
+        layer = read_ipf(self.ipffile)
+        features = {
+            feature.attribute("id"): feature for feature in layer.getFeatures()
+        }
+        start = features["B30F0059001"].attribute("datetime_start")
+        end = features["B30F0059001"].attribute("datetime_end")
+        self.assertEqual(start.toString("yyyyMMdd"), "19520814")
+        self.assertEqual(end.toString("yyyyMMdd"), "19771214")
+
+    def test_deprecated_datetime_functions(self):
+        # Expression fields of projects saved by earlier versions still evaluate.
+        from imodqgis.ipf.ipf_dialog import read_ipf
+
+        layer = read_ipf(self.ipffile)
+        feature = next(
+            feature
+            for feature in layer.getFeatures()
+            if feature.attribute("id") == "B30F0059001"
+        )
+        context = QgsExpressionContext()
+        context.setFeature(feature)
+        pathparent = self.ipffile.parent.as_posix()
+        for function, expected in (
+            ("ipf_datetime_start", "19520814"),
+            ("ipf_datetime_end", "19771214"),
+        ):
+            expression = QgsExpression(f"{function}(2, 'txt', '{pathparent}')")
+            value = expression.evaluate(context)
+            self.assertFalse(expression.hasEvalError(), expression.evalErrorString())
+            self.assertEqual(value.toString("yyyyMMdd"), expected)
+
 
 class TestCaseIpfBorehole(unittest.TestCase):
     def setUp(self):
@@ -280,6 +300,46 @@ class TestCaseIpfBorehole(unittest.TestCase):
         temporal_properties = layer.temporalProperties()
         self.assertFalse(temporal_properties.isActive())
 
+    def test_read_ipfs_geopackage(self):
+        from imodqgis.ipf.ipf_dialog import read_ipf
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            gpkg_path = Path(tempdir) / "boreholes.gpkg"
+            layer = read_ipf(self.ipffile, gpkg_path=gpkg_path)
+            self.assertTrue(gpkg_path.exists())
+            self.assertEqual(layer.providerType(), "ogr")
+            self.assertEqual(layer.featureCount(), 4)
+            self.assertEqual(layer.customProperty("ipf_type"), "BOREHOLE")
+            ids = sorted(feature.attribute("id") for feature in layer.getFeatures())
+            self.assertEqual(ids, ["id_0", "id_1", "id_2", "id_3"])
+            # The GeoPackage layer has a leading fid field: the index column
+            # refers to the field of the layer.
+            indexcol = int(layer.customProperty("ipf_indexcolumn"))
+            self.assertEqual(layer.fields().at(indexcol).name(), "id")
+            ids = sorted(feature.attribute(indexcol) for feature in layer.getFeatures())
+            self.assertEqual(ids, ["id_0", "id_1", "id_2", "id_3"])
+            del layer
+
+    def test_geopackage_path(self):
+        from imodqgis.ipf.ipf_dialog import geopackage_path, read_ipf
+
+        # The points are kept in memory, unless asked otherwise.
+        self.assertFalse(self.dialog.geopackage_checkbox.isChecked())
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            ipf_path = Path(tempdir) / "boreholes.ipf"
+            gpkg_path = geopackage_path(ipf_path)
+            self.assertEqual(gpkg_path, Path(tempdir) / "boreholes.gpkg")
+
+            # A GeoPackage in use by a layer is not overwritten.
+            layer = read_ipf(self.ipffile, gpkg_path=gpkg_path)
+            self.project.addMapLayer(layer)
+            self.assertEqual(
+                geopackage_path(ipf_path), Path(tempdir) / "boreholes-1.gpkg"
+            )
+            self.project.removeMapLayer(layer.id())
+            self.assertEqual(geopackage_path(ipf_path), gpkg_path)
+
 
 def run_all():
     """
@@ -1,4 +1,8 @@
+import os
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
@@ -92,6 +96,64 @@ class TestCaseIpfBorehole(unittest.TestCase):
         with self.assertRaises(ValueError):
             read_associated_timeseries(self.associated[0])
 
+    def test_write_ipf(self):
+        from imodqgis.ipf.reading import read_associated_borehole, read_ipf, write_ipf
+
+        df, ext = read_ipf(self.ipffile)
+        associated = {
+            name: read_associated_borehole(self.ipfdir / f"{name}.{ext}")
+            for name in df["indexcolumn"]
+        }
+        associated["id_0"].loc[1, "lithology"] = np.nan
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "boreholes.ipf"
+            write_ipf(path, df, associated, ext)
+
+            written, written_ext = read_ipf(path)
+            pd.testing.assert_frame_equal(written, df)
+            self.assertEqual(written_ext, ext)
+            for name, expected in associated.items():
+                actual = read_associated_borehole(Path(tmpdir) / f"{name}.{ext}")
+                pd.testing.assert_frame_equal(actual, expected)
+
+            # The nodata value is only written to the associated files.
+            missing = df.assign(top=[1.0, np.nan, 2.0, 3.0])
+            write_ipf(path, missing)
+            written, _ = read_ipf(path)
+            self.assertTrue(np.isnan(written["top"].iloc[1]))
+            pd.testing.assert_frame_equal(written, missing)
+
+    def test_store_mixed_types(self):
+        from imodqgis.ipf.reading import read_associated_borehole
+        from imodqgis.ipf.store import read_stored, write_store
+
+        # lithology is text in one file, and all missing (float) in another.
+        text = read_associated_borehole(self.associated[0])
+        missing = text.assign(lithology=np.nan)
+        self.assertEqual(missing["lithology"].dtype, np.float64)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = [Path(tmpdir) / "missing.txt", Path(tmpdir) / "text.txt"]
+            frames = {}
+            for path, df in zip(paths, (missing, text)):
+                path.write_text("")
+                frames[path.name] = (2, df, os.stat(path))
+            write_store(Path(tmpdir), frames)
+
+            pd.testing.assert_frame_equal(read_stored(paths[0], 2), missing)
+            pd.testing.assert_frame_equal(read_stored(paths[1], 2), text)
+
+    def test_read_associated_summary(self):
+        from imodqgis.ipf.reading import read_associated_summary
+
+        summary = read_associated_summary(self.associated[0])
+        self.assertEqual(summary["itype"], 2)
+        self.assertEqual(summary["nrow"], 4)
+        self.assertEqual(summary["columns"], ["lithology"])
+        self.assertIsNone(summary["start"])
+        self.assertIsNone(summary["end"])
+
 
 class TestCaseIpfTimeseries(unittest.TestCase):
     def setUp(self):
@@ -168,10 +230,11 @@ class TestCaseIpfTimeseries(unittest.TestCase):
         self.assertEqual(df.index.year[0], 1952)
         self.assertEqual(df.index.year[-1], 1977)
 
-        # There is a column named "time", with time as strings, and the index is
-        # called "time" as well.
-        self.assertEqual(df["time"][0], "19520814000000")
-        self.assertEqual(df["time"][-1], "19771214000000")
+        # There is a column named "time", with time as integers, and the index
+        # is called "time" as well.
+        self.assertEqual(df["time"][0], 19520814000000)
+        self.assertEqual(df["time"][-1], 19771214000000)
+        self.assertEqual(df.index.name, "time")
 
         self.assertEqual(df["head"][0], -2.1)
         self.assertEqual(df["head"][-1], -1.25)
@@ -182,6 +245,207 @@ class TestCaseIpfTimeseries(unittest.TestCase):
         with self.assertRaises(ValueError):
             read_associated_borehole(self.associated[0])
 
+    def test_decode_ipf_datetimes(self):
+        from imodqgis.ipf.reading import decode_ipf_datetimes
+
+        # Mixed yyyymmdd and yyyymmddhhmmss
+        values = np.array([19520814, 19520828120530, 20000229])
+        times = decode_ipf_datetimes(values, name="time")
+        expected = pd.DatetimeIndex(
+            ["1952-08-14", "1952-08-28 12:05:30", "2000-02-29"], name="time"
+        )
+        self.assertTrue(times.equals(expected))
+        self.assertEqual(times.name, "time")
+
+        with self.assertRaises(ValueError):
+            decode_ipf_datetimes(np.array([195208]))
+        with self.assertRaises(ValueError):
+            decode_ipf_datetimes(np.array([19521332]))
+
+    def test_write_ipf(self):
+        from imodqgis.ipf.reading import (
+            read_associated_timeseries,
+            read_ipf,
+            write_associated,
+            write_ipf,
+        )
+
+        df, ext = read_ipf(self.ipffile)
+        associated = {
+            name: read_associated_timeseries(self.ipfdir / f"{name}.{ext}")
+            for name in df["indexcolumn"]
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "timeseries.ipf"
+            write_ipf(path, df, associated, ext, max_workers=2)
+
+            written, written_ext = read_ipf(path)
+            pd.testing.assert_frame_equal(written, df)
+            self.assertEqual(written_ext, ext)
+            for name, expected in associated.items():
+                actual = read_associated_timeseries(Path(tmpdir) / f"{name}.{ext}")
+                pd.testing.assert_frame_equal(actual, expected)
+
+            # An edited timeseries, without the datetime column
+            edited = pd.DataFrame(
+                {"head": [1.0, np.nan]},
+                index=pd.DatetimeIndex(
+                    ["2000-01-01", "2000-01-01 12:00:00"], name="time"
+                ),
+            )
+            write_associated(Path(tmpdir) / "edited.txt", edited)
+            actual = read_associated_timeseries(Path(tmpdir) / "edited.txt")
+            self.assertEqual(actual["time"].tolist(), [20000101000000, 20000101120000])
+            pd.testing.assert_index_equal(actual.index, edited.index)
+            self.assertEqual(actual["head"][0], 1.0)
+            self.assertTrue(np.isnan(actual["head"][1]))
+
+    def test_read_associated_summary(self):
+        from imodqgis.ipf.reading import read_associated_summary
+
+        summary = read_associated_summary(self.associated[0])
+        self.assertEqual(summary["itype"], 1)
+        self.assertEqual(summary["nrow"], 95)
+        self.assertEqual(summary["columns"], ["head"])
+        self.assertEqual(summary["start"], "1952-08-14T00:00:00")
+        self.assertEqual(summary["end"], "1977-12-14T00:00:00")
+
+    def test_scan_associated(self):
+        from imodqgis.ipf.index import (
+            read_associated_index,
+            sample_associated,
+            scan_associated,
+            summarize,
+        )
+
+        names = [path.stem for path in self.associated]
+        entries = scan_associated(self.ipffile, names, "txt")
+        self.assertEqual(sorted(entries), [path.name for path in self.associated])
+        self.assertEqual(read_associated_index(self.ipffile), entries)
+        ipf_type, columns = summarize(entries.values())
+        self.assertEqual(ipf_type.name, "TIMESERIES")
+        self.assertEqual(columns, ["head"])
+        # Indexed: the summaries are taken from the index
+        self.assertEqual(sample_associated(self.ipffile, names, "txt"), entries)
+
+    def test_scan_associated_missing(self):
+        from imodqgis.ipf.index import (
+            consolidate_associated,
+            read_associated_index,
+            sample_associated,
+            scan_associated,
+            summarize,
+        )
+        from imodqgis.ipf.reading import read_associated_timeseries
+        from imodqgis.ipf.store import read_stored
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ipfdir = Path(tmpdir) / "ipf-timeseries"
+            shutil.copytree(self.ipfdir, ipfdir)
+            ipffile = ipfdir / "timeseries.ipf"
+            associated = sorted(ipfdir.glob("*.txt"))
+            associated[0].unlink()
+            names = [path.stem for path in associated]
+
+            # A missing file does not abort the scan
+            entries = scan_associated(ipffile, names, "txt")
+            self.assertIsNone(entries[associated[0].name])
+            for path in associated[1:]:
+                self.assertEqual(entries[path.name]["itype"], 1)
+            self.assertEqual(read_associated_index(ipffile), entries)
+            ipf_type, columns = summarize(entries.values())
+            self.assertEqual(ipf_type.name, "TIMESERIES")
+            self.assertEqual(columns, ["head"])
+            self.assertEqual(sample_associated(ipffile, names, "txt"), entries)
+            # Nor does it abort consolidation
+            consolidate_associated(ipffile, names, "txt")
+            pd.testing.assert_frame_equal(
+                read_stored(associated[1], 1),
+                read_associated_timeseries(associated[1]),
+            )
+
+            # Once the file exists, it is read by the next scan
+            shutil.copy(self.associated[0], associated[0])
+            entries = scan_associated(ipffile, names, "txt")
+            self.assertEqual(entries[associated[0].name]["itype"], 1)
+
+    def test_consolidate_associated(self):
+        from imodqgis.ipf.index import consolidate_associated
+        from imodqgis.ipf.reading import read_associated_timeseries
+        from imodqgis.ipf.store import read_stored
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ipfdir = Path(tmpdir) / "ipf-timeseries"
+            shutil.copytree(self.ipfdir, ipfdir)
+            associated = sorted(ipfdir.glob("*.txt"))
+            expected = [read_associated_timeseries(path) for path in associated]
+
+            names = [path.stem for path in associated]
+            store_path = consolidate_associated(ipfdir / "timeseries.ipf", names, "txt")
+            self.assertTrue((store_path / "index.json").is_file())
+
+            for path, df in zip(associated, expected):
+                pd.testing.assert_frame_equal(read_stored(path, 1), df)
+                # Not a borehole
+                self.assertIsNone(read_stored(path, 2))
+
+            # A changed file is no longer served by the store
+            with open(associated[0], "a") as f:
+                f.write("\n")
+            self.assertIsNone(read_stored(associated[0], 1))
+
+    def test_consolidate_concurrently(self):
+        from imodqgis.ipf.index import consolidate_associated
+        from imodqgis.ipf.reading import read_associated_timeseries
+        from imodqgis.ipf.store import read_stored
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ipfdir = Path(tmpdir) / "ipf-timeseries"
+            shutil.copytree(self.ipfdir, ipfdir)
+            associated = sorted(ipfdir.glob("*.txt"))
+            expected = [read_associated_timeseries(path) for path in associated]
+
+            # Two IPFs in the same directory, consolidated at the same time.
+            names = [path.stem for path in associated]
+            subsets = [names[:1], names[1:]]
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for _ in range(5):
+                    list(
+                        executor.map(
+                            lambda subset: consolidate_associated(
+                                ipfdir / "timeseries.ipf", subset, "txt"
+                            ),
+                            subsets,
+                        )
+                    )
+
+            # The files of both IPFs are stored.
+            for path, df in zip(associated, expected):
+                pd.testing.assert_frame_equal(read_stored(path, 1), df)
+
+    def test_read_stored_removed(self):
+        from imodqgis.ipf.index import consolidate_associated
+        from imodqgis.ipf.reading import read_associated_timeseries
+        from imodqgis.ipf.store import read_stored, store_directory
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ipfdir = Path(tmpdir) / "ipf-timeseries"
+            shutil.copytree(self.ipfdir, ipfdir)
+            associated = sorted(ipfdir.glob("*.txt"))
+            expected = read_associated_timeseries(associated[0])
+
+            names = [path.stem for path in associated]
+            consolidate_associated(ipfdir / "timeseries.ipf", names, "txt")
+            for path in store_directory(ipfdir).glob("*.npy"):
+                path.unlink()
+
+            # The associated file is parsed instead.
+            self.assertIsNone(read_stored(associated[0], 1))
+            pd.testing.assert_frame_equal(
+                read_associated_timeseries.__wrapped__(associated[0]), expected
+            )
+
 
 def run_all():
     """
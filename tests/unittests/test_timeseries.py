@@ -4,12 +4,11 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 from PyQt5.QtGui import QColor, QPainter, QPicture
+from PyQt5.QtTest import QSignalSpy
 from qgis.core import QgsMeshLayer, QgsPointXY, QgsProject
 from qgis.testing import unittest
 from qgis.utils import plugins
 
-# TODO: Create TestTimeseriesIpf
-
 
 def get_axis_ticklabels(axis_item):
     """
@@ -256,10 +255,88 @@ class TestTimeseriesMesh(unittest.TestCase):
         self.assertTrue(self.widget.pens == [])
 
 
+class TestTimeseriesIpf(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        imodplugin._import_all_submodules()
+
+        from imodqgis.ipf.ipf_dialog import read_ipf
+
+        script_dir = Path(__file__).parent
+        ipffile = script_dir / ".." / "testdata" / "ipf-timeseries" / "timeseries.ipf"
+        self.layer = read_ipf(str(ipffile.resolve()))
+        self.expected_names = ["B30F0059001", "B30F0217001", "B30F0222001"]
+
+    def test_selected_associated_paths(self):
+        from imodqgis.timeseries.ipf_loader import selected_associated_paths
+
+        feature_ids = [feature.id() for feature in self.layer.getFeatures()]
+        paths = selected_associated_paths(self.layer, feature_ids[::-1])
+
+        self.assertEqual(list(paths.keys()), self.expected_names)
+        for name, path in paths.items():
+            self.assertEqual(Path(path).name, f"{name}.txt")
+            self.assertTrue(Path(path).is_file())
+
+    def test_load(self):
+        from imodqgis.timeseries.ipf_loader import (
+            AssociatedTimeseriesLoader,
+            selected_associated_paths,
+        )
+
+        feature_ids = [feature.id() for feature in self.layer.getFeatures()]
+        paths = selected_associated_paths(self.layer, feature_ids)
+
+        loader = AssociatedTimeseriesLoader()
+        spy = QSignalSpy(loader.loaded)
+        generation = loader.load(paths)
+        while len(spy) < len(paths):
+            self.assertTrue(spy.wait(5000))
+
+        self.assertEqual(sorted(args[1] for args in spy), self.expected_names)
+        for emitted_generation, _, dataframe in spy:
+            self.assertEqual(emitted_generation, generation)
+            self.assertIsInstance(dataframe, pd.DataFrame)
+            self.assertIsInstance(dataframe.index, pd.DatetimeIndex)
+
+    def test_cancel(self):
+        from imodqgis.timeseries.ipf_loader import AssociatedTimeseriesLoader
+
+        loader = AssociatedTimeseriesLoader()
+        generation = loader.load({})
+        loader.cancel()
+        self.assertEqual(loader.generation, generation + 1)
+        self.assertEqual(loader.futures, [])
+
+    def test_shutdown(self):
+        from imodqgis.timeseries.ipf_loader import (
+            AssociatedTimeseriesLoader,
+            selected_associated_paths,
+        )
+
+        feature_ids = [feature.id() for feature in self.layer.getFeatures()]
+        paths = selected_associated_paths(self.layer, feature_ids)
+
+        loader = AssociatedTimeseriesLoader()
+        generation = loader.load(paths)
+        loader.shutdown()
+        self.assertIsNone(loader.executor)
+        self.assertEqual(loader.generation, generation + 1)
+
+        # Loading again starts a new thread pool
+        spy = QSignalSpy(loader.loaded)
+        generation = loader.load(paths)
+        while len(spy) < len(paths):
+            self.assertTrue(spy.wait(5000))
+        self.assertEqual(sorted(args[1] for args in spy), self.expected_names)
+        loader.shutdown()
+
+
 def run_all():
     """
     Default function that is called by the runner if nothing else is specified
     """
     suite = unittest.TestSuite()
     suite.addTests(unittest.makeSuite(TestTimeseriesMesh))
+    suite.addTests(unittest.makeSuite(TestTimeseriesIpf))
     unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -1,6 +1,10 @@
+import os
 import sys
+import tempfile
 from pathlib import Path, PosixPath
 
+import numpy as np
+import pandas as pd
 from qgis.core import QgsMeshLayer, QgsProject
 from qgis.gui import QgsLayerTreeMapCanvasBridge, QgsMapCanvas
 from qgis.testing import unittest
@@ -141,6 +145,112 @@ class TestUtilsConfigDir(unittest.TestCase):
         self.assertEquals(configdir.stem, ".imod-qgis")
 
 
+def read_csv(path):
+    return pd.read_csv(path)
+
+
+class TestUtilsDataFrameCache(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        imodplugin._import_all_submodules()
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "a.csv"
+        pd.DataFrame({"a": [1.0, 2.0, 3.0]}).to_csv(self.path, index=False)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_hit_and_miss(self):
+        from imodqgis.utils.dataframe_cache import DataFrameCache
+
+        cache = DataFrameCache()
+        first = cache.get(self.path, read_csv)
+        second = cache.get(self.path, read_csv)
+
+        self.assertTrue(first.equals(second))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        # Modifying a returned DataFrame does not modify the cache
+        first["a"] = 0.0
+        self.assertEqual(cache.get(self.path, read_csv)["a"].tolist(), [1.0, 2.0, 3.0])
+
+    def test_changed_file(self):
+        from imodqgis.utils.dataframe_cache import DataFrameCache
+
+        cache = DataFrameCache()
+        cache.get(self.path, read_csv)
+        pd.DataFrame({"a": [4.0, 5.0]}).to_csv(self.path, index=False)
+        # Ensure a different modification time on coarse filesystem clocks
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        df = cache.get(self.path, read_csv)
+        self.assertEqual(df["a"].tolist(), [4.0, 5.0])
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_memory_bound(self):
+        from imodqgis.utils.dataframe_cache import DataFrameCache
+
+        other = Path(self.tmpdir.name) / "b.csv"
+        pd.DataFrame({"a": [1.0, 2.0, 3.0]}).to_csv(other, index=False)
+
+        nbytes = int(read_csv(self.path).memory_usage(deep=True).sum())
+        cache = DataFrameCache(max_bytes=nbytes)
+        cache.get(self.path, read_csv)
+        cache.get(other, read_csv)
+
+        # The least recently used DataFrame has been evicted
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.nbytes, nbytes)
+        cache.get(other, read_csv)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+class TestUtilsIntervals(unittest.TestCase):
+    def setUp(self):
+        imodplugin = plugins["imodqgis"]
+        imodplugin._import_all_submodules()
+
+    def test_from_boundaries(self):
+        from imodqgis.utils.intervals import BoreholeIntervals
+
+        intervals = BoreholeIntervals.from_boundaries(
+            [np.array([0.0, -1.0, -3.0]), np.array([1.0, -2.0])],
+            {"lithology": [np.array(["K", "Z", "Z"]), np.array(["V", np.nan])]},
+        )
+        self.assertEqual(len(intervals), 2)
+        self.assertEqual(intervals.counts.tolist(), [2, 1])
+        self.assertEqual(intervals.top.tolist(), [0.0, -1.0, 1.0])
+        self.assertEqual(intervals.bottom.tolist(), [-1.0, -3.0, -2.0])
+        top, bottom, values = intervals.borehole(1)
+        self.assertEqual(top.tolist(), [1.0])
+        self.assertEqual(bottom.tolist(), [-2.0])
+        self.assertEqual(values["lithology"].tolist(), ["V"])
+
+    def test_concatenate(self):
+        from imodqgis.utils.intervals import BoreholeIntervals
+
+        a = BoreholeIntervals([0, 2], [0.0, -1.0], [-1.0, -2.0], {"a": [1.0, 2.0]})
+        b = BoreholeIntervals(
+            [0, 1], [5.0], [4.0], {"b": np.array(["x"], dtype=object)}
+        )
+        intervals = BoreholeIntervals.concatenate([a, b])
+        self.assertEqual(intervals.offsets.tolist(), [0, 2, 3])
+        self.assertEqual(intervals.columns, ["a", "b"])
+        self.assertTrue(np.isnan(intervals.data["a"][2]))
+        self.assertEqual(intervals.data["b"][2], "x")
+        self.assertTrue(np.isnan(a.column("b")).all())
+        self.assertEqual(len(a.column("b")), 2)
+        self.assertEqual(
+            intervals.repeat(np.array([10.0, 20.0])).tolist(), [10.0, 10.0, 20.0]
+        )
+
+        with self.assertRaises(ValueError):
+            BoreholeIntervals([0, 2], [0.0], [-1.0], {})
+
+
 def run_all():
     """
     Default function that is called by the runner if nothing else is specified
@@ -149,4 +259,6 @@ def run_all():
     suite.addTests(unittest.makeSuite(TestUtilsLayer))
     suite.addTests(unittest.makeSuite(TestUtilsTemporal))
     suite.addTests(unittest.makeSuite(TestUtilsConfigDir))
+    suite.addTests(unittest.makeSuite(TestUtilsDataFrameCache))
+    suite.addTests(unittest.makeSuite(TestUtilsIntervals))
     unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)